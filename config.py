@@ -447,6 +447,112 @@ class Settings:
     EMBEDDING_API = os.getenv("EMBEDDING_API", "")
     COHERE_API_KEY = os.getenv("COHERE_API_KEY", "")
 
+    # Extracted-text cache (re-index skips download + parsing on a hit)
+    EXTRACTION_CACHE_ENABLED = (
+        os.getenv("EXTRACTION_CACHE_ENABLED", "True").lower() == "true"
+    )
+    EXTRACTION_CACHE_DIR = os.getenv(
+        "EXTRACTION_CACHE_DIR", "./storage/extraction_cache"
+    )
+
+    # Uploads are spooled in memory up to this size, then to a temp file
+    UPLOAD_SPOOL_MAX_MEMORY = int(os.getenv("UPLOAD_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+
+    # Resumable chunked uploads: staging directory, per-request chunk cap,
+    # idle lifetime of an upload session and how long a finalize may run
+    # before another request can take the session over.  Staged chunks live
+    # on local disk, so UPLOAD_STAGING_DIR must be shared by every instance
+    # (or requests of one upload routed to the same instance).
+    UPLOAD_STAGING_DIR = os.getenv("UPLOAD_STAGING_DIR", "./storage/upload_staging")
+    UPLOAD_CHUNK_MAX_BYTES = int(
+        os.getenv("UPLOAD_CHUNK_MAX_BYTES", str(8 * 1024 * 1024))
+    )
+    UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400"))
+    UPLOAD_FINALIZE_LEASE_SECONDS = int(
+        os.getenv("UPLOAD_FINALIZE_LEASE_SECONDS", "900")
+    )
+
+    # Batch uploads: files spooled / stored concurrently, files per request
+    UPLOAD_BATCH_CONCURRENCY = int(os.getenv("UPLOAD_BATCH_CONCURRENCY", "4"))
+    UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "20"))
+
+    # Upload deduplication by content hash.  With content-addressed storage
+    # identical blobs are stored once and shared across projects.
+    UPLOAD_DEDUP_ENABLED = (
+        os.getenv("UPLOAD_DEDUP_ENABLED", "True").lower() == "true"
+    )
+    STORAGE_CONTENT_ADDRESSED = (
+        os.getenv("STORAGE_CONTENT_ADDRESSED", "False").lower() == "true"
+    )
+
+    # Connection pool size of the shared Azure Blob / S3 clients
+    STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "32"))
+
+    # Cloud uploads larger than the threshold use S3 multipart / Azure
+    # staged blocks with bounded part concurrency
+    STORAGE_MULTIPART_THRESHOLD = int(
+        os.getenv("STORAGE_MULTIPART_THRESHOLD", str(16 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_PART_SIZE = int(
+        os.getenv("STORAGE_UPLOAD_PART_SIZE", str(8 * 1024 * 1024))
+    )
+    STORAGE_UPLOAD_CONCURRENCY = int(os.getenv("STORAGE_UPLOAD_CONCURRENCY", "4"))
+
+    # Local storage backend: I/O thread count and whether writes are fsynced
+    # (file + directory) before the upload is acknowledged
+    STORAGE_LOCAL_IO_THREADS = int(os.getenv("STORAGE_LOCAL_IO_THREADS", "4"))
+    STORAGE_LOCAL_FSYNC = os.getenv("STORAGE_LOCAL_FSYNC", "False").lower() == "true"
+
+    # Local LRU disk cache in front of Azure/S3 reads
+    BLOB_CACHE_ENABLED = os.getenv("BLOB_CACHE_ENABLED", "False").lower() == "true"
+    BLOB_CACHE_DIR = os.getenv("BLOB_CACHE_DIR", "./storage/blob_cache")
+    BLOB_CACHE_MAX_BYTES = int(
+        os.getenv("BLOB_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024))
+    )
+
+    # Pooled HTTP clients for model providers (one per origin, HTTP/2 when
+    # the h2 package is installed); timeouts in seconds
+    HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "True").lower() == "true"
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_POOL_TIMEOUT = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "60"))
+
+    # Upper bound on prior messages loaded for a chat turn (the newest ones
+    # that fit the model's context window are used)
+    CHAT_HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "200"))
+
+    # Screen user chat messages with the moderation endpoint (runs alongside
+    # history loading and KB retrieval, before the model is called)
+    CHAT_MODERATION_ENABLED = (
+        os.getenv("CHAT_MODERATION_ENABLED", "False").lower() == "true"
+    )
+
+    # Bare repository cache for GitHub attachments (updated with git fetch)
+    GITHUB_REPO_CACHE_DIR = os.getenv("GITHUB_REPO_CACHE_DIR", "./storage/git_cache")
+
+    # Staged ingestion pipeline (fetch -> extract -> embed -> write)
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "8"))
+    INGEST_FETCH_CONCURRENCY = int(os.getenv("INGEST_FETCH_CONCURRENCY", "4"))
+    INGEST_EXTRACT_CONCURRENCY = int(os.getenv("INGEST_EXTRACT_CONCURRENCY", "2"))
+    INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "2"))
+    INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "100"))
+    INGEST_WRITE_BATCH_SIZE = int(os.getenv("INGEST_WRITE_BATCH_SIZE", "500"))
+
+    # Durable ingestion job queue (set INGEST_WORKERS=0 to disable workers
+    # in processes that should only serve requests)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+    INGEST_PROJECT_CONCURRENCY = int(os.getenv("INGEST_PROJECT_CONCURRENCY", "1"))
+    INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+    INGEST_RETRY_BASE_SECONDS = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "10"))
+    INGEST_RETRY_MAX_SECONDS = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "900"))
+    INGEST_JOB_LEASE_SECONDS = int(os.getenv("INGEST_JOB_LEASE_SECONDS", "600"))
+    INGEST_POLL_INTERVAL_SECONDS = float(
+        os.getenv("INGEST_POLL_INTERVAL_SECONDS", "5")
+    )
+
     # Migration control (if any)
     ALWAYS_APPLY_MIGRATIONS = (
         os.getenv("ALWAYS_APPLY_MIGRATIONS", "false").lower() == "true"
@@ -86,6 +86,12 @@ init_telemetry(
 from db import init_db, get_async_session_context  # noqa: E402
 from utils.auth_utils import clean_expired_tokens  # noqa: E402
 from utils.db_utils import schedule_token_cleanup  # noqa: E402
+from services.ingestion_queue import (  # noqa: E402
+    start_ingestion_workers,
+    stop_ingestion_workers,
+)
+from services.file_storage import close_storage_clients  # noqa: E402
+from utils.http_clients import close_http_clients, init_http_clients  # noqa: E402
 
 # Import Sentry SDK for exception handlers
 import sentry_sdk  # noqa: E402
@@ -295,6 +301,8 @@ async def on_startup():
         await init_db()
         await create_default_user()  # Insecure default user creation
         await schedule_token_cleanup(interval_minutes=30)
+        start_ingestion_workers()
+        init_http_clients()
         logger.info(
             f"{settings.APP_NAME} v{settings.APP_VERSION} started in debug mode."
         )
@@ -308,6 +316,9 @@ async def on_startup():
 async def on_shutdown():
     """Clean up resources on shutdown."""
     try:
+        await stop_ingestion_workers()
+        await close_storage_clients()
+        await close_http_clients()
         async with get_async_session_context() as session:
             await clean_expired_tokens(session)
         logger.info("Application shutdown complete (debug mode).")
@@ -7,3 +7,5 @@ from .conversation import Conversation
 from .message import Message
 from .project_file import ProjectFile
 from .artifact import Artifact
+from .ingestion_job import IngestionJob
+from .upload_session import UploadSession
@@ -0,0 +1,85 @@
+"""
+ingestion_job.py
+----------------
+Durable queue entries for knowledge-base ingestion work.
+
+Rows are claimed by worker coroutines with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` so several workers (and several app processes) can drain the queue
+without double-processing a job.  Jobs survive restarts and are retried with
+exponential backoff until ``max_attempts`` is reached.
+"""
+
+from sqlalchemy import String, Text, TIMESTAMP, text, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from db import Base
+from typing import Optional
+from datetime import datetime
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_jobs"
+    __table_args__ = (
+        Index("ix_ingestion_jobs_status_run_after", "status", "run_after"),
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    job_type: Mapped[str] = mapped_column(
+        String(20), nullable=False
+    )  # "file" (single file), "files" (payload["file_ids"]) or "project"
+    project_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    file_id: Mapped[Optional[UUID]] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("project_files.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+    knowledge_base_id: Mapped[Optional[UUID]] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )
+    status: Mapped[str] = mapped_column(
+        String(20), server_default=text("'pending'"), nullable=False
+    )  # pending, running, succeeded, failed
+    attempts: Mapped[int] = mapped_column(
+        Integer, server_default=text("0"), nullable=False
+    )
+    max_attempts: Mapped[int] = mapped_column(
+        Integer, server_default=text("5"), nullable=False
+    )
+    run_after: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+    locked_at: Mapped[Optional[datetime]] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=True
+    )
+    worker_id: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    payload: Mapped[Optional[dict]] = mapped_column(
+        JSONB(none_as_null=True), nullable=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return (
+            f"<IngestionJob {self.job_type} (#{self.id}) project_id={self.project_id} "
+            f"status={self.status} attempts={self.attempts}>"
+        )
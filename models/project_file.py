@@ -5,7 +5,7 @@ Stores files attached to a Project.
 Each record can hold the filename, path, inline content, etc.
 """
 
-from sqlalchemy import String, Text, TIMESTAMP, text, ForeignKey, Integer
+from sqlalchemy import String, Text, TIMESTAMP, text, ForeignKey, Integer, Index
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from db import Base
@@ -15,6 +15,11 @@ from datetime import datetime
 
 class ProjectFile(Base):
     __tablename__ = "project_files"
+    __table_args__ = (
+        # Upload-time deduplication lookups by content hash
+        Index("ix_project_files_project_id_file_hash", "project_id", "file_hash"),
+        Index("ix_project_files_file_hash", "file_hash"),
+    )
 
     id: Mapped[UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
@@ -0,0 +1,75 @@
+"""
+upload_session.py
+-----------------
+State of resumable (chunked) project file uploads.
+
+A session is opened with the final file name and size, receives chunks in
+order at ``received_bytes``, and is finalized into a regular ``ProjectFile``.
+Chunk data lives in a staging file on local disk (``staging_path``) until
+finalization, so an interrupted client resumes from the last acknowledged
+offset instead of restarting the transfer.  The staging directory must be
+visible to every app instance that can receive requests for the upload.
+
+``finalizing`` is held only while a finalize request runs; a session left in
+that state (process died mid-finalize) is taken over by a later finalize or
+abort once ``updated_at`` is older than ``UPLOAD_FINALIZE_LEASE_SECONDS``.
+"""
+
+from sqlalchemy import String, TIMESTAMP, text, ForeignKey, Integer, BigInteger, Boolean
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from db import Base
+from typing import Optional
+from datetime import datetime
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, server_default=text("gen_random_uuid()")
+    )
+    project_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("projects.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    user_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+    )
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    total_size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    received_bytes: Mapped[int] = mapped_column(
+        BigInteger, server_default=text("0"), nullable=False
+    )
+    staging_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    index_kb: Mapped[bool] = mapped_column(
+        Boolean, server_default=text("false"), nullable=False
+    )
+    status: Mapped[str] = mapped_column(
+        String(20), server_default=text("'open'"), nullable=False
+    )  # open, finalizing, completed, aborted
+    file_id: Mapped[Optional[UUID]] = mapped_column(
+        UUID(as_uuid=True), nullable=True
+    )  # ProjectFile created on finalize
+    expires_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), nullable=False
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        onupdate=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+
+    def __repr__(self):
+        return (
+            f"<UploadSession {self.filename} (#{self.id}) project_id={self.project_id} "
+            f"status={self.status} received={self.received_bytes}/{self.total_size}>"
+        )
@@ -31,10 +31,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db import get_async_session
 
 # Services
-from services.vector_db import (
-    process_files_for_project,
-    initialize_project_vector_db,
-)
+from services.vector_db import initialize_project_vector_db
+from services.ingestion_queue import enqueue_project_ingestion
 from services.knowledgebase_service import (
     search_project_context,  # ← NEW: canonical location
     get_kb_status,
@@ -47,6 +45,7 @@ from services.knowledgebase_service import (
     toggle_project_kb,
     attach_github_repository as kb_attach_repository,
     detach_github_repository as kb_detach_repository,
+    sync_github_repository as kb_sync_repository,
 )
 
 # Models and Utils
@@ -158,7 +157,6 @@ class GitHubRepoDetach(BaseModel):
 async def create_project_knowledge_base(
     project_id: UUID,
     kb_data: KnowledgeBaseCreate,
-    background_tasks: BackgroundTasks,
     current_user_and_token: tuple = Depends(get_current_user_and_token),
     db: AsyncSession = Depends(get_async_session),
 ):
@@ -202,13 +200,12 @@ async def create_project_knowledge_base(
             "files_processed": kb_data.process_existing_files,
         }
 
-        # If requested, process existing files in a background task
+        # If requested, queue indexing of existing files
         if kb_data.process_existing_files:
             file_stats = await get_project_files_stats(project_id, db)
             result["file_stats"] = file_stats
-            # process_files_for_project opens its own DB session when no
-            # session is supplied – safe for background tasks.
-            background_tasks.add_task(process_files_for_project, project_id=project_id)
+            job = await enqueue_project_ingestion(db, project_id=project_id)
+            result["ingestion_job_id"] = str(job.id)
 
         return await create_standard_response(
             result, "Knowledge base created successfully"
@@ -441,7 +438,7 @@ async def reindex_knowledge_base(
             project_id=project_id, force=force, db=db
         )
 
-        return await create_standard_response(result, "Reindexing complete")
+        return await create_standard_response(result, "Reindexing queued")
 
     except HTTPException:
         raise
@@ -562,6 +559,40 @@ async def attach_github_repository(
         ) from e
 
 
+@router.post("/{project_id}/knowledge-bases/github/sync", response_model=dict)
+async def sync_github_repository(
+    project_id: UUID,
+    current_user_tuple: tuple = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Syncs the attached GitHub repository, processing only files changed
+    since the last synced commit.
+    """
+    try:
+        current_user = current_user_tuple[0]
+        # Validate project access
+        await validate_project_access(project_id, current_user, db)
+
+        result = await kb_sync_repository(
+            project_id=project_id,
+            db=db,
+            user_id=current_user.id,
+        )
+
+        return await create_standard_response(
+            result, "GitHub repository synced successfully"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to sync GitHub repository: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=500, detail="Failed to sync GitHub repository"
+        ) from e
+
+
 @router.post("/{project_id}/knowledge-bases/github/detach", response_model=dict)
 async def detach_github_repository(
     project_id: UUID,
@@ -6,25 +6,27 @@ Serves as the single source of truth for all file operations.
 """
 
 import logging
-import os
 import mimetypes
+from datetime import datetime, timezone
+from email.utils import format_datetime
 from uuid import UUID
-from typing import Optional, Tuple
+from typing import AsyncGenerator, AsyncIterator, List, Optional, Tuple
 
 from fastapi import (
     APIRouter,
+    Body,
+    Request,
     Depends,
     HTTPException,
     Query,
     UploadFile,
     File,
-    BackgroundTasks,
     Response,
 )
-from fastapi.responses import FileResponse
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import settings
 from db import get_async_session
 from models.user import User
 from services.file_service import FileService
@@ -37,6 +39,61 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _parse_range_header(range_header: str, file_size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a ``Range: bytes=...`` header into an inclusive ``(start, end)``.
+
+    Returns None for headers we do not serve partially (other units or
+    multiple ranges – the full body is sent instead) and raises ValueError
+    for unsatisfiable ranges.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first == "":
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError("empty suffix range")
+            start, end = max(0, file_size - suffix), file_size - 1
+        else:
+            start = int(first)
+            end = int(last) if last else file_size - 1
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid range: {range_header}") from e
+    end = min(end, file_size - 1)
+    if start < 0 or start > end:
+        raise ValueError(f"Unsatisfiable range: {range_header}")
+    return start, end
+
+
+async def _chain_stream(
+    first_chunk: bytes, rest: AsyncGenerator[bytes, None]
+) -> AsyncIterator[bytes]:
+    """Yield an already-read first chunk, then the rest of the stream."""
+    try:
+        if first_chunk:
+            yield first_chunk
+        async for chunk in rest:
+            yield chunk
+    finally:
+        await rest.aclose()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against *etag*."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    normalized = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == normalized for tag in if_none_match.split(",")
+    )
+
+
 # =======================================================
 #  Consolidated File Operations with Tracing
 # =======================================================
@@ -45,7 +102,6 @@ router = APIRouter()
 @router.post("", response_class=JSONResponse)
 async def handle_upload_project_file(
     project_id: UUID,
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     index_kb: bool = Query(
         False, description="Whether to index file in knowledge base"
@@ -78,7 +134,6 @@ async def handle_upload_project_file(
                 file=file,
                 user_id=user.id,
                 index_kb=index_kb,
-                background_tasks=background_tasks,
             )
 
             span.set_tag("file.id", file_metadata["id"])
@@ -116,6 +171,241 @@ async def handle_upload_project_file(
             )
 
 
+@router.post("/batch", response_class=JSONResponse)
+async def handle_batch_upload_project_files(
+    project_id: UUID,
+    files: List[UploadFile] = File(...),
+    index_kb: bool = Query(
+        False, description="Whether to index the files in knowledge base"
+    ),
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Upload several files to a project in one request.
+
+    Files are stored concurrently and recorded in a single transaction;
+    per-file validation failures are returned in ``errors``.
+    """
+    user, _token = current_user_and_token
+
+    with traced(op="file", description="Batch Upload Project Files") as span:
+        try:
+            span.set_tag("project.id", str(project_id))
+            span.set_tag("user.id", str(user.id))
+            span.set_tag("index_kb", index_kb)
+            span.set_tag("files_count", len(files))
+
+            max_files = getattr(settings, "UPLOAD_BATCH_MAX_FILES", 20)
+            if len(files) > max_files:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"At most {max_files} files can be uploaded per batch",
+                )
+
+            # Validate project access once for the whole batch
+            await validate_project_access(project_id, user, db)
+
+            result = await FileService(db).upload_batch(
+                project_id=project_id,
+                files=files,
+                user_id=user.id,
+                index_kb=index_kb,
+            )
+
+            span.set_tag("files_uploaded", len(result["files"]))
+            span.set_tag("files_failed", len(result["errors"]))
+
+            return await create_standard_response(
+                result,
+                f"Uploaded {len(result['files'])} of {len(files)} files"
+                f"{' and queued for KB indexing' if result['ingestion_job_id'] else ''}",
+            )
+
+        except HTTPException:
+            span.set_tag("error", True)
+            raise
+        except ValueError as ve:
+            span.set_tag("error", True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            span.set_tag("error", True)
+            span.set_tag("error_type", type(e).__name__)
+            logger.error(
+                f"Unhandled error in batch upload for project {project_id} by user {user.id}: {str(e)}",
+                exc_info=True,
+            )
+            raise HTTPException(
+                status_code=500,
+                detail="Failed to upload files due to an unexpected server error.",
+            ) from e
+
+
+# =======================================================
+#  Resumable (chunked) uploads
+# =======================================================
+
+
+@router.post("/uploads", response_class=JSONResponse)
+async def init_chunked_upload(
+    project_id: UUID,
+    filename: str = Body(..., embed=True, min_length=1, max_length=255),
+    total_size: int = Body(..., embed=True, gt=0),
+    index_kb: bool = Body(False, embed=True),
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """
+    Open a resumable upload session.
+
+    Send the file with ``PUT /uploads/{upload_id}?offset=N`` (raw body, one
+    chunk of at most ``chunk_size`` bytes per request) and finish with
+    ``POST /uploads/{upload_id}/complete``.
+    """
+    user, _token = current_user_and_token
+
+    with traced(op="file", description="Init Chunked Upload") as span:
+        try:
+            span.set_tag("project.id", str(project_id))
+            span.set_tag("user.id", str(user.id))
+            span.set_tag("filename", filename)
+            span.set_tag("file.size", total_size)
+
+            await validate_project_access(project_id, user, db)
+
+            result = await FileService(db).init_chunked_upload(
+                project_id, filename, total_size, user.id, index_kb=index_kb
+            )
+            span.set_tag("upload.id", result["upload_id"])
+            return await create_standard_response(result, "Upload session created")
+
+        except HTTPException:
+            span.set_tag("error", True)
+            raise
+        except ValueError as ve:
+            span.set_tag("error", True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            span.set_tag("error", True)
+            span.set_tag("error_type", type(e).__name__)
+            logger.error(f"Error creating upload session: {str(e)}", exc_info=True)
+            raise HTTPException(
+                status_code=500, detail="Failed to create upload session"
+            ) from e
+
+
+@router.get("/uploads/{upload_id}", response_class=JSONResponse)
+async def get_chunked_upload(
+    project_id: UUID,
+    upload_id: UUID,
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Return upload progress; clients resume from ``received_bytes``."""
+    user, _token = current_user_and_token
+    await validate_project_access(project_id, user, db)
+    result = await FileService(db).get_chunked_upload(project_id, upload_id)
+    return await create_standard_response(result, "Upload session retrieved")
+
+
+@router.put("/uploads/{upload_id}", response_class=JSONResponse)
+async def upload_chunk(
+    project_id: UUID,
+    upload_id: UUID,
+    request: Request,
+    offset: int = Query(..., ge=0, description="Byte offset of this chunk"),
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Append one chunk (raw request body) at ``offset``."""
+    user, _token = current_user_and_token
+
+    with traced(op="file", description="Upload Chunk") as span:
+        try:
+            span.set_tag("project.id", str(project_id))
+            span.set_tag("upload.id", str(upload_id))
+            span.set_tag("offset", offset)
+
+            await validate_project_access(project_id, user, db)
+
+            result = await FileService(db).upload_chunk(
+                project_id, upload_id, offset, request.stream()
+            )
+            span.set_tag("received_bytes", result["received_bytes"])
+            return await create_standard_response(result, "Chunk received")
+
+        except HTTPException:
+            span.set_tag("error", True)
+            raise
+        except Exception as e:
+            span.set_tag("error", True)
+            span.set_tag("error_type", type(e).__name__)
+            logger.error(
+                f"Error receiving chunk for upload {upload_id}: {str(e)}", exc_info=True
+            )
+            raise HTTPException(
+                status_code=500, detail="Failed to store upload chunk"
+            ) from e
+
+
+@router.post("/uploads/{upload_id}/complete", response_class=JSONResponse)
+async def complete_chunked_upload(
+    project_id: UUID,
+    upload_id: UUID,
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Validate and store the assembled file, queueing KB indexing if requested."""
+    user, _token = current_user_and_token
+
+    with traced(op="file", description="Complete Chunked Upload") as span:
+        try:
+            span.set_tag("project.id", str(project_id))
+            span.set_tag("upload.id", str(upload_id))
+
+            await validate_project_access(project_id, user, db)
+
+            file_metadata = await FileService(db).finalize_chunked_upload(
+                project_id, upload_id
+            )
+            span.set_tag("file.id", file_metadata["id"])
+            span.set_tag("file.size", file_metadata["file_size"])
+            return await create_standard_response(
+                file_metadata,
+                f"File uploaded successfully{' and queued for KB indexing' if file_metadata['indexed_kb'] else ''}",
+            )
+
+        except HTTPException:
+            span.set_tag("error", True)
+            raise
+        except ValueError as ve:
+            span.set_tag("error", True)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            span.set_tag("error", True)
+            span.set_tag("error_type", type(e).__name__)
+            logger.error(
+                f"Error finalizing upload {upload_id}: {str(e)}", exc_info=True
+            )
+            raise HTTPException(
+                status_code=500, detail="Failed to finalize upload"
+            ) from e
+
+
+@router.delete("/uploads/{upload_id}", response_class=JSONResponse)
+async def abort_chunked_upload(
+    project_id: UUID,
+    upload_id: UUID,
+    current_user_and_token: Tuple[User, str] = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Cancel an upload session and discard staged chunks."""
+    user, _token = current_user_and_token
+    await validate_project_access(project_id, user, db)
+    result = await FileService(db).abort_chunked_upload(project_id, upload_id)
+    return await create_standard_response(result, "Upload session aborted")
+
+
 @router.get("", response_class=JSONResponse)
 async def list_project_files(
     project_id: UUID,
@@ -264,6 +554,7 @@ async def delete_project_file(
 
 @router.get("/{file_id}/download", include_in_schema=False)
 async def download_project_file(
+    request: Request,
     project_id: UUID,
     file_id: UUID,
     current_user_and_token: tuple = Depends(get_current_user_and_token),
@@ -273,7 +564,9 @@ async def download_project_file(
     Download a stored project file.
 
     Streams the file from the underlying storage backend (local, Azure, S3)
-    with correct headers. Provides proper error responses (404, 403).
+    with correct headers. Supports single-range ``Range`` requests (206) for
+    resumable downloads and conditional ``If-None-Match`` (304) against the
+    content-hash ETag. Provides proper error responses (404, 403, 416).
     """
     user, _token = current_user_and_token
 
@@ -296,26 +589,90 @@ async def download_project_file(
             mime_type = mime_type or "application/octet-stream"
 
             storage = file_service.storage
-
-            # ---------- Local filesystem path ----------
-            if storage.storage_type == "local" and os.path.isfile(file_path):
-                return FileResponse(
-                    path=file_path,
-                    media_type=mime_type,
-                    filename=filename,
-                    headers={
-                        "Content-Disposition": f'attachment; filename="{filename}"'
-                    },
-                )
-
-            # ---------- Cloud backends ----------
-            # Read into memory; for very large files consider chunked StreamingResponse
-            content = await storage.get_file(file_path)
+            file_size = meta["file_size"]
+
+            # Stored objects are immutable, so the content hash is a strong
+            # validator; fall back to a weak tag for legacy records.
+            etag = (
+                f'"{meta["file_hash"]}"'
+                if meta.get("file_hash")
+                else f'W/"{file_id}-{file_size}"'
+            )
             headers = {
                 "Content-Disposition": f'attachment; filename="{filename}"',
-                "Content-Length": str(len(content)),
+                "Accept-Ranges": "bytes",
+                "ETag": etag,
+                "Cache-Control": "private, max-age=0, must-revalidate",
             }
-            return Response(content, media_type=mime_type, headers=headers)
+            if meta.get("created_at"):
+                headers["Last-Modified"] = format_datetime(
+                    datetime.fromisoformat(meta["created_at"]).astimezone(
+                        timezone.utc
+                    ),
+                    usegmt=True,
+                )
+
+            if _etag_matches(request.headers.get("if-none-match"), etag):
+                span.set_tag("http.status", 304)
+                return Response(status_code=304, headers=headers)
+
+            byte_range = None
+            range_header = request.headers.get("range")
+            if_range = request.headers.get("if-range")
+            # If-Range: only honour Range when the client's copy is current
+            if range_header and (if_range is None or if_range.strip() == etag):
+                try:
+                    byte_range = _parse_range_header(range_header, file_size)
+                except ValueError:
+                    return Response(
+                        status_code=416,
+                        headers={**headers, "Content-Range": f"bytes */{file_size}"},
+                    )
+
+            if byte_range is None:
+                start, length, status_code = 0, file_size, 200
+            else:
+                start, end = byte_range
+                length = end - start + 1
+                status_code = 206
+                headers["Content-Range"] = f"bytes {start}-{end}/{file_size}"
+            headers["Content-Length"] = str(length)
+            span.set_tag("http.status", status_code)
+
+            # Constant-memory proxy of the backend byte stream (all backends)
+            body = storage.stream_file(
+                file_path,
+                start=start,
+                # Full reads are unbounded so they can populate the blob cache
+                length=None if byte_range is None else length,
+                file_hash=meta.get("file_hash"),
+            )
+            # Open the backend stream before committing to 200/206 headers,
+            # so a missing object is still reported as a 404.
+            try:
+                first_chunk = await body.__anext__()
+            except StopAsyncIteration:
+                first_chunk = b""
+            except FileNotFoundError as e:
+                await body.aclose()
+                span.set_tag("http.status", 404)
+                logger.warning(
+                    f"Stored content missing for file {file_id} in project "
+                    f"{project_id}: {e}"
+                )
+                raise HTTPException(
+                    status_code=404, detail="File content not found"
+                ) from e
+            except BaseException:
+                await body.aclose()
+                raise
+
+            return StreamingResponse(
+                _chain_stream(first_chunk, body),
+                status_code=status_code,
+                media_type=mime_type,
+                headers=headers,
+            )
 
         except HTTPException:
             span.set_tag("error", True)
@@ -8,13 +8,17 @@ Conversation management routes featuring:
 - Distributed tracing support
 """
 
+import asyncio
+import json
 import logging
 import random
 import time
 from uuid import UUID
 from typing import List, Optional
 
+import anyio
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -29,8 +33,12 @@ from sentry_sdk import (
     capture_message,
 )
 
-from db import get_async_session
-from services.conversation_service import ConversationService, get_conversation_service
+from db import get_async_session, AsyncSessionLocal
+from services.conversation_service import (
+    ConversationError,
+    ConversationService,
+    get_conversation_service,
+)
 from utils.auth_utils import get_current_user_and_token
 from utils.sentry_utils import make_sentry_trace_response
 from services.project_service import validate_project_access
@@ -637,6 +645,97 @@ async def create_project_conversation_message(
         raise HTTPException(status_code=500, detail="Message processing failed") from e
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Events frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@router.post("/{project_id}/conversations/{conversation_id}/messages/stream")
+async def stream_project_conversation_message(
+    project_id: UUID,
+    conversation_id: UUID,
+    new_msg: MessageCreate,
+    current_user_tuple: tuple = Depends(get_current_user_and_token),
+    db: AsyncSession = Depends(get_async_session),
+    _valid: None = Depends(validate_model_and_params),
+):
+    """
+    Send a user message and stream the AI reply as Server-Sent Events.
+
+    Emits ``user_message``, then ``delta`` events (``{"content": ...}``) as
+    the provider produces text, and finally ``assistant_message`` (or
+    ``error``).  Closing the connection cancels the upstream model request;
+    text received up to that point is saved.
+    """
+    current_user = current_user_tuple[0]
+    if new_msg.role.lower().strip() != "user":
+        raise HTTPException(
+            status_code=400, detail="Only user messages can be streamed"
+        )
+
+    # Validate access
+    await validate_project_access(project_id, current_user, db)
+
+    # The stream outlives this handler, so it gets its own session
+    stream_db = AsyncSessionLocal()
+    events = ConversationService(stream_db).stream_message(
+        conversation_id=conversation_id,
+        user_id=current_user.id,
+        content=new_msg.raw_text.strip(),
+        project_id=project_id,
+        image_data=new_msg.image_data,
+        vision_detail=new_msg.vision_detail,
+        enable_thinking=new_msg.enable_thinking,
+        thinking_budget=new_msg.thinking_budget,
+        reasoning_effort=new_msg.reasoning_effort,
+        temperature=new_msg.temperature,
+        max_tokens=new_msg.max_tokens,
+        enable_web_search=new_msg.enable_web_search,
+    )
+
+    # Run validation and save the user message before committing to a
+    # 200 response, so those failures still return a normal HTTP error.
+    try:
+        first_event = await events.__anext__()
+    except BaseException as e:
+        await events.aclose()
+        await stream_db.close()
+        if isinstance(e, ConversationError):
+            raise HTTPException(status_code=e.status_code, detail=e.message) from e
+        if isinstance(e, (HTTPException, asyncio.CancelledError)):
+            raise
+        capture_exception(e)
+        logger.error(f"Message streaming failed: {str(e)}")
+        raise HTTPException(status_code=500, detail="Message processing failed") from e
+
+    async def event_stream():
+        started = time.time()
+        outcome = "cancelled"
+        try:
+            yield _sse_event(*first_event)
+            async for event, data in events:
+                if event in ("assistant_message", "error"):
+                    outcome = event
+                yield _sse_event(event, data)
+        finally:
+            # Closing the service generator closes the provider stream
+            with anyio.CancelScope(shield=True):
+                await events.aclose()
+                await stream_db.close()
+            metrics.distribution(
+                "conversation.message.stream_duration",
+                (time.time() - started) * 1000,
+                unit="millisecond",
+                tags={"project_id": str(project_id), "outcome": outcome},
+            )
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # =============================================================================
 # AI-Powered Features with Monitoring
 # =============================================================================
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for utils.sse.SSEDecoder on long synthetic model streams.
+
+Usage:
+    python scripts/bench_sse_decoder.py [--tokens 100000] [--chunk-size 512]
+
+Builds a Chat Completions-style SSE stream with one ``data:`` event per
+token, slices it into fixed-size network chunks (so events and multi-byte
+characters straddle chunk boundaries), then decodes it the way
+utils.ai_response does: SSEDecoder events -> JSON -> list of deltas joined
+once.  Runs at 1/4, 1/2 and the full token count; time per token should stay
+roughly flat if decoding is linear.  The reassembled text is checked against
+the source on every run.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.sse import SSEDecoder  # noqa: E402
+
+WORDS = ["stream", " token", " naïve", " 数据", " emoji🙂", " end.\n", " ok"]
+
+
+def build_stream(tokens: int) -> tuple[bytes, str]:
+    parts = []
+    pieces = []
+    for i in range(tokens):
+        piece = WORDS[i % len(WORDS)]
+        pieces.append(piece)
+        chunk = {"choices": [{"index": 0, "delta": {"content": piece}}]}
+        parts.append(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+    parts.append("data: [DONE]\n\n")
+    return "".join(parts).encode("utf-8"), "".join(pieces)
+
+
+def decode(stream: bytes, chunk_size: int) -> str:
+    decoder = SSEDecoder()
+    deltas: list[str] = []
+    for start in range(0, len(stream), chunk_size):
+        for event in decoder.feed(stream[start:start + chunk_size]):
+            if event.data == "[DONE]":
+                break
+            delta = json.loads(event.data)["choices"][0]["delta"]
+            if delta.get("content"):
+                deltas.append(delta["content"])
+    return "".join(deltas)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=100_000)
+    parser.add_argument("--chunk-size", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tokens':>8} {'bytes':>11} {'best ms':>9} {'us/token':>9}")
+    for tokens in (args.tokens // 4, args.tokens // 2, args.tokens):
+        stream, expected = build_stream(tokens)
+        best = float("inf")
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            text = decode(stream, args.chunk_size)
+            best = min(best, time.perf_counter() - started)
+            if text != expected:
+                print(f"Mismatch decoding {tokens} tokens")
+                return 1
+        print(
+            f"{tokens:>8} {len(stream):>11} {best * 1000:>9.1f} "
+            f"{best * 1e6 / tokens:>9.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""Benchmark token counting in utils.tokens.
+
+Usage:
+    python scripts/bench_token_counting.py [--messages 2000] [--passes 4]
+                                           [--byte-encoding]
+
+Simulates one chat turn's worth of repeated counting: the same message
+texts are counted --passes times (chunking, context trimming, usage
+estimates, saving).  It compares:
+
+  legacy   per-call encode + per-call debug log (the previous behaviour)
+  cached   count_tokens_text with the LRU cache
+  batch    count_tokens_batch, cold cache and then warm
+
+Requires the cl100k_base encoding to be loadable by tiktoken.  Offline,
+--byte-encoding installs a byte-level BPE encoding instead; absolute numbers
+differ but the relative cost of repeated encoding is comparable.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from the app
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import tokens  # noqa: E402
+
+WORDS = (
+    "the model returns a streamed response with tokens context window "
+    "knowledge base retrieval project file conversation message summary"
+).split()
+
+
+def build_corpus(count: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 400)))
+        for _ in range(count)
+    ]
+
+
+def legacy_count(text: str) -> int:
+    """The pre-cache implementation: encode every call and log with extra."""
+    count = tokens._encode_uncached([text])[0]
+    tokens.logger.debug(
+        "Token count calculated using tiktoken",
+        extra={
+            "event_type": "token_count_tiktoken",
+            "text_length": len(text),
+            "token_count": count,
+            "model_id": None,
+        },
+    )
+    return count
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--passes", type=int, default=4)
+    parser.add_argument("--byte-encoding", action="store_true")
+    args = parser.parse_args()
+
+    # Debug logging enabled so the legacy per-call log cost is real
+    logging.basicConfig(level=logging.DEBUG, handlers=[logging.NullHandler()])
+    tokens.logger.setLevel(logging.DEBUG)
+
+    if tokens._ENCODER is None and args.byte_encoding:
+        import tiktoken
+
+        tokens._ENCODER = tiktoken.Encoding(
+            name="bench_bytes",
+            pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\w+| ?\d+| ?[^\s\w]+|\s+""",
+            mergeable_ranks={bytes([i]): i for i in range(256)},
+            special_tokens={},
+        )
+    backend = tokens._encoding_name()
+    if backend == "heuristic":
+        print("tiktoken encoding unavailable; timing the 4 chars/token fallback")
+
+    corpus = build_corpus(args.messages)
+    print(f"backend={backend} messages={len(corpus)} passes={args.passes}")
+
+    def run_legacy():
+        for _ in range(args.passes):
+            for text in corpus:
+                legacy_count(text)
+
+    def run_cached():
+        for _ in range(args.passes):
+            for text in corpus:
+                tokens.count_tokens_text(text)
+
+    def run_batch():
+        for _ in range(args.passes):
+            tokens.count_tokens_batch(corpus)
+
+    expected = [tokens._encode_uncached([t])[0] for t in corpus]
+    results = {"legacy": timed(run_legacy)}
+    tokens.clear_token_cache()
+    results["cached"] = timed(run_cached)
+    tokens.clear_token_cache()
+    results["batch (cold)"] = timed(lambda: tokens.count_tokens_batch(corpus))
+    results["batch (warm)"] = timed(run_batch) / args.passes
+
+    if tokens.count_tokens_batch(corpus) != expected:
+        print("Mismatch between batch and per-text counts")
+        return 1
+
+    baseline = results["legacy"]
+    for name, ms in results.items():
+        print(f"{name:>13}: {ms:9.1f} ms  ({baseline / ms:5.1f}x vs legacy)")
+    print("batch (warm) is per pass; the others cover all passes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
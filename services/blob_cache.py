@@ -0,0 +1,163 @@
+"""
+blob_cache.py
+-------------
+Local read-through disk cache for cloud-stored project files.
+
+Stored project files are immutable, so a blob fetched from Azure or S3 can
+be kept on local disk and served from there on later reads (re-indexing,
+re-extraction, repeated downloads) without any coherence protocol.  Entries
+are keyed by ``(stored path, sha256)`` and evicted least-recently-used once
+the cache exceeds its size cap; the modification time of an entry doubles
+as its last-access time.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class BlobCacheWriter:
+    """Accumulates a blob into a temp file and publishes it on commit."""
+
+    def __init__(self, cache: "BlobCache", entry_path: Path):
+        self.cache = cache
+        self.entry_path = entry_path
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=entry_path.parent, suffix=".tmp")
+        self._file = os.fdopen(fd, "wb")
+        self._tmp_path = tmp_path
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> None:
+        self._file.close()
+        os.replace(self._tmp_path, self.entry_path)
+        self.cache._account(self.size)
+
+    def abort(self) -> None:
+        self._file.close()
+        Path(self._tmp_path).unlink(missing_ok=True)
+
+
+class BlobCache:
+    """Size-capped LRU cache of immutable blobs on local disk."""
+
+    def __init__(self, cache_dir: str, max_bytes: int, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    def entry_path(self, file_path: str, file_hash: Optional[str] = None) -> Path:
+        raw_key = f"{file_path}:{file_hash or ''}"
+        digest = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / digest
+
+    def lookup(self, file_path: str, file_hash: Optional[str] = None) -> Optional[Path]:
+        """Return the cached entry for *file_path* (marking it used) or None."""
+        if not self.enabled:
+            return None
+        path = self.entry_path(file_path, file_hash)
+        try:
+            os.utime(path)  # LRU bookkeeping
+        except FileNotFoundError:
+            return None
+        return path
+
+    def writer(self, file_path: str, file_hash: Optional[str] = None) -> BlobCacheWriter:
+        return BlobCacheWriter(self, self.entry_path(file_path, file_hash))
+
+    def store(self, file_path: str, data: bytes, file_hash: Optional[str] = None) -> None:
+        writer = self.writer(file_path, file_hash)
+        try:
+            writer.write(data)
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    async def aget(self, file_path: str, file_hash: Optional[str] = None) -> Optional[bytes]:
+        """Read a cached blob fully, or None on a miss."""
+        path = await asyncio.to_thread(self.lookup, file_path, file_hash)
+        if path is None:
+            return None
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            # Evicted between lookup and read
+            return None
+
+    async def aput(self, file_path: str, data: bytes, file_hash: Optional[str] = None) -> None:
+        """Store a blob; failures are logged and ignored."""
+        if not self.enabled:
+            return
+        try:
+            await asyncio.to_thread(self.store, file_path, data, file_hash)
+        except Exception as e:
+            logger.warning(f"Failed to cache blob {file_path}: {e}")
+
+    # -----------------------------------------------------------------
+    # Eviction
+    # -----------------------------------------------------------------
+    def _entries(self) -> list[Path]:
+        return [p for p in self.cache_dir.glob("*/*") if not p.name.endswith(".tmp")]
+
+    def _account(self, added: int) -> None:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(
+                    p.stat().st_size for p in self._entries() if p.exists()
+                )
+            else:
+                self._total_bytes += added
+            if self._total_bytes > self.max_bytes:
+                self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        """Delete least-recently-used entries until 90% of the cap is free."""
+        target = int(self.max_bytes * 0.9)
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+        self._total_bytes = total
+        logger.debug(f"Blob cache evicted down to {total} bytes")
+
+
+_blob_cache: Optional[BlobCache] = None
+
+
+def get_blob_cache() -> BlobCache:
+    """Return the process-wide BlobCache configured from settings."""
+    global _blob_cache
+    if _blob_cache is None:
+        _blob_cache = BlobCache(
+            cache_dir=getattr(settings, "BLOB_CACHE_DIR", "./storage/blob_cache"),
+            max_bytes=getattr(settings, "BLOB_CACHE_MAX_BYTES", 5 * 1024**3),
+            enabled=getattr(settings, "BLOB_CACHE_ENABLED", False),
+        )
+    return _blob_cache
@@ -1,49 +1,75 @@
 import logging
-from utils.tokens import count_tokens_messages
-from utils.ai_helper import augment_with_knowledge
+from bisect import bisect_left
+from itertools import accumulate
+
+from utils.tokens import count_tokens_per_message
+from utils.ai_helper import augment_with_knowledge, KnowledgeRetrieval
 from utils.model_registry import get_model_config
 
 logger = logging.getLogger(__name__)
 
 
+def get_context_window(model_id: str) -> int:
+    """Maximum prompt size in tokens for *model_id* (from the model registry)."""
+    model_cfg = get_model_config(model_id) or {}
+    return (
+        model_cfg.get("max_context_tokens")  # ← canonical key
+        or model_cfg.get("max_ctx")  # ← legacy fallback
+        or 8192  # ← hard-stop default
+    )
+
+
+def _is_pinned(msg: dict) -> bool:
+    metadata = msg.get("metadata")
+    return bool(
+        msg.get("pinned") or (isinstance(metadata, dict) and metadata.get("pinned"))
+    )
+
+
 async def trim_context_to_window(
     msgs: list[dict],
     model_id: str,
     max_ctx: int,
+    token_counts: list[int] | None = None,
 ) -> tuple[list[dict], int]:
     """
     Trims a list of message dicts so the total token count (by model) does not exceed max_ctx.
     Returns (trimmed_msgs, removed_tokens): dropped oldest messages as needed.
 
-    Optimized to avoid O(n²) performance by tracking token counts incrementally.
+    System messages (which carry knowledge-base context), pinned messages
+    (``pinned`` flag on the message or its metadata) and the final message
+    (the incoming turn) are always kept; the oldest of the others are
+    dropped.  Each message is counted once (or *token_counts* is used as
+    given), and the cut point is found by binary search over prefix sums of
+    the droppable messages' counts, so trimming is linear in the message
+    count with no re-tokenisation.
     """
-    total_tokens = count_tokens_messages(msgs, model_id)
+    if token_counts is None:
+        token_counts = count_tokens_per_message(msgs, model_id)
+    total_tokens = sum(token_counts)
     if total_tokens <= max_ctx:
         return msgs, 0
 
-    trimmed = list(msgs)  # shallow copy to preserve caller's list
-    removed_tokens = 0
-    current_tokens = total_tokens
-
-    # Preferential trimming strategy:
-    #   1. Drop *non-system* messages (oldest first) to preserve knowledge-base
-    #      context that is usually encoded as `role == "system"`.
-    #   2. If only system messages remain and we still exceed the window, fall
-    #      back to FIFO trimming.
-    while trimmed and current_tokens > max_ctx:
-        # Locate first candidate that is *not* a system-level message.
-        idx_to_remove = next(
-            (i for i, m in enumerate(trimmed) if m.get("role") != "system"),
-            0,  # Fallback to oldest message (idx 0) if all are system
-        )
+    droppable = [
+        i
+        for i, m in enumerate(msgs[:-1])
+        if m.get("role") != "system"
+        and not (m.get("pinned") or ("metadata" in m and _is_pinned(m)))
+    ]
+    if not droppable:
+        return msgs, 0
 
-        msg = trimmed.pop(idx_to_remove)
-        # Calculate tokens for removed message once and subtract from running total
-        msg_tokens = count_tokens_messages([msg], model_id)
-        removed_tokens += msg_tokens
-        current_tokens -= msg_tokens
+    # prefix[j] = tokens freed by dropping the j+1 oldest droppable messages
+    prefix = list(accumulate([token_counts[i] for i in droppable]))
+    drop_count = min(bisect_left(prefix, total_tokens - max_ctx) + 1, len(droppable))
 
-    return trimmed, removed_tokens
+    # Everything before the last dropped message is either dropped or kept
+    # (system/pinned); everything after it is kept unchanged.
+    cut = droppable[drop_count - 1]
+    dropped = set(droppable[:drop_count])
+    trimmed = [m for i, m in enumerate(msgs[:cut]) if i not in dropped]
+    trimmed.extend(msgs[cut + 1:])
+    return trimmed, prefix[drop_count - 1]
 
 
 class ContextManager:
@@ -53,7 +79,12 @@ class ContextManager:
         self.enable_web_search = enable_web_search
 
     async def build(
-        self, conv, incoming_user_text: str, base_history: list[dict]
+        self,
+        conv,
+        incoming_user_text: str,
+        base_history: list[dict],
+        retrieval: KnowledgeRetrieval | None = None,
+        history_token_counts: list[int] | None = None,
     ) -> tuple[list[dict], dict]:
         logger.debug(
             "Building context for conversation",
@@ -68,7 +99,9 @@ class ContextManager:
         )
 
         # 1️⃣ KB RAG
-        kb_msgs = await augment_with_knowledge(conv.id, incoming_user_text, self.db)
+        kb_msgs = await augment_with_knowledge(
+            conv.id, incoming_user_text, self.db, retrieval=retrieval
+        )
         logger.debug(
             "Knowledge base augmentation completed",
             extra={
@@ -89,18 +122,20 @@ class ContextManager:
             + [{"role": "user", "content": incoming_user_text}]
         )
 
-        # 4️⃣ Trim
-        model_cfg = get_model_config(self.model_id) or {}
-        max_ctx = (
-            model_cfg.get("max_context_tokens")  # ← canonical key
-            or model_cfg.get("max_ctx")  # ← legacy fallback
-            or 8192  # ← hard-stop default
+        # 4️⃣ Trim (each message counted once; stored history counts reused)
+        max_ctx = get_context_window(self.model_id)
+
+        if history_token_counts is None or len(history_token_counts) != len(base_history):
+            history_token_counts = count_tokens_per_message(base_history, self.model_id)
+        context_counts = count_tokens_per_message(
+            kb_msgs + web_msgs + msgs[-1:], self.model_id
         )
+        token_counts = context_counts[:-1] + history_token_counts + context_counts[-1:]
 
         orig_msg_count = len(msgs)
-        orig_token_count = count_tokens_messages(msgs, self.model_id)
+        orig_token_count = sum(token_counts)
         msgs, tokens_removed_count = await trim_context_to_window(
-            msgs, self.model_id, max_ctx
+            msgs, self.model_id, max_ctx, token_counts=token_counts
         )
         # Calculate final token usage by subtracting removed tokens (avoids double counting)
         token_usage = orig_token_count - tokens_removed_count
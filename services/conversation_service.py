@@ -4,24 +4,34 @@
 # and AI-related operations, including parameter validation and
 # generating AI responses.
 
+import asyncio
 import logging
-from typing import List, Optional, Any, Union, cast
-from uuid import UUID
+from contextlib import aclosing
+from typing import AsyncGenerator, List, Optional, Any, Union, cast
+from uuid import UUID, uuid4
 from datetime import datetime
 
 from fastapi import Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, or_
+from sqlalchemy import select, and_, case, func, or_
 from sqlalchemy.orm import joinedload, aliased
 from sqlalchemy.exc import IntegrityError
 
 # Central model helpers
 from utils.model_registry import validate_model_and_params
-from db import get_async_session
+from config import settings
+from db import get_async_session, get_async_session_context
 from models.conversation import Conversation
 from models.message import Message
-from utils.ai_response import generate_ai_response, AIResponseOptions
+from utils.ai_response import (
+    generate_ai_response,
+    stream_ai_response,
+    AIResponseOptions,
+)
+from utils.ai_helper import KnowledgeRetrieval
 from utils.db_utils import get_all_by_condition, save_model
+from utils.openai import get_moderation
+from utils.sentry_utils import sentry_span_context
 from utils.serializers import serialize_conversation, serialize_message
 from services.project_service import validate_project_access
 from models.user import User  # required inside helper
@@ -330,13 +340,10 @@ class ConversationService:
         )
         return [serialize_message(m) for m in messages]
 
-    async def create_message(
+    async def _prepare_ai_turn(
         self,
-        conversation_id: UUID,
-        user_id: int,
+        conv: Conversation,
         content: str,
-        role: str = "user",
-        project_id: Optional[UUID] = None,
         image_data: Optional[Union[str, List[str]]] = None,
         vision_detail: Optional[str] = "auto",
         enable_thinking: Optional[bool] = None,
@@ -345,141 +352,313 @@ class ConversationService:
         temperature: Optional[float] = None,
         max_tokens: Optional[int] = None,
         enable_web_search: Optional[bool] = False,
-    ) -> dict:
-        """Create a new message in the conversation and, if role=user, generate AI response."""
+        stream: bool = False,
+        retrieval: Optional[KnowledgeRetrieval] = None,
+        history: Optional[List[dict[str, Any]]] = None,
+        history_token_counts: Optional[List[int]] = None,
+    ) -> tuple[List[dict[str, Any]], dict[str, Any], AIResponseOptions]:
+        """
+        Build the prompt and resolve generation options for an AI reply.
+
+        Returns ``(prompt_messages, token_stats, options)``.  Explicit
+        arguments win over the conversation's saved ``ai_settings``.
+        Knowledge-base context comes from *retrieval* and prior messages from
+        *history* when given (see ``_run_pre_generation``).
+        """
         from services.context_manager import ContextManager
 
-        conv = await self._validate_conversation_access(
-            conversation_id, user_id, project_id
+        conversation_id = conv.id
+        ctx_mgr = ContextManager(self.db, conv.model_id, enable_web_search or False)
+        # History: raw list of message dicts
+        if history is None:
+            history, history_token_counts = await self._load_history_window(
+                conversation_id,
+                conv.model_id,
+                reserved_tokens=self._history_token_reserve(conv, content, max_tokens),
+            )
+        with sentry_span_context(op="chat.context_build", description="Assemble prompt"):
+            prompt_msgs, stats = await ctx_mgr.build(
+                conv,
+                content,
+                history,
+                retrieval=retrieval,
+                history_token_counts=history_token_counts,
+            )
+        ai_settings = (
+            conv.extra_data.get("ai_settings", {}) if conv.extra_data else {}
         )
 
-        user_message = await self._create_user_message(
-            conversation_id, content, role, image_data
+        # Check if the model supports extended thinking before applying settings
+        from utils.model_registry import get_model_config
+
+        model_cfg = get_model_config(conv.model_id)
+        model_supports_thinking = (
+            model_cfg
+            and "extended_thinking" in model_cfg.get("capabilities", [])
         )
-        response = {"user_message": serialize_message(user_message)}
 
-        # Only auto-generate AI response for user messages
-        if user_message.role == "user":
-            if not conv.model_id:
-                raise ConversationError(
-                    "Cannot generate AI response: No model configured for conversation",
-                    400,
-                )
-            try:
-                ctx_mgr = ContextManager(
-                    self.db, conv.model_id, enable_web_search or False
-                )
-                # History: raw list of message dicts
-                history = await self._get_conversation_context(conversation_id)
-                prompt_msgs, stats = await ctx_mgr.build(conv, content, history)
-                ai_settings = (
-                    conv.extra_data.get("ai_settings", {}) if conv.extra_data else {}
-                )
+        final_enable_thinking = (
+            enable_thinking
+            if enable_thinking is not None
+            else (
+                ai_settings.get("enable_thinking")
+                if model_supports_thinking
+                else False
+            )
+        )
+        final_thinking_budget = (
+            thinking_budget
+            if thinking_budget is not None
+            else (
+                ai_settings.get("thinking_budget")
+                if model_supports_thinking
+                else None
+            )
+        )
+        final_reasoning_effort = (
+            reasoning_effort
+            if reasoning_effort is not None
+            else ai_settings.get("reasoning_effort")
+        )
+        final_vision_detail = (
+            vision_detail
+            if vision_detail is not None
+            else ai_settings.get("vision_detail", "auto")
+        )
+        final_temperature = (
+            temperature
+            if temperature is not None
+            else ai_settings.get("temperature")
+        )
+        final_max_tokens = (
+            max_tokens
+            if max_tokens is not None
+            else ai_settings.get("max_tokens")
+        )
 
-                # Check if the model supports extended thinking before applying settings
-                from utils.model_registry import get_model_config
+        # Validate final parameters with the model – gracefully downgrade if
+        # the model lacks extended-thinking support.
+        params_for_validation = {
+            "image_data": image_data,
+            "vision_detail": final_vision_detail,
+            "enable_thinking": final_enable_thinking,
+            "thinking_budget": final_thinking_budget,
+            "reasoning_effort": final_reasoning_effort,
+        }
+        if final_temperature is not None:
+            params_for_validation["temperature"] = final_temperature
+        if final_max_tokens is not None:
+            params_for_validation["max_tokens"] = final_max_tokens
 
-                model_cfg = get_model_config(conv.model_id)
-                model_supports_thinking = (
-                    model_cfg
-                    and "extended_thinking" in model_cfg.get("capabilities", [])
+        try:
+            validate_model_and_params(conv.model_id, params_for_validation)
+        except ValueError as ve:
+            # Detect the specific “extended thinking” capability error
+            if "extended thinking" in str(ve):
+                logger.info(
+                    "[ai_turn] Model %s does not support extended thinking – "
+                    "disabling feature and retrying validation",
+                    conv.model_id,
                 )
+                # Force-disable related flags and re-validate
+                final_enable_thinking = False
+                final_thinking_budget = None
+                final_reasoning_effort = None
+                # Remove thinking-related parameters completely from validation
+                params_for_validation = {
+                    k: v
+                    for k, v in params_for_validation.items()
+                    if k
+                    not in [
+                        "enable_thinking",
+                        "thinking_budget",
+                        "reasoning_effort",
+                    ]
+                }
+                validate_model_and_params(conv.model_id, params_for_validation)
+            else:
+                # Propagate unrelated validation errors
+                raise
+
+        opts = AIResponseOptions(
+            image_data=image_data,
+            vision_detail=final_vision_detail,
+            enable_thinking=final_enable_thinking,
+            thinking_budget=final_thinking_budget,
+            enable_markdown_formatting=ai_settings.get(
+                "enable_markdown_formatting", False
+            ),
+            max_tokens=final_max_tokens,
+            temperature=final_temperature,
+            reasoning_effort=final_reasoning_effort,
+            stream=stream,
+        )
+        return prompt_msgs, stats, opts
 
-                final_enable_thinking = (
-                    enable_thinking
-                    if enable_thinking is not None
-                    else (
-                        ai_settings.get("enable_thinking")
-                        if model_supports_thinking
-                        else False
-                    )
+    @staticmethod
+    def _serialize_assistant_message(
+        assistant_msg_obj: Message, stats: dict[str, Any]
+    ) -> dict[str, Any]:
+        serialized_assistant_msg = serialize_message(assistant_msg_obj)
+        if hasattr(assistant_msg_obj, "thinking"):
+            serialized_assistant_msg["thinking"] = assistant_msg_obj.thinking
+        if hasattr(assistant_msg_obj, "redacted_thinking"):
+            serialized_assistant_msg["redacted_thinking"] = (
+                assistant_msg_obj.redacted_thinking
+            )
+        serialized_assistant_msg["token_stats"] = stats
+        serialized_assistant_msg["truncation_details"] = stats.get(
+            "truncation_details", {}
+        )
+        return serialized_assistant_msg
+
+    async def _run_pre_generation(
+        self,
+        conv: Conversation,
+        content: str,
+        role: str,
+        image_data: Optional[Union[str, List[str]]] = None,
+        retrieval: Optional[KnowledgeRetrieval] = None,
+        max_tokens: Optional[int] = None,
+    ) -> tuple[
+        Message,
+        Optional[tuple[List[dict[str, Any]], List[int]]],
+        Optional[dict[str, Any]],
+    ]:
+        """
+        Save the incoming message and gather what generation needs, concurrently.
+
+        The insert runs on this service's session; history loading and
+        knowledge-base retrieval each use their own session, and moderation
+        (``CHAT_MODERATION_ENABLED``) is an HTTP call, so none of them wait on
+        each other.  Without *retrieval* (no reply will be generated) only the
+        insert runs.  Returns ``(message, history, moderation)``, where
+        history is ``(messages, token_counts)`` and excludes the new message,
+        which ``ContextManager`` appends itself.  *max_tokens* (the reply
+        budget) is reserved out of the history window.
+        """
+        conversation_id = conv.id
+        message_id = uuid4()
+
+        async def save_message() -> Message:
+            with sentry_span_context(op="chat.user_message", description="Insert user message"):
+                return await self._create_user_message(
+                    conversation_id, content, role, image_data, message_id=message_id
                 )
-                final_thinking_budget = (
-                    thinking_budget
-                    if thinking_budget is not None
-                    else (
-                        ai_settings.get("thinking_budget")
-                        if model_supports_thinking
-                        else None
+
+        if retrieval is None:
+            return await save_message(), None, None
+
+        async def load_history() -> tuple[List[dict[str, Any]], List[int]]:
+            with sentry_span_context(op="chat.history", description="Load history"):
+                async with get_async_session_context() as session:
+                    return await self._load_history_window(
+                        conversation_id,
+                        conv.model_id,
+                        exclude_message_id=message_id,
+                        db=session,
+                        reserved_tokens=self._history_token_reserve(
+                            conv, content, max_tokens
+                        ),
                     )
-                )
-                final_reasoning_effort = (
-                    reasoning_effort
-                    if reasoning_effort is not None
-                    else ai_settings.get("reasoning_effort")
-                )
-                final_vision_detail = (
-                    vision_detail
-                    if vision_detail is not None
-                    else ai_settings.get("vision_detail", "auto")
-                )
-                final_temperature = (
-                    temperature
-                    if temperature is not None
-                    else ai_settings.get("temperature")
-                )
-                final_max_tokens = (
-                    max_tokens
-                    if max_tokens is not None
-                    else ai_settings.get("max_tokens")
-                )
 
-                # Validate final parameters with the model – gracefully downgrade if
-                # the model lacks extended-thinking support.
-                params_for_validation = {
-                    "image_data": image_data,
-                    "vision_detail": final_vision_detail,
-                    "enable_thinking": final_enable_thinking,
-                    "thinking_budget": final_thinking_budget,
-                    "reasoning_effort": final_reasoning_effort,
-                }
-                if final_temperature is not None:
-                    params_for_validation["temperature"] = final_temperature
-                if final_max_tokens is not None:
-                    params_for_validation["max_tokens"] = final_max_tokens
-
-                try:
-                    validate_model_and_params(conv.model_id, params_for_validation)
-                except ValueError as ve:
-                    # Detect the specific “extended thinking” capability error
-                    if "extended thinking" in str(ve):
-                        logger.info(
-                            "[create_message] Model %s does not support extended thinking – "
-                            "disabling feature and retrying validation",
-                            conv.model_id,
-                        )
-                        # Force-disable related flags and re-validate
-                        final_enable_thinking = False
-                        final_thinking_budget = None
-                        final_reasoning_effort = None
-                        # Remove thinking-related parameters completely from validation
-                        params_for_validation = {
-                            k: v
-                            for k, v in params_for_validation.items()
-                            if k
-                            not in [
-                                "enable_thinking",
-                                "thinking_budget",
-                                "reasoning_effort",
-                            ]
-                        }
-                        validate_model_and_params(conv.model_id, params_for_validation)
-                    else:
-                        # Propagate unrelated validation errors
-                        raise
+        async def retrieve_knowledge() -> None:
+            with sentry_span_context(op="chat.kb_retrieval", description="KB readiness and search"):
+                async with get_async_session_context() as session:
+                    await retrieval.resolve(conv, session)
+
+        async def moderate() -> Optional[dict[str, Any]]:
+            if not getattr(settings, "CHAT_MODERATION_ENABLED", False):
+                return None
+            with sentry_span_context(op="chat.moderation", description="Moderate message"):
+                return await get_moderation(content)
+
+        with sentry_span_context(op="chat.pre_generation", description="Pre-generation pipeline"):
+            message, history, kb_result, moderation = await asyncio.gather(
+                save_message(),
+                load_history(),
+                retrieve_knowledge(),
+                moderate(),
+                return_exceptions=True,
+            )
+        for result in (message, history):
+            if isinstance(result, BaseException):
+                raise result
+        if isinstance(kb_result, BaseException):
+            # Retrieval is best effort: answer without knowledge-base context
+            logger.error(f"KB retrieval failed for conv {conversation_id}: {kb_result}")
+            retrieval.context_text, retrieval.sources = None, []
+        if isinstance(moderation, BaseException):
+            logger.error(f"Moderation failed for conv {conversation_id}: {moderation}")
+            moderation = None
+        return message, history, moderation
+
+    @staticmethod
+    def _is_flagged(moderation: Optional[dict[str, Any]]) -> bool:
+        if not moderation:
+            return False
+        return bool(moderation.get("flagged")) or any(
+            result.get("flagged") for result in moderation.get("results", [])
+        )
+
+    async def create_message(
+        self,
+        conversation_id: UUID,
+        user_id: int,
+        content: str,
+        role: str = "user",
+        project_id: Optional[UUID] = None,
+        image_data: Optional[Union[str, List[str]]] = None,
+        vision_detail: Optional[str] = "auto",
+        enable_thinking: Optional[bool] = None,
+        thinking_budget: Optional[int] = None,
+        reasoning_effort: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        enable_web_search: Optional[bool] = False,
+    ) -> dict:
+        """Create a new message in the conversation and, if role=user, generate AI response."""
+        with sentry_span_context(op="chat.validate", description="Validate access"):
+            conv = await self._validate_conversation_access(
+                conversation_id, user_id, project_id
+            )
+
+        # Only auto-generate AI response for user messages
+        generate = role == "user"
+        if generate and not conv.model_id:
+            raise ConversationError(
+                "Cannot generate AI response: No model configured for conversation",
+                400,
+            )
+
+        # One knowledge-base lookup serves the prompt and the reply metadata
+        retrieval = KnowledgeRetrieval(query=content) if generate else None
+        user_message, history, moderation = await self._run_pre_generation(
+            conv, content, role, image_data, retrieval, max_tokens=max_tokens
+        )
+        response = {"user_message": serialize_message(user_message)}
 
-                opts = AIResponseOptions(
+        if generate and self._is_flagged(moderation):
+            response["assistant_error"] = {
+                "message": "Message was flagged by content moderation",
+                "status_code": 400,
+            }
+        elif generate:
+            try:
+                prompt_msgs, stats, opts = await self._prepare_ai_turn(
+                    conv,
+                    content,
                     image_data=image_data,
-                    vision_detail=final_vision_detail,
-                    enable_thinking=final_enable_thinking,
-                    thinking_budget=final_thinking_budget,
-                    enable_markdown_formatting=ai_settings.get(
-                        "enable_markdown_formatting", False
-                    ),
-                    max_tokens=final_max_tokens,
-                    temperature=final_temperature,
-                    reasoning_effort=final_reasoning_effort,
-                    stream=False,
+                    vision_detail=vision_detail,
+                    enable_thinking=enable_thinking,
+                    thinking_budget=thinking_budget,
+                    reasoning_effort=reasoning_effort,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    enable_web_search=enable_web_search,
+                    retrieval=retrieval,
+                    history=history[0],
+                    history_token_counts=history[1],
                 )
 
                 assistant_msg_obj = await generate_ai_response(
@@ -488,19 +667,13 @@ class ConversationService:
                     model_id=str(conv.model_id),
                     db=self.db,
                     options=opts,
+                    retrieval=retrieval,
                 )
 
                 if assistant_msg_obj:
-                    serialized_assistant_msg = serialize_message(assistant_msg_obj)
-                    if hasattr(assistant_msg_obj, "thinking"):
-                        serialized_assistant_msg["thinking"] = (
-                            assistant_msg_obj.thinking
-                        )
-                    if hasattr(assistant_msg_obj, "redacted_thinking"):
-                        serialized_assistant_msg["redacted_thinking"] = (
-                            assistant_msg_obj.redacted_thinking
-                        )
-                    response["assistant_message"] = serialized_assistant_msg
+                    response["assistant_message"] = self._serialize_assistant_message(
+                        assistant_msg_obj, stats
+                    )
                 else:
                     logger.error(
                         f"AI response generation returned None for conversation {conversation_id}"
@@ -516,11 +689,6 @@ class ConversationService:
                 # Attach stats and structured truncation details to API response and assistant_message
                 response["token_stats"] = stats
                 response["truncation_details"] = stats.get("truncation_details", {})
-                if "assistant_message" in response and response["assistant_message"]:
-                    response["assistant_message"]["token_stats"] = stats
-                    response["assistant_message"]["truncation_details"] = stats.get(
-                        "truncation_details", {}
-                    )
             except HTTPException as http_exc:
                 logger.error(
                     f"HTTP error during AI generation for conv {conversation_id}: "
@@ -540,12 +708,113 @@ class ConversationService:
 
         return response
 
+    async def stream_message(
+        self,
+        conversation_id: UUID,
+        user_id: int,
+        content: str,
+        project_id: Optional[UUID] = None,
+        image_data: Optional[Union[str, List[str]]] = None,
+        vision_detail: Optional[str] = "auto",
+        enable_thinking: Optional[bool] = None,
+        thinking_budget: Optional[int] = None,
+        reasoning_effort: Optional[str] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        enable_web_search: Optional[bool] = False,
+    ) -> AsyncGenerator[tuple[str, dict[str, Any]], None]:
+        """
+        Save a user message and stream the AI reply as ``(event, data)`` pairs.
+
+        Events are ``user_message`` (first), one ``delta`` per text fragment,
+        and finally ``assistant_message``, or ``error`` if generation fails
+        after the user message was saved.  Access and model checks run before
+        the first event, so they surface as ``ConversationError``.
+        """
+        with sentry_span_context(op="chat.validate", description="Validate access"):
+            conv = await self._validate_conversation_access(
+                conversation_id, user_id, project_id
+            )
+        if not conv.model_id:
+            raise ConversationError(
+                "Cannot generate AI response: No model configured for conversation",
+                400,
+            )
+
+        retrieval = KnowledgeRetrieval(query=content)
+        user_message, history, moderation = await self._run_pre_generation(
+            conv, content, "user", image_data, retrieval, max_tokens=max_tokens
+        )
+        yield "user_message", serialize_message(user_message)
+
+        if self._is_flagged(moderation):
+            yield "error", {
+                "message": "Message was flagged by content moderation",
+                "status_code": 400,
+            }
+            return
+
+        try:
+            prompt_msgs, stats, opts = await self._prepare_ai_turn(
+                conv,
+                content,
+                image_data=image_data,
+                vision_detail=vision_detail,
+                enable_thinking=enable_thinking,
+                thinking_budget=thinking_budget,
+                reasoning_effort=reasoning_effort,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                enable_web_search=enable_web_search,
+                stream=True,
+                retrieval=retrieval,
+                history=history[0],
+                history_token_counts=history[1],
+            )
+
+            # aclosing: if our consumer goes away, close the provider stream now
+            async with aclosing(
+                stream_ai_response(
+                    conversation_id=conversation_id,
+                    messages=prompt_msgs,
+                    model_id=str(conv.model_id),
+                    db=self.db,
+                    options=opts,
+                    retrieval=retrieval,
+                )
+            ) as ai_events:
+                async for event in ai_events:
+                    if event["type"] == "delta":
+                        yield "delta", {"content": event["content"]}
+                        continue
+
+                    conv.context_token_usage = stats["prompt_tokens"]
+                    await save_model(self.db, conv)
+                    yield "assistant_message", self._serialize_assistant_message(
+                        event["message"], stats
+                    )
+        except HTTPException as http_exc:
+            logger.error(
+                f"HTTP error during AI streaming for conv {conversation_id}: "
+                f"{http_exc.status_code} - {http_exc.detail}"
+            )
+            yield "error", {
+                "message": http_exc.detail,
+                "status_code": http_exc.status_code,
+            }
+        except Exception as e:
+            logger.exception(
+                f"Unexpected error during AI streaming for conv {conversation_id}: {e}"
+            )
+            yield "error", {"message": f"Internal server error: {str(e)}"}
+
     async def _create_user_message(
         self,
         conversation_id: UUID,
         content: str,
         role: str,
         image_data: Optional[Union[str, List[str]]] = None,
+        message_id: Optional[UUID] = None,
     ) -> Message:
         """Create and save a message with new columns, handling image data if present."""
         from utils.message_render import render_markdown_to_html
@@ -589,6 +858,7 @@ class ConversationService:
         token_count = count_tokens_text(msg_text, model_id)
 
         message = Message(
+            id=message_id,
             conversation_id=conversation_id,
             raw_text=msg_text,
             formatted_text=html,
@@ -604,21 +874,26 @@ class ConversationService:
         return message
 
     async def _get_conversation_context(
-        self, conversation_id: UUID, include_system_prompt: bool = False
+        self,
+        conversation_id: UUID,
+        include_system_prompt: bool = False,
+        exclude_message_id: Optional[UUID] = None,
+        db: Optional[AsyncSession] = None,
+        model_id: Optional[str] = None,
     ) -> List[dict[str, Any]]:
         """Get formatted message history for AI context."""
-        messages = await get_all_by_condition(
-            self.db,
-            Message,
-            Message.conversation_id == conversation_id,
-            order_by=Message.created_at.asc(),
-            limit=100,  # limit to avoid extremely long histories
-        )
+        from utils.tokens import count_tokens_text
+
+        db = db or self.db
+        conv = None
+        if include_system_prompt or model_id is None:
+            conv = await db.get(Conversation, conversation_id)
+        model_id = model_id or (conv.model_id if conv else None)
 
         context = []
+        reserved_tokens = 0
         if include_system_prompt:
             system_prompt = "You are a helpful assistant."
-            conv = await self.db.get(Conversation, conversation_id)
             if (
                 conv
                 and conv.extra_data
@@ -626,13 +901,129 @@ class ConversationService:
             ):
                 system_prompt = conv.extra_data["ai_settings"]["system_prompt"]
             context.append({"role": "system", "content": system_prompt})
+            reserved_tokens = count_tokens_text(system_prompt, model_id)
+
+        history, _ = await self._load_history_window(
+            conversation_id,
+            model_id,
+            exclude_message_id=exclude_message_id,
+            db=db,
+            reserved_tokens=reserved_tokens,
+        )
+        context.extend(history)
+        return context
 
-        for msg in messages:
-            message_dict = {"role": msg.role, "content": getattr(msg, "raw_text", None)}
-            # Additional logic for images could go here, but currently we only pass text
-            context.append(message_dict)
+    def _history_token_reserve(
+        self,
+        conv: Conversation,
+        content: str,
+        max_tokens: Optional[int] = None,
+    ) -> int:
+        """
+        Tokens of the prompt and reply that are not history.
 
-        return context
+        Counts the incoming message and the reply budget (*max_tokens*, the
+        conversation's ``ai_settings`` or the model's ``max_tokens``), plus
+        the knowledge-base context cap when the conversation uses its
+        project's knowledge base (retrieval runs alongside history loading,
+        so its actual size is not known yet).
+        """
+        from utils.ai_helper import DEFAULT_MAX_CONTEXT_TOKENS
+        from utils.model_registry import get_model_config
+        from utils.tokens import count_tokens_text
+
+        ai_settings = (conv.extra_data or {}).get("ai_settings") or {}
+        reply_tokens = (
+            max_tokens
+            or ai_settings.get("max_tokens")
+            or (get_model_config(conv.model_id) or {}).get("max_tokens")
+            or 0
+        )
+        reserved = count_tokens_text(content, conv.model_id) + reply_tokens
+        if conv.project_id and conv.use_knowledge_base:
+            reserved += DEFAULT_MAX_CONTEXT_TOKENS
+        return reserved
+
+    async def _load_history_window(
+        self,
+        conversation_id: UUID,
+        model_id: Optional[str],
+        exclude_message_id: Optional[UUID] = None,
+        db: Optional[AsyncSession] = None,
+        reserved_tokens: int = 0,
+    ) -> tuple[List[dict[str, Any]], List[int]]:
+        """
+        Load the newest messages that fit the model's context window.
+
+        *reserved_tokens* (see :meth:`_history_token_reserve`) is taken off
+        the window first, so the history returned leaves room for the rest
+        of the prompt and the reply.  At least a quarter of the window is
+        kept for history, so small-window models still see recent turns.
+
+        A running ``SUM(token_count)`` over the messages, newest first, picks
+        the cut-off in the database, so only the rows that can be used are
+        transferred.  Rows without a stored count (legacy data) are estimated
+        in SQL and tokenised here; that is the only tokenisation done.
+        Returns ``(messages, token_counts)`` oldest first.
+        """
+        from services.context_manager import get_context_window
+        from utils.tokens import count_tokens_text
+
+        db = db or self.db
+        window = get_context_window(model_id) if model_id else 8192
+        budget = max(window - reserved_tokens, window // 4)
+        max_messages = getattr(settings, "CHAT_HISTORY_MAX_MESSAGES", 200)
+
+        conditions = [Message.conversation_id == conversation_id]
+        if exclude_message_id is not None:
+            conditions.append(Message.id != exclude_message_id)
+
+        stored_or_estimate = case(
+            (Message.token_count > 0, Message.token_count),
+            else_=func.char_length(Message.raw_text) // 4 + 1,
+        )
+        newest_first = (Message.created_at.desc(), Message.id.desc())
+        window = (
+            select(
+                Message.id,
+                Message.role,
+                Message.raw_text,
+                Message.token_count,
+                Message.created_at,
+                func.sum(stored_or_estimate)
+                .over(order_by=newest_first, rows=(None, 0))
+                .label("running_tokens"),
+                func.row_number().over(order_by=newest_first).label("recency"),
+            )
+            .where(*conditions)
+            .subquery()
+        )
+        result = await db.execute(
+            select(window.c.role, window.c.raw_text, window.c.token_count)
+            .where(
+                window.c.running_tokens <= budget,
+                window.c.recency <= max_messages,
+            )
+            .order_by(window.c.created_at.desc(), window.c.id.desc())
+        )
+
+        # Newest first: re-check the budget with real counts where the
+        # database only had an estimate
+        messages: List[dict[str, Any]] = []
+        token_counts: List[int] = []
+        used = 0
+        for role, raw_text, token_count in result.all():
+            if not token_count or token_count <= 0:
+                token_count = count_tokens_text(raw_text or "", model_id)
+            if used + token_count > budget:
+                break
+            used += token_count
+            messages.append({"role": role, "content": raw_text})
+            token_counts.append(token_count)
+
+        messages.reverse()
+        token_counts.reverse()
+        return messages, token_counts
 
     async def generate_conversation_title(
         self, conversation_id: UUID, messages: List[dict[str, Any]], model_id: str
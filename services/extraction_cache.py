@@ -0,0 +1,136 @@
+"""
+extraction_cache.py
+-------------------
+Local on-disk cache of text extraction results.
+
+Project files are immutable once stored, so the output of
+``TextExtractor.extract_text`` only depends on the file content and the
+extraction parameters.  Entries are keyed by
+``(file_hash, extractor_version, chunk_size, chunk_overlap)`` and stored as
+compressed JSON (zstd when the optional ``zstandard`` package is installed,
+gzip otherwise).  A cache hit lets re-indexing skip both the storage download
+and the parsing step.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+from config import settings
+from services.text_extraction import EXTRACTOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+ZSTD_AVAILABLE = False
+zstandard = None
+try:
+    import zstandard  # type: ignore
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    logger.debug("zstandard not installed – extraction cache will use gzip")
+
+
+class ExtractionCache:
+    """Content-addressed cache of ``(chunks, metadata)`` extraction results."""
+
+    def __init__(self, cache_dir: str, enabled: bool = True):
+        self.cache_dir = Path(cache_dir)
+        self.enabled = enabled
+        self.suffix = ".json.zst" if ZSTD_AVAILABLE else ".json.gz"
+
+    def _entry_path(
+        self, file_hash: str, chunk_size: int, chunk_overlap: int
+    ) -> Path:
+        raw_key = f"{file_hash}:{EXTRACTOR_VERSION}:{chunk_size}:{chunk_overlap}"
+        digest = hashlib.sha256(raw_key.encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}{self.suffix}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if ZSTD_AVAILABLE:
+            return zstandard.ZstdCompressor(level=6).compress(data)  # type: ignore
+        return gzip.compress(data, compresslevel=6)
+
+    def _decompress(self, data: bytes) -> bytes:
+        if ZSTD_AVAILABLE:
+            return zstandard.ZstdDecompressor().decompress(data)  # type: ignore
+        return gzip.decompress(data)
+
+    def _read_sync(self, path: Path) -> Optional[Tuple[List[str], dict[str, Any]]]:
+        try:
+            payload = json.loads(self._decompress(path.read_bytes()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # Corrupt or partially written entry – drop it and re-extract
+            logger.warning(f"Discarding unreadable extraction cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        return payload["chunks"], payload["metadata"]
+
+    def _write_sync(
+        self, path: Path, chunks: List[str], metadata: dict[str, Any]
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = self._compress(
+            json.dumps({"chunks": chunks, "metadata": metadata}, default=str).encode(
+                "utf-8"
+            )
+        )
+        # Write to a temp file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    async def get(
+        self, file_hash: Optional[str], chunk_size: int, chunk_overlap: int
+    ) -> Optional[Tuple[List[str], dict[str, Any]]]:
+        """Return cached ``(chunks, metadata)`` or None on a miss."""
+        if not self.enabled or not file_hash:
+            return None
+        path = self._entry_path(file_hash, chunk_size, chunk_overlap)
+        return await asyncio.to_thread(self._read_sync, path)
+
+    async def put(
+        self,
+        file_hash: Optional[str],
+        chunk_size: int,
+        chunk_overlap: int,
+        chunks: List[str],
+        metadata: dict[str, Any],
+    ) -> None:
+        """Store an extraction result; failures are logged and ignored."""
+        if not self.enabled or not file_hash:
+            return
+        path = self._entry_path(file_hash, chunk_size, chunk_overlap)
+        try:
+            await asyncio.to_thread(self._write_sync, path, chunks, metadata)
+        except Exception as e:
+            logger.warning(f"Failed to write extraction cache entry {path}: {e}")
+
+
+_extraction_cache: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> ExtractionCache:
+    """Return the process-wide ExtractionCache configured from settings."""
+    global _extraction_cache
+    if _extraction_cache is None:
+        _extraction_cache = ExtractionCache(
+            cache_dir=getattr(
+                settings, "EXTRACTION_CACHE_DIR", "./storage/extraction_cache"
+            ),
+            enabled=getattr(settings, "EXTRACTION_CACHE_ENABLED", True),
+        )
+    return _extraction_cache
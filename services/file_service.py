@@ -5,18 +5,25 @@ Unified file service for all file operations across projects and knowledge bases
 Consolidates file upload, deletion, and listing logic into a single service.
 """
 
+import asyncio
+import codecs
+import hashlib
 import logging
 import os
-from datetime import datetime
-from typing import Any, Dict, Optional
-from uuid import UUID
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, BinaryIO, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
-from fastapi import BackgroundTasks, HTTPException, UploadFile
-from sqlalchemy import func, select
+import anyio
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import delete, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.project import Project
 from models.project_file import ProjectFile
+from models.upload_session import UploadSession
 from services.knowledgebase_helpers import (
     StorageManager,
     TokenManager,
@@ -27,13 +34,99 @@ from services.knowledgebase_helpers import (
 #     ensure_project_has_knowledge_base,
 #     process_single_file_for_search,
 # )
+from config import settings
 from utils.db_utils import get_by_id, save_model
 from utils.file_validation import FileValidator, sanitize_filename
+from utils.io_utils import (
+    UPLOAD_CHUNK_SIZE,
+    SpooledUpload,
+    UploadTooLargeError,
+    spool_upload,
+)
 from utils.tokens import count_tokens_text
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class _ChunkedUploadState:
+    """Incremental sha256 / sniff buffer / token estimate of a chunked upload."""
+
+    offset: int = 0
+    digest: Any = field(default_factory=hashlib.sha256)
+    decoder: Any = field(
+        default_factory=lambda: codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    )
+    sniff: bytearray = field(default_factory=bytearray)
+    token_estimate: int = 0
+
+    def update(self, chunk: bytes) -> None:
+        self.offset += len(chunk)
+        self.digest.update(chunk)
+        if len(self.sniff) < FileValidator.SCAN_SAMPLE_SIZE:
+            self.sniff.extend(chunk[: FileValidator.SCAN_SAMPLE_SIZE - len(self.sniff)])
+        text_chunk = self.decoder.decode(chunk)
+        if text_chunk:
+            self.token_estimate += count_tokens_text(text_chunk)
+
+    @classmethod
+    def replay(cls, staging_path: str, length: int) -> "_ChunkedUploadState":
+        state = cls()
+        with open(staging_path, "rb") as f:
+            remaining = length
+            while remaining > 0:
+                chunk = f.read(min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                state.update(chunk)
+                remaining -= len(chunk)
+        return state
+
+
+@dataclass
+class _BatchItem:
+    """One file of a batch upload as it moves from spooled to recorded."""
+
+    file_info: Dict[str, Any]
+    spooled: SpooledUpload
+    token_data: Dict[str, Any]
+    index: int = 0  # position in the request
+    existing: Optional[ProjectFile] = None
+    duplicate_of: Optional["_BatchItem"] = None
+    stored_path: Optional[str] = None
+    stored_here: bool = False
+    record: Optional[ProjectFile] = None
+
+
+# Upload session id -> digest state for chunks handled by this process
+_CHUNKED_UPLOADS: Dict[str, _ChunkedUploadState] = {}
+
+
+def _source_matches(source: Optional[str]) -> Any:
+    """Filter on the ``config["source"]`` ownership marker (None: unmarked)."""
+    marker = ProjectFile.config["source"].astext
+    return marker.is_(None) if source is None else marker == source
+
+
+def _upload_expiry() -> datetime:
+    ttl = getattr(settings, "UPLOAD_SESSION_TTL_SECONDS", 24 * 3600)
+    return datetime.now(timezone.utc) + timedelta(seconds=ttl)
+
+
+def _create_staging_file(staging_path: Path) -> None:
+    staging_path.parent.mkdir(parents=True, exist_ok=True)
+    staging_path.touch()
+
+
+def _remove_staging_file(staging_path: str) -> None:
+    Path(staging_path).unlink(missing_ok=True)
+
+
+def _write_chunk_piece(f: BinaryIO, state: _ChunkedUploadState, piece: bytes) -> None:
+    f.write(piece)
+    state.update(piece)
+
+
 class FileService:
     """
     Unified file service handling all file operations for projects and knowledge bases.
@@ -58,7 +151,6 @@ class FileService:
         user_id: Optional[int] = None,
         *,
         index_kb: bool = False,
-        background_tasks: Optional[BackgroundTasks] = None,
     ) -> Dict[str, Any]:
         """
         Unified file upload implementation for both project files and KB indexing.
@@ -69,46 +161,67 @@ class FileService:
         user_id: (Optional) User performing the upload; ``None`` when the
                 operation is executed by a background system task or when the
                 caller does not represent an authenticated user.
-            index_kb: Whether to index file in knowledge base
-            background_tasks: Optional background task queue
+            index_kb: Whether to queue the file for knowledge base indexing
 
         Returns:
             Dictionary with file metadata and upload results
         """
-        # Get project and ensure KB exists if indexing requested
-        project = await get_by_id(self.db, Project, project_id)
-        if not project:
-            raise HTTPException(status_code=404, detail="Project not found")
+        project, kb = await self._get_project_and_kb(project_id, user_id, index_kb)
 
-        kb = None
-        if index_kb:
-            # Delayed import to avoid circular dependency
-            from services.knowledgebase_service import ensure_project_has_knowledge_base
+        # Process file info and validate
+        file_info = await self._process_upload_file_info(file)
 
-            kb = project.knowledge_base or await ensure_project_has_knowledge_base(
-                project_id, self.db, user_id
+        # Single pass over the upload: spool to a temp file while hashing,
+        # sizing, sampling and estimating tokens.
+        spooled, token_data = await self._spool_upload(
+            file, file_info["sanitized_filename"]
+        )
+        try:
+            FileValidator.scan_content_sample(spooled.sniff)
+            return await self._commit_upload(
+                project,
+                kb,
+                file_info,
+                spooled.file,
+                file_hash=spooled.sha256,
+                file_size=spooled.size,
+                token_data=token_data,
+                index_kb=index_kb,
             )
+        finally:
+            spooled.close()
 
-        # Process file info and validate
-        file_info = await self._process_upload_file_info(file)
+    async def _commit_upload(
+        self,
+        project: Project,
+        kb: Optional[Any],
+        file_info: Dict[str, Any],
+        contents: Any,
+        *,
+        file_hash: str,
+        file_size: int,
+        token_data: Dict[str, Any],
+        index_kb: bool,
+    ) -> Dict[str, Any]:
+        """
+        Store already-validated upload *contents* and create its record.
 
-        # Read file contents in chunks
-        contents = await self._read_file_contents(file)
+        Shared by direct and chunked uploads: deduplicates by content hash,
+        checks project capacity, stores the blob, saves the ``ProjectFile``
+        and queues KB indexing when requested.
+        """
+        project_id = project.id
 
-        # Validate file size (single canonical implementation)
-        if not FileValidator.validate_size(len(contents)):
-            raise HTTPException(
-                status_code=413,
-                detail=(
-                    f"File exceeds maximum size of "
-                    f"{FileValidator.get_max_file_size_mb():.1f} MB"
-                ),
-            )
+        # Same content already in this project: reuse the existing record
+        # instead of storing, extracting and indexing it a second time.
+        if getattr(settings, "UPLOAD_DEDUP_ENABLED", True):
+            existing = await self._find_by_hash(file_hash, project_id)
+            if existing is not None:
+                return await self._duplicate_upload_result(
+                    existing, index_kb=index_kb, kb=kb
+                )
 
-        # Estimate tokens and validate project capacity
-        token_data = await self._estimate_file_tokens(
-            contents, file_info["sanitized_filename"]
-        )
+        # Validate project capacity
         has_capacity = await TokenManager.validate_usage(
             project, token_data["token_estimate"]
         )
@@ -121,43 +234,552 @@ class FileService:
                 ),
             )
 
-        # Store file
-        stored_path = await self._store_file(
-            contents, project_id, file_info["sanitized_filename"]
-        )
+        # Store file (streamed, hash already known).  With content-addressed
+        # storage an identical blob stored for another project is linked
+        # rather than uploaded again.
+        shared = None
+        if getattr(settings, "STORAGE_CONTENT_ADDRESSED", False):
+            shared = await self._find_by_hash(file_hash)
+        if shared is not None:
+            stored_path = shared.file_path
+        else:
+            stored_path = await self._store_file(
+                contents,
+                project_id,
+                file_info["sanitized_filename"],
+                file_hash=file_hash,
+            )
 
         # Create file record
         project_file = await self._create_file_record(
-            project_id, file_info, stored_path, len(contents), token_data
+            project_id,
+            file_info,
+            stored_path,
+            file_size,
+            token_data,
+            file_hash=file_hash,
         )
         await save_model(self.db, project_file)
         await TokenManager.update_usage(project, token_data["token_estimate"], self.db)
 
-        # Queue background processing if KB indexing requested
-        if index_kb and background_tasks and kb:
-            # Delayed import to avoid circular dependency
-            from services.knowledgebase_service import process_single_file_for_search
+        # Queue durable background processing if KB indexing requested
+        if index_kb and kb:
+            from services.ingestion_queue import enqueue_file_ingestion
 
-            background_tasks.add_task(
-                process_single_file_for_search,
+            await enqueue_file_ingestion(
+                self.db,
+                project_id=project_id,
                 file_id=UUID(str(project_file.id)),
+                knowledge_base_id=UUID(str(kb.id)),
+            )
+
+        return self._upload_result(project_file, index_kb=index_kb)
+
+    async def upload_batch(
+        self,
+        project_id: UUID,
+        files: List[UploadFile],
+        user_id: Optional[int] = None,
+        *,
+        index_kb: bool = False,
+        source: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Upload several files to a project in one operation.
+
+        Files are spooled/validated and then stored concurrently (bounded by
+        ``UPLOAD_BATCH_CONCURRENCY``); all ``ProjectFile`` rows and the
+        project's token usage are written in a single transaction and KB
+        indexing is queued as one batch job.  Files rejected by validation
+        are reported in ``errors`` without failing the rest of the batch.
+
+        ``source`` marks the created records (``config["source"]``) as owned
+        by a system process such as repository sync.  Project dedup only
+        matches records with the same marker (none for user uploads), so
+        system-owned and user-owned files never share a record.
+        """
+        project, kb = await self._get_project_and_kb(project_id, user_id, index_kb)
+        semaphore = asyncio.Semaphore(
+            max(1, getattr(settings, "UPLOAD_BATCH_CONCURRENCY", 4))
+        )
+
+        async def _prepare(index: int, file: UploadFile) -> _BatchItem:
+            async with semaphore:
+                file_info = await self._process_upload_file_info(file)
+                spooled, token_data = await self._spool_upload(
+                    file, file_info["sanitized_filename"]
+                )
+                try:
+                    FileValidator.scan_content_sample(spooled.sniff)
+                except BaseException:
+                    spooled.close()
+                    raise
+                return _BatchItem(file_info, spooled, token_data, index=index)
+
+        prepared = await asyncio.gather(
+            *(_prepare(i, file) for i, file in enumerate(files)),
+            return_exceptions=True,
+        )
+        items = [p for p in prepared if isinstance(p, _BatchItem)]
+        try:
+            errors = []
+            for index, (file, outcome) in enumerate(zip(files, prepared)):
+                if isinstance(outcome, _BatchItem):
+                    continue
+                if not isinstance(outcome, (HTTPException, ValueError)):
+                    raise outcome
+                errors.append(
+                    {
+                        "index": index,
+                        "filename": file.filename,
+                        "error": (
+                            outcome.detail
+                            if isinstance(outcome, HTTPException)
+                            else str(outcome)
+                        ),
+                    }
+                )
+            return await self._commit_batch(
+                project,
+                kb,
+                items,
+                errors,
+                semaphore,
+                index_kb=index_kb,
+                source=source,
+            )
+        finally:
+            for item in items:
+                item.spooled.close()
+
+    async def _commit_batch(
+        self,
+        project: Project,
+        kb: Optional[Any],
+        items: List[_BatchItem],
+        errors: List[Dict[str, Any]],
+        semaphore: asyncio.Semaphore,
+        *,
+        index_kb: bool,
+        source: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Dedup, store and record the spooled files of a batch upload."""
+        project_id = project.id
+        dedup = getattr(settings, "UPLOAD_DEDUP_ENABLED", True)
+        to_index: List[UUID] = []
+
+        # Content already in the project (one query for the whole batch)
+        existing_by_hash: Dict[str, ProjectFile] = {}
+        if dedup and items:
+            result = await self.db.execute(
+                select(ProjectFile)
+                .where(
+                    ProjectFile.project_id == project_id,
+                    ProjectFile.file_hash.in_({i.spooled.sha256 for i in items}),
+                    _source_matches(source),
+                )
+                .order_by(ProjectFile.created_at)
+            )
+            for record in result.scalars():
+                existing_by_hash.setdefault(record.file_hash, record)
+
+        new_items: List[_BatchItem] = []
+        first_by_hash: Dict[str, _BatchItem] = {}
+        for item in items:
+            sha = item.spooled.sha256
+            item.existing = existing_by_hash.get(sha)
+            if item.existing is not None:
+                if (
+                    index_kb
+                    and kb
+                    and not self._is_indexed_or_queued(item.existing)
+                    and item.existing.id not in to_index
+                ):
+                    to_index.append(item.existing.id)
+            elif dedup and sha in first_by_hash:
+                item.duplicate_of = first_by_hash[sha]
+            else:
+                first_by_hash[sha] = item
+                new_items.append(item)
+
+        total_tokens = sum(i.token_data["token_estimate"] for i in new_items)
+        if not await TokenManager.validate_usage(project, total_tokens):
+            raise HTTPException(
+                status_code=400,
+                detail=(
+                    f"Operation requires {total_tokens} tokens, "
+                    f"but only {project.max_tokens - project.token_usage} available"
+                ),
+            )
+
+        # Blobs already stored for other projects (content-addressed storage)
+        if getattr(settings, "STORAGE_CONTENT_ADDRESSED", False) and new_items:
+            result = await self.db.execute(
+                select(ProjectFile.file_hash, ProjectFile.file_path).where(
+                    ProjectFile.file_hash.in_({i.spooled.sha256 for i in new_items})
+                )
+            )
+            shared_paths = dict(result.all())
+            for item in new_items:
+                item.stored_path = shared_paths.get(item.spooled.sha256)
+
+        async def _store(item: _BatchItem) -> None:
+            async with semaphore:
+                item.stored_path = await self._store_file(
+                    item.spooled.file,
+                    project_id,
+                    item.file_info["sanitized_filename"],
+                    file_hash=item.spooled.sha256,
+                )
+                item.stored_here = True
+
+        pending = [i for i in new_items if i.stored_path is None]
+        stored = await asyncio.gather(
+            *(_store(item) for item in pending), return_exceptions=True
+        )
+        for item, outcome in zip(pending, stored):
+            if isinstance(outcome, BaseException):
+                logger.error(
+                    f"Failed to store {item.file_info['sanitized_filename']}: {outcome}"
+                )
+                errors.append(
+                    {
+                        "index": item.index,
+                        "filename": item.file_info["sanitized_filename"],
+                        "error": "Failed to store file",
+                    }
+                )
+        new_items = [i for i in new_items if i.stored_path is not None]
+
+        # One transaction for every record and the token usage update
+        try:
+            for item in new_items:
+                item.record = await self._create_file_record(
+                    project_id,
+                    item.file_info,
+                    item.stored_path,
+                    item.spooled.size,
+                    item.token_data,
+                    file_hash=item.spooled.sha256,
+                    source=source,
+                )
+            self.db.add_all([item.record for item in new_items])
+            project.token_usage = max(
+                0,
+                project.token_usage
+                + sum(i.token_data["token_estimate"] for i in new_items),
+            )
+            await self.db.commit()
+        except BaseException:
+            await self.db.rollback()
+            for item in new_items:
+                if item.stored_here:
+                    try:
+                        await self.storage.delete_file(item.stored_path)
+                    except Exception as e:
+                        logger.warning(
+                            f"Failed to remove orphaned blob {item.stored_path}: {e}"
+                        )
+            raise
+
+        # Load server-side defaults (created_at) for all new rows at once
+        new_ids = [item.record.id for item in new_items]
+        if new_ids:
+            await self.db.execute(
+                select(ProjectFile)
+                .where(ProjectFile.id.in_(new_ids))
+                .execution_options(populate_existing=True)
+            )
+
+        ingestion_job = None
+        to_index.extend(new_ids)
+        if index_kb and kb and to_index:
+            from services.ingestion_queue import enqueue_files_ingestion
+
+            ingestion_job = await enqueue_files_ingestion(
+                self.db,
                 project_id=project_id,
+                file_ids=[UUID(str(file_id)) for file_id in to_index],
                 knowledge_base_id=UUID(str(kb.id)),
-                db=self.db,
             )
 
+        # Results keep request order; "index" maps each back to its input file
+        results = []
+        for item in items:
+            if item.existing is not None:
+                results.append(
+                    {
+                        **self._upload_result(item.existing, index_kb=index_kb),
+                        "index": item.index,
+                        "duplicate": True,
+                    }
+                )
+            elif item.duplicate_of is not None:
+                if item.duplicate_of.record is not None:
+                    results.append(
+                        {
+                            **self._upload_result(
+                                item.duplicate_of.record, index_kb=index_kb
+                            ),
+                            "index": item.index,
+                            "duplicate": True,
+                        }
+                    )
+            elif item.record is not None:
+                results.append(
+                    {
+                        **self._upload_result(item.record, index_kb=index_kb),
+                        "index": item.index,
+                    }
+                )
+
+        logger.info(
+            f"Batch upload to project {project_id}: {len(new_items)} stored, "
+            f"{len(results) - len(new_items)} duplicate(s), {len(errors)} error(s)"
+        )
         return {
-            "id": str(project_file.id),
-            "filename": project_file.filename,
-            "file_size": project_file.file_size,
-            "file_type": project_file.file_type,
-            "token_estimate": token_data["token_estimate"],
-            "indexed_kb": index_kb,
-            "created_at": (
-                project_file.created_at.isoformat() if project_file.created_at else None
-            ),
+            "files": results,
+            "errors": errors,
+            "ingestion_job_id": str(ingestion_job.id) if ingestion_job else None,
         }
 
+    # -----------------------------------------------------------------
+    # Resumable (chunked) uploads
+    # -----------------------------------------------------------------
+    async def init_chunked_upload(
+        self,
+        project_id: UUID,
+        filename: str,
+        total_size: int,
+        user_id: Optional[int] = None,
+        *,
+        index_kb: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Open a resumable upload session.
+
+        The client then sends the file with :meth:`upload_chunk` (one chunk
+        per request, in order) and calls :meth:`finalize_chunked_upload`.
+        Returns the session state, including the maximum chunk size.
+        """
+        self._file_info_for_name(filename)
+        if total_size <= 0:
+            raise ValueError("total_size must be greater than zero")
+        if not FileValidator.validate_size(total_size):
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"File exceeds maximum size of "
+                    f"{FileValidator.get_max_file_size_mb():.1f} MB"
+                ),
+            )
+        project = await get_by_id(self.db, Project, project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        await self._purge_expired_uploads()
+
+        upload_id = uuid4()
+        staging_dir = Path(
+            getattr(settings, "UPLOAD_STAGING_DIR", "./storage/upload_staging")
+        )
+        staging_path = staging_dir / f"{upload_id}.part"
+        await asyncio.to_thread(_create_staging_file, staging_path)
+
+        upload = UploadSession(
+            id=upload_id,
+            project_id=project_id,
+            user_id=user_id,
+            filename=filename[:255],
+            total_size=total_size,
+            staging_path=str(staging_path),
+            index_kb=index_kb,
+            status="open",
+            received_bytes=0,
+            expires_at=_upload_expiry(),
+        )
+        await save_model(self.db, upload)
+        logger.info(
+            f"Opened chunked upload {upload_id} for {filename} "
+            f"({total_size} bytes) in project {project_id}"
+        )
+        return self._upload_session_info(upload)
+
+    async def get_chunked_upload(
+        self, project_id: UUID, upload_id: UUID
+    ) -> Dict[str, Any]:
+        """Return session state so an interrupted client can resume."""
+        upload = await self.db.get(UploadSession, upload_id)
+        if not upload or upload.project_id != project_id:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return self._upload_session_info(upload)
+
+    async def upload_chunk(
+        self,
+        project_id: UUID,
+        upload_id: UUID,
+        offset: int,
+        chunk: AsyncIterator[bytes],
+    ) -> Dict[str, Any]:
+        """
+        Append one chunk, streamed from *chunk*, at *offset*.
+
+        *offset* must equal the bytes received so far (409 otherwise, with
+        the expected offset); a retried chunk simply overwrites any partial
+        tail left by an interrupted request.  The content hash, sniff buffer
+        and token estimate are advanced as the bytes are written.
+        """
+        upload = await self._lock_upload_session(project_id, upload_id)
+        self._require_open(upload)
+        self._require_staged(upload)
+        if offset != upload.received_bytes:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Chunk offset does not match received bytes",
+                    "expected_offset": upload.received_bytes,
+                },
+            )
+
+        max_chunk = getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024)
+        state = await self._sync_upload_state(upload)
+        key = str(upload.id)
+        written = 0
+        f = await asyncio.to_thread(open, upload.staging_path, "r+b")
+        try:
+            await asyncio.to_thread(f.seek, offset)
+            await asyncio.to_thread(f.truncate)
+            async for piece in chunk:
+                if not piece:
+                    continue
+                written += len(piece)
+                if written > max_chunk:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Chunk exceeds maximum size of {max_chunk} bytes",
+                    )
+                if offset + written > upload.total_size:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Chunk extends past the declared file size",
+                    )
+                await asyncio.to_thread(_write_chunk_piece, f, state, piece)
+        except BaseException:
+            # Partially applied chunk: rebuild state from disk next time
+            _CHUNKED_UPLOADS.pop(key, None)
+            raise
+        finally:
+            await asyncio.to_thread(f.close)
+
+        upload.received_bytes = offset + written
+        upload.expires_at = _upload_expiry()
+        await save_model(self.db, upload)
+        return self._upload_session_info(upload)
+
+    async def finalize_chunked_upload(
+        self, project_id: UUID, upload_id: UUID
+    ) -> Dict[str, Any]:
+        """
+        Validate the assembled file, store it and create its record.
+
+        Runs the same content scan, dedup, capacity check and indexing
+        enqueue as :meth:`upload`.  Finalizing an already completed session
+        returns the created file again.
+        """
+        upload = await self._lock_upload_session(project_id, upload_id)
+        if upload.status == "completed" and upload.file_id:
+            project_file = await self.db.get(ProjectFile, upload.file_id)
+            if project_file:
+                return {
+                    **self._upload_result(project_file, index_kb=upload.index_kb),
+                    "upload_id": str(upload.id),
+                }
+        if self._finalize_lease_expired(upload):
+            # A previous finalize died mid-way; content-hash dedup makes the
+            # retry reuse any file record it had already created.
+            logger.warning(f"Taking over stale finalize of chunked upload {upload_id}")
+            upload.status = "open"
+        self._require_open(upload)
+        self._require_staged(upload)
+        if upload.received_bytes != upload.total_size:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "message": "Upload is incomplete",
+                    "received_bytes": upload.received_bytes,
+                    "total_size": upload.total_size,
+                },
+            )
+
+        state = await self._sync_upload_state(upload)
+        FileValidator.scan_content_sample(bytes(state.sniff))
+        file_info = self._file_info_for_name(upload.filename)
+
+        # Storing and indexing commit several times; mark the session so a
+        # concurrent finalize cannot commit the same upload twice.
+        upload.status = "finalizing"
+        upload.expires_at = _upload_expiry()
+        await save_model(self.db, upload)
+
+        try:
+            project, kb = await self._get_project_and_kb(
+                project_id, upload.user_id, upload.index_kb
+            )
+            f = await asyncio.to_thread(open, upload.staging_path, "rb")
+            try:
+                result = await self._commit_upload(
+                    project,
+                    kb,
+                    file_info,
+                    f,
+                    file_hash=state.digest.hexdigest(),
+                    file_size=upload.total_size,
+                    token_data={
+                        "token_estimate": state.token_estimate,
+                        "file_size": upload.total_size,
+                    },
+                    index_kb=upload.index_kb,
+                )
+            finally:
+                await asyncio.to_thread(f.close)
+        except BaseException:
+            # Reopen the session so the client can retry or abort; shielded
+            # so a cancelled request cannot leave it "finalizing"
+            with anyio.CancelScope(shield=True):
+                await self.db.rollback()
+                await self.db.execute(
+                    update(UploadSession)
+                    .where(UploadSession.id == upload_id)
+                    .values(status="open")
+                )
+                await self.db.commit()
+            raise
+
+        upload.status = "completed"
+        upload.file_id = UUID(result["id"])
+        await save_model(self.db, upload)
+        _CHUNKED_UPLOADS.pop(str(upload.id), None)
+        await asyncio.to_thread(_remove_staging_file, upload.staging_path)
+        logger.info(f"Finalized chunked upload {upload_id} as file {result['id']}")
+        return {**result, "upload_id": str(upload.id)}
+
+    async def abort_chunked_upload(
+        self, project_id: UUID, upload_id: UUID
+    ) -> Dict[str, Any]:
+        """Cancel an open upload session and discard its staged data."""
+        upload = await self._lock_upload_session(project_id, upload_id)
+        if upload.status == "completed" or (
+            upload.status == "finalizing" and not self._finalize_lease_expired(upload)
+        ):
+            raise HTTPException(
+                status_code=409, detail=f"Upload session is {upload.status}"
+            )
+        upload.status = "aborted"
+        await save_model(self.db, upload)
+        _CHUNKED_UPLOADS.pop(str(upload.id), None)
+        await asyncio.to_thread(_remove_staging_file, upload.staging_path)
+        return self._upload_session_info(upload)
+
     async def list_files(
         self,
         project_id: UUID,
@@ -234,6 +856,7 @@ class FileService:
             "file_size": file_record.file_size,
             "file_type": file_record.file_type,
             "file_path": file_record.file_path,
+            "file_hash": file_record.file_hash,
             "token_estimate": (
                 file_record.config.get("token_count", 0) if file_record.config else 0
             ),
@@ -260,12 +883,29 @@ class FileService:
         if not file_record or file_record.project_id != project_id:
             raise HTTPException(status_code=404, detail="File not found")
 
-        # Delete from storage (canonical path)
+        # Delete from storage (canonical path) unless the blob is shared with
+        # other records (deduplicated / content-addressed uploads)
         storage_deleted = False
-        try:
-            storage_deleted = await self.storage.delete_file(file_record.file_path)
-        except Exception as e:
-            logger.warning(f"Failed to delete file from storage: {e}", exc_info=True)
+        other_refs = await self.db.scalar(
+            select(func.count())
+            .select_from(ProjectFile)
+            .where(
+                ProjectFile.file_path == file_record.file_path,
+                ProjectFile.id != file_record.id,
+            )
+        )
+        if other_refs:
+            logger.info(
+                f"Keeping shared blob {file_record.file_path} "
+                f"({other_refs} other reference(s))"
+            )
+        else:
+            try:
+                storage_deleted = await self.storage.delete_file(file_record.file_path)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to delete file from storage: {e}", exc_info=True
+                )
 
         # Delete file record
         await self.db.delete(file_record)
@@ -281,60 +921,296 @@ class FileService:
         }
 
     # Private helper methods
+    async def _get_project_and_kb(
+        self, project_id: UUID, user_id: Optional[int], index_kb: bool
+    ) -> Tuple[Project, Optional[Any]]:
+        """Load the project and ensure its KB exists if indexing requested."""
+        project = await get_by_id(self.db, Project, project_id)
+        if not project:
+            raise HTTPException(status_code=404, detail="Project not found")
+
+        kb = None
+        if index_kb:
+            # Delayed import to avoid circular dependency
+            from services.knowledgebase_service import ensure_project_has_knowledge_base
+
+            kb = project.knowledge_base or await ensure_project_has_knowledge_base(
+                project_id, self.db, user_id
+            )
+        return project, kb
+
+    async def _lock_upload_session(
+        self, project_id: UUID, upload_id: UUID
+    ) -> UploadSession:
+        """Load an upload session with a row lock (serializes its chunks)."""
+        result = await self.db.execute(
+            select(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.project_id == project_id,
+            )
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        upload = result.scalars().first()
+        if not upload:
+            raise HTTPException(status_code=404, detail="Upload session not found")
+        return upload
+
+    @staticmethod
+    def _require_open(upload: UploadSession) -> None:
+        if upload.status != "open":
+            raise HTTPException(
+                status_code=409, detail=f"Upload session is {upload.status}"
+            )
+        if upload.expires_at < datetime.now(timezone.utc):
+            raise HTTPException(status_code=410, detail="Upload session has expired")
+
+    @staticmethod
+    def _finalize_lease_expired(upload: UploadSession) -> bool:
+        """Whether *upload* is stuck in ``finalizing`` past the finalize lease."""
+        if upload.status != "finalizing" or upload.updated_at is None:
+            return False
+        lease = getattr(settings, "UPLOAD_FINALIZE_LEASE_SECONDS", 900)
+        return upload.updated_at < datetime.now(timezone.utc) - timedelta(seconds=lease)
+
+    @staticmethod
+    def _require_staged(upload: UploadSession) -> None:
+        # Staged chunks are on local disk: a request routed to an instance
+        # that does not share UPLOAD_STAGING_DIR cannot continue the upload
+        if not os.path.isfile(upload.staging_path):
+            raise HTTPException(
+                status_code=409,
+                detail="Upload data is not available on this server; restart the upload",
+            )
+
+    async def _sync_upload_state(self, upload: UploadSession) -> "_ChunkedUploadState":
+        """
+        Return the incremental digest state for *upload*.
+
+        State is kept in-process between chunks; when this process did not
+        see the earlier chunks (restart, another worker) it is rebuilt once
+        from the staged bytes.
+        """
+        key = str(upload.id)
+        state = _CHUNKED_UPLOADS.get(key)
+        if state is None or state.offset != upload.received_bytes:
+            state = await asyncio.to_thread(
+                _ChunkedUploadState.replay, upload.staging_path, upload.received_bytes
+            )
+            _CHUNKED_UPLOADS[key] = state
+        return state
+
+    async def _purge_expired_uploads(self, limit: int = 100) -> None:
+        """Drop expired upload sessions and their staged data."""
+        result = await self.db.execute(
+            select(UploadSession.id, UploadSession.staging_path)
+            .where(UploadSession.expires_at < datetime.now(timezone.utc))
+            .limit(limit)
+        )
+        expired = result.all()
+        if not expired:
+            return
+        for upload_id, staging_path in expired:
+            _CHUNKED_UPLOADS.pop(str(upload_id), None)
+            await asyncio.to_thread(_remove_staging_file, staging_path)
+        await self.db.execute(
+            delete(UploadSession).where(
+                UploadSession.id.in_([row[0] for row in expired])
+            )
+        )
+        await self.db.commit()
+        logger.info(f"Purged {len(expired)} expired upload session(s)")
+
+    @staticmethod
+    def _upload_session_info(upload: UploadSession) -> Dict[str, Any]:
+        return {
+            "upload_id": str(upload.id),
+            "filename": upload.filename,
+            "total_size": upload.total_size,
+            "received_bytes": upload.received_bytes,
+            "status": upload.status,
+            "chunk_size": getattr(settings, "UPLOAD_CHUNK_MAX_BYTES", 8 * 1024 * 1024),
+            "file_id": str(upload.file_id) if upload.file_id else None,
+            "expires_at": upload.expires_at.isoformat() if upload.expires_at else None,
+        }
+
+    @staticmethod
+    def _upload_result(project_file: ProjectFile, *, index_kb: bool) -> Dict[str, Any]:
+        return {
+            "id": str(project_file.id),
+            "filename": project_file.filename,
+            "file_size": project_file.file_size,
+            "file_type": project_file.file_type,
+            "token_estimate": (project_file.config or {}).get("token_count", 0),
+            "indexed_kb": index_kb,
+            "created_at": (
+                project_file.created_at.isoformat() if project_file.created_at else None
+            ),
+        }
+
+    async def _find_by_hash(
+        self,
+        file_hash: str,
+        project_id: Optional[UUID] = None,
+        *,
+        source: Optional[str] = None,
+    ) -> Optional[ProjectFile]:
+        """
+        Return a file with the given content hash (optionally within a project).
+
+        Within a project only records with the same ``source`` marker match,
+        so user uploads and system-owned (e.g. repository sync) records are
+        never deduplicated onto each other.
+        """
+        query = select(ProjectFile).where(ProjectFile.file_hash == file_hash)
+        if project_id is not None:
+            query = query.where(
+                ProjectFile.project_id == project_id, _source_matches(source)
+            )
+        result = await self.db.execute(
+            query.order_by(ProjectFile.created_at).limit(1)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def _is_indexed_or_queued(record: ProjectFile) -> bool:
+        search_proc = (record.config or {}).get("search_processing") or {}
+        return bool(search_proc.get("success")) or search_proc.get("status") in (
+            "queued",
+            "processing",
+            "retrying",
+        )
+
+    async def _duplicate_upload_result(
+        self, existing: ProjectFile, *, index_kb: bool, kb: Optional[Any]
+    ) -> Dict[str, Any]:
+        """Build the upload response for content already stored in the project."""
+        logger.info(
+            f"Upload of {existing.filename} matched existing file {existing.id} "
+            f"by content hash; skipping storage and indexing"
+        )
+        if index_kb and kb and not self._is_indexed_or_queued(existing):
+            # Existing copy was never indexed – index it now (once)
+            from services.ingestion_queue import enqueue_file_ingestion
+
+            await enqueue_file_ingestion(
+                self.db,
+                project_id=existing.project_id,
+                file_id=UUID(str(existing.id)),
+                knowledge_base_id=UUID(str(kb.id)),
+            )
+
+        return {
+            "id": str(existing.id),
+            "filename": existing.filename,
+            "file_size": existing.file_size,
+            "file_type": existing.file_type,
+            "token_estimate": (existing.config or {}).get("token_count", 0),
+            "indexed_kb": index_kb,
+            "duplicate": True,
+            "created_at": (
+                existing.created_at.isoformat() if existing.created_at else None
+            ),
+        }
+
     async def _process_upload_file_info(self, file: UploadFile) -> Dict[str, Any]:
         """Process and validate upload file information."""
-        file_info = await FileValidator.validate_upload_file(file)
-        filename, ext = os.path.splitext(file.filename or "untitled")
+        # Content scanning happens on the sniff buffer while spooling
+        file_info = await FileValidator.validate_upload_file(file, scan_content=False)
+        return self._build_file_info(file.filename or "untitled", file_info)
+
+    @staticmethod
+    def _build_file_info(
+        original_filename: str, validator_info: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        filename, ext = os.path.splitext(original_filename)
         return {
             "sanitized_filename": f"{sanitize_filename(filename)}{ext}",
             "file_ext": ext[1:].lower() if ext else "",
-            "file_type": file_info.get("category", "unknown"),
+            "file_type": validator_info.get("category", "unknown"),
         }
 
-    async def _read_file_contents(self, file: UploadFile) -> bytes:
-        """Read file contents in chunks to avoid memory issues."""
-        chunk_size = 65536  # 64 KB
-        file_chunks = []
-        total_bytes = 0
-
-        chunk = await file.read(chunk_size)
-        while chunk:
-            file_chunks.append(chunk)
-            total_bytes += len(chunk)
-            # Log progress for large files
-            if total_bytes % (1024 * 1024) < chunk_size:
-                logger.info(f"Reading file... total so far: {total_bytes} bytes")
-            chunk = await file.read(chunk_size)
-
-        logger.info(f"Finished reading file: total {total_bytes} bytes")
-        return b"".join(file_chunks)
-
-    async def _estimate_file_tokens(
-        self, contents: bytes, filename: str
-    ) -> Dict[str, Any]:
-        """Estimate token count for file contents."""
+    @classmethod
+    def _file_info_for_name(cls, original_filename: str) -> Dict[str, Any]:
+        """Validate a client-declared filename (chunked uploads)."""
+        if not FileValidator.validate_extension(original_filename):
+            raise ValueError(
+                f"File type not allowed. Supported: "
+                f"{', '.join(FileValidator.get_allowed_extensions_list())}\n"
+                f"Attempted to upload: {original_filename}"
+            )
+        return cls._build_file_info(
+            original_filename, FileValidator.get_file_info(original_filename)
+        )
+
+    async def _spool_upload(
+        self, file: UploadFile, filename: str
+    ) -> Tuple[SpooledUpload, Dict[str, Any]]:
+        """
+        Read the upload once into a spooled temp file.
+
+        Returns the spooled upload (sha256, size, sniff buffer) and the token
+        estimate, which is accumulated from each chunk as it streams past
+        instead of decoding the whole file afterwards.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        token_estimate = 0
+
+        def _count_chunk_tokens(chunk: bytes) -> None:
+            nonlocal token_estimate
+            text_chunk = decoder.decode(chunk)
+            if text_chunk:
+                token_estimate += count_tokens_text(text_chunk)
+
         try:
-            text_content = contents.decode("utf-8", errors="ignore")
-            token_estimate = count_tokens_text(text_content)
-        except Exception as e:
-            logger.warning(
-                f"Failed to estimate tokens for {filename}: {e}", exc_info=True
+            spooled = await spool_upload(
+                file,
+                max_size=FileValidator.MAX_FILE_SIZE,
+                sniff_size=FileValidator.SCAN_SAMPLE_SIZE,
+                spool_max_memory=getattr(
+                    settings, "UPLOAD_SPOOL_MAX_MEMORY", 1024 * 1024
+                ),
+                on_chunk=_count_chunk_tokens,
             )
-            # Fallback estimation: roughly 4 characters per token
-            token_estimate = len(contents) // 4
+        except UploadTooLargeError as e:
+            raise HTTPException(
+                status_code=413,
+                detail=(
+                    f"File exceeds maximum size of "
+                    f"{FileValidator.get_max_file_size_mb():.1f} MB"
+                ),
+            ) from e
 
-        return {
+        logger.info(f"Finished reading file {filename}: total {spooled.size} bytes")
+        return spooled, {
             "token_estimate": token_estimate,
-            "file_size": len(contents),
+            "file_size": spooled.size,
         }
 
     async def _store_file(
-        self, contents: bytes, project_id: UUID, filename: str
+        self,
+        contents: Any,
+        project_id: UUID,
+        filename: str,
+        file_hash: Optional[str] = None,
     ) -> str:
-        """Store file contents and return storage path."""
+        """Store file contents (bytes or file object) and return storage path."""
+        if file_hash and getattr(settings, "STORAGE_CONTENT_ADDRESSED", False):
+            # Content-addressed key so identical uploads share one blob
+            _, ext = os.path.splitext(filename)
+            return await StorageManager.save_file(
+                contents,
+                f"cas/{file_hash[:2]}/{file_hash}{ext.lower()}",
+                None,
+                file_hash=file_hash,
+                content_addressed=True,
+            )
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         rel_path = f"{project_id}/{timestamp}_{filename}"
-        return await StorageManager.save_file(contents, rel_path, project_id)
+        return await StorageManager.save_file(
+            contents, rel_path, project_id, file_hash=file_hash
+        )
 
     async def _create_file_record(
         self,
@@ -343,17 +1219,23 @@ class FileService:
         stored_path: str,
         file_size: int,
         token_data: Dict[str, Any],
+        file_hash: Optional[str] = None,
+        source: Optional[str] = None,
     ) -> ProjectFile:
         """Create database record for uploaded file."""
+        config = {
+            "token_count": token_data["token_estimate"],
+            "file_extension": file_info.get("file_ext", ""),
+            "upload_time": datetime.now().isoformat(),
+        }
+        if source:
+            config["source"] = source
         return ProjectFile(
             project_id=project_id,
+            file_hash=file_hash,
             filename=file_info["sanitized_filename"],
             file_path=stored_path,
             file_size=file_size,
             file_type=file_info["file_type"],
-            config={
-                "token_count": token_data["token_estimate"],
-                "file_extension": file_info.get("file_ext", ""),
-                "upload_time": datetime.now().isoformat(),
-            },
+            config=config,
         )
@@ -10,11 +10,17 @@ Features:
 """
 
 import os
+import asyncio
+import base64
+import functools
 import hashlib
 import logging
+import shutil
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 from pathlib import Path
-from typing import Any, Optional, Union, cast, BinaryIO
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Union, cast, BinaryIO
 from uuid import UUID
 
 # Local imports
@@ -59,7 +65,186 @@ else:
 # Define a clear union for the file content
 # ----------------------------------------------------
 FileContent = Union[bytes, bytearray, memoryview, BinaryIO]
-from utils.io_utils import ensure_bytes  # noqa: E402
+from utils.io_utils import hash_stream  # noqa: E402
+from services.blob_cache import get_blob_cache  # noqa: E402
+
+
+# Dedicated pool for local-backend filesystem calls so large writes never
+# run on the event loop and do not compete with the default executor.
+_LOCAL_IO_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "STORAGE_LOCAL_IO_THREADS", 4),
+    thread_name_prefix="local-storage-io",
+)
+
+
+async def _run_local_io(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _LOCAL_IO_EXECUTOR, functools.partial(func, *args, **kwargs)
+    )
+
+
+def _write_local_atomic(
+    file_path: Path, content: Union[bytes, BinaryIO], fsync: bool
+) -> None:
+    """Write to a temp file beside *file_path*, then atomically rename it."""
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if isinstance(content, bytes):
+                f.write(content)
+            else:
+                shutil.copyfileobj(content, f, 1024 * 1024)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+        if fsync:
+            # Persist the rename itself
+            dir_fd = os.open(file_path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _delete_local(file_path: str) -> bool:
+    try:
+        os.remove(file_path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def _is_missing_object(exc: Exception) -> bool:
+    """Whether a cloud SDK error means the object does not exist."""
+    if type(exc).__name__ == "ResourceNotFoundError":  # azure.core
+        return True
+    response = getattr(exc, "response", None)  # botocore ClientError
+    if isinstance(response, dict):
+        return response.get("Error", {}).get("Code") in ("NoSuchKey", "404")
+    return False
+
+
+async def _stream_local_path(
+    file_path: str, start: int, length: Optional[int], chunk_size: int
+) -> AsyncIterator[bytes]:
+    try:
+        f = await _run_local_io(open, file_path, "rb")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Local file not found: {file_path}")
+    try:
+        await _run_local_io(f.seek, start)
+        remaining = length
+        while remaining is None or remaining > 0:
+            to_read = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await _run_local_io(f.read, to_read)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+    finally:
+        await _run_local_io(f.close)
+
+
+# ----------------------------------------------------
+# Process-wide cloud client registry
+# ----------------------------------------------------
+# Azure BlobServiceClients and boto3 S3 clients own connection pools and
+# resolve credentials on creation.  FileStorage instances are cheap and
+# created per operation, so the underlying clients are shared per backend
+# configuration and closed once on application shutdown.
+_CLIENT_REGISTRY: dict[tuple[str, ...], Any] = {}
+_AZURE_SESSIONS: list[Any] = []
+
+
+def _config_key(*parts: Optional[str]) -> tuple[str, ...]:
+    # Secrets are hashed so they are not kept verbatim in the registry keys
+    return tuple(
+        hashlib.sha256((part or "").encode("utf-8")).hexdigest() for part in parts
+    )
+
+
+def _get_azure_client(connection_string: str) -> Any:
+    key = ("azure",) + _config_key(connection_string)
+    client = _CLIENT_REGISTRY.get(key)
+    if client is None:
+        from azure.storage.blob.aio import BlobServiceClient  # type: ignore[reportMissingImports]
+
+        kwargs: dict[str, Any] = {}
+        try:
+            import aiohttp  # type: ignore[reportMissingImports]
+            from azure.core.pipeline.transport import AioHttpTransport  # type: ignore[reportMissingImports]
+
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=getattr(settings, "STORAGE_MAX_CONNECTIONS", 32),
+                    keepalive_timeout=60,
+                )
+            )
+            _AZURE_SESSIONS.append(session)
+            kwargs["transport"] = AioHttpTransport(session=session, session_owner=False)
+        except (ImportError, RuntimeError) as e:
+            # RuntimeError: no running loop to bind the session to yet
+            logger.debug(f"Using default Azure transport: {e}")
+
+        client = BlobServiceClient.from_connection_string(connection_string, **kwargs)
+        _CLIENT_REGISTRY[key] = client
+    return client
+
+
+def _get_s3_client(
+    aws_access_key: Optional[str],
+    aws_secret_key: Optional[str],
+    aws_region: Optional[str],
+) -> Any:
+    key = ("s3",) + _config_key(aws_access_key, aws_secret_key, aws_region)
+    client = _CLIENT_REGISTRY.get(key)
+    if client is None:
+        from botocore.config import Config as BotoConfig  # type: ignore[reportMissingImports]
+
+        client = cast(Any, boto3).client(
+            "s3",
+            aws_access_key_id=aws_access_key,
+            aws_secret_access_key=aws_secret_key,
+            region_name=aws_region,
+            config=BotoConfig(
+                max_pool_connections=getattr(settings, "STORAGE_MAX_CONNECTIONS", 32),
+                tcp_keepalive=True,
+                retries={"max_attempts": 5, "mode": "adaptive"},
+            ),
+        )
+        _CLIENT_REGISTRY[key] = client
+    return client
+
+
+async def close_storage_clients() -> None:
+    """Close all pooled storage clients (called on application shutdown)."""
+    clients = list(_CLIENT_REGISTRY.items())
+    _CLIENT_REGISTRY.clear()
+    for key, client in clients:
+        try:
+            if key[0] == "azure":
+                await client.close()
+            elif hasattr(client, "close"):
+                await asyncio.to_thread(client.close)
+        except Exception as e:
+            logger.warning(f"Error closing {key[0]} storage client: {e}")
+    sessions = list(_AZURE_SESSIONS)
+    _AZURE_SESSIONS.clear()
+    for session in sessions:
+        try:
+            await session.close()
+        except Exception as e:
+            logger.warning(f"Error closing Azure HTTP session: {e}")
 
 
 def format_bytes(size: float) -> str:
@@ -92,10 +277,23 @@ class FileStorage:
     ):
         self.storage_type = storage_type.lower()
 
+        # Cloud uploads above the threshold are sent as parallel parts/blocks
+        self.upload_part_size = max(
+            5 * 1024 * 1024,  # S3 minimum part size
+            getattr(settings, "STORAGE_UPLOAD_PART_SIZE", 8 * 1024 * 1024),
+        )
+        self.upload_concurrency = max(
+            1, getattr(settings, "STORAGE_UPLOAD_CONCURRENCY", 4)
+        )
+        self.multipart_threshold = getattr(
+            settings, "STORAGE_MULTIPART_THRESHOLD", 16 * 1024 * 1024
+        )
+
         # ----- Local -----
         if self.storage_type == "local":
             self.local_path = Path(local_path)
             self.local_path.mkdir(parents=True, exist_ok=True)
+            self.local_fsync = getattr(settings, "STORAGE_LOCAL_FSYNC", False)
 
         # ----- Azure -----
         elif self.storage_type == "azure":
@@ -109,12 +307,8 @@ class FileStorage:
                     "Must provide azure_connection_string and azure_container_name."
                 )
 
-            # Import directly to ensure we have the correct class
-            from azure.storage.blob.aio import BlobServiceClient  # type: ignore[reportMissingImports]
-
-            self.blob_service_client = BlobServiceClient.from_connection_string(
-                azure_connection_string
-            )
+            # Shared, pooled client for this connection string
+            self.blob_service_client = _get_azure_client(azure_connection_string)
             self.azure_container_name = azure_container_name
             self.container_client = self.blob_service_client.get_container_client(
                 azure_container_name
@@ -130,12 +324,8 @@ class FileStorage:
                 raise ValueError("Must provide AWS credentials, bucket, and region.")
 
             self.aws_bucket_name = aws_bucket_name
-            self.s3_client = cast(Any, boto3).client(
-                "s3",
-                aws_access_key_id=aws_access_key,
-                aws_secret_access_key=aws_secret_key,
-                region_name=aws_region,
-            )
+            # Shared, pooled client for these credentials/region
+            self.s3_client = _get_s3_client(aws_access_key, aws_secret_key, aws_region)
         else:
             raise ValueError(f"Unsupported storage type: {storage_type}")
 
@@ -146,19 +336,40 @@ class FileStorage:
         content_type: Optional[str] = None,
         metadata: Optional[dict[str, Any]] = None,
         project_id: Optional[UUID] = None,
+        file_hash: Optional[str] = None,
+        content_addressed: bool = False,
     ) -> str:
         """
         Save the file_content to the configured storage and return the file path or URL.
+
+        File-like content (e.g. a spooled upload) is streamed to the backend
+        rather than loaded into memory.  Pass *file_hash* (SHA-256 hex) when
+        the caller already computed it to avoid hashing the content again.
+        With *content_addressed* the *filename* is already a hash-derived key
+        shared across projects and is used verbatim.
         """
-        # Convert content to bytes
-        content = ensure_bytes(file_content)
-
-        # Create a hash-based prefix
-        file_hash = hashlib.sha256(content).hexdigest()[:12]
-        prefix = serialize_uuid(project_id) if project_id else None
-        storage_filename = (
-            f"{prefix}_{file_hash}_{filename}" if prefix else f"{file_hash}_{filename}"
-        )
+        content: Union[bytes, BinaryIO]
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            content = bytes(file_content)
+            if not file_hash:
+                file_hash = hashlib.sha256(content).hexdigest()
+        else:
+            content = file_content
+            if not file_hash:
+                file_hash = await asyncio.to_thread(hash_stream, content)
+            else:
+                content.seek(0)
+
+        if content_addressed:
+            storage_filename = filename
+        else:
+            # Create a hash-based prefix
+            prefix = serialize_uuid(project_id) if project_id else None
+            storage_filename = (
+                f"{prefix}_{file_hash[:12]}_{filename}"
+                if prefix
+                else f"{file_hash[:12]}_{filename}"
+            )
 
         if self.storage_type == "local":
             return await self._save_bytes_local(content, storage_filename)
@@ -173,28 +384,77 @@ class FileStorage:
         else:
             raise ValueError(f"Unsupported storage type: {self.storage_type}")
 
-    async def _save_bytes_local(self, content: bytes, filename: str) -> str:
-        # Ensure directory exists - including any nested directories
+    async def _save_bytes_local(
+        self, content: Union[bytes, BinaryIO], filename: str
+    ) -> str:
+        # Nested directories are created by the writer; readers never see a
+        # partially written file because of the temp-file + rename.
         file_path = Path(self.local_path) / filename
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with file_path.open("wb") as f:
-            f.write(content)
-            f.flush()
-        # Optional verification code (commented out):
-        # with file_path.open("rb") as verify_f:
-        #     if verify_f.read() != content:
-        #         raise IOError("File write verification failed")
+        await _run_local_io(_write_local_atomic, file_path, content, self.local_fsync)
         return str(file_path)
 
+    async def _upload_parts(
+        self,
+        content: Union[bytes, BinaryIO],
+        upload_part: Callable[[int, bytes], Awaitable[Any]],
+    ) -> list[Any]:
+        """
+        Read *content* part by part and run *upload_part(index, data)* with at
+        most ``upload_concurrency`` parts in flight.
+
+        A part is only read once a slot is free, so memory stays bounded at
+        ``upload_concurrency * upload_part_size`` however large the upload is.
+        Results are returned in part order.
+        """
+        stream = BytesIO(content) if isinstance(content, bytes) else content
+        slots = asyncio.Semaphore(self.upload_concurrency)
+        tasks: list[asyncio.Task] = []
+
+        async def _run(index: int, data: bytes) -> Any:
+            try:
+                return await upload_part(index, data)
+            finally:
+                slots.release()
+
+        try:
+            index = 0
+            while True:
+                await slots.acquire()
+                data = await asyncio.to_thread(stream.read, self.upload_part_size)
+                if not data:
+                    slots.release()
+                    break
+                tasks.append(asyncio.create_task(_run(index, data)))
+                index += 1
+                # Surface part failures early instead of reading the rest
+                failed = [t for t in tasks if t.done() and t.exception()]
+                if failed:
+                    raise failed[0].exception()  # type: ignore[misc]
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+    @staticmethod
+    def _content_length(content: Union[bytes, BinaryIO]) -> int:
+        if isinstance(content, bytes):
+            return len(content)
+        position = content.tell()
+        size = content.seek(0, os.SEEK_END)
+        content.seek(position)
+        return size
+
     async def _save_bytes_azure(
         self,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         filename: str,
         content_type: Optional[str],
         metadata: Optional[dict[str, Any]],
     ) -> str:
         from azure.storage.blob import (  # type: ignore[reportMissingImports]
+            BlobBlock,
             ContentSettings as AzureContentSettings,
         )
 
@@ -207,9 +467,25 @@ class FileStorage:
         # Convert metadata values to strings as required by Azure
         str_metadata = {k: str(v) for k, v in (metadata or {}).items()}
 
-        await blob_client.upload_blob(
-            content,
-            overwrite=True,
+        if self._content_length(content) <= self.multipart_threshold:
+            await blob_client.upload_blob(
+                content,
+                overwrite=True,
+                content_settings=content_settings,
+                metadata=str_metadata,
+            )
+            return f"azure://{self.azure_container_name}/{filename}"
+
+        # Large blob: stage blocks in parallel straight from the stream, then
+        # commit the ordered block list.
+        async def _stage(index: int, data: bytes) -> str:
+            block_id = base64.b64encode(f"{index:08d}".encode()).decode()
+            await blob_client.stage_block(block_id=block_id, data=data, length=len(data))
+            return block_id
+
+        block_ids = await self._upload_parts(content, _stage)
+        await blob_client.commit_block_list(
+            [BlobBlock(block_id=block_id) for block_id in block_ids],
             content_settings=content_settings,
             metadata=str_metadata,
         )
@@ -217,51 +493,102 @@ class FileStorage:
 
     async def _save_bytes_s3(
         self,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         filename: str,
         content_type: Optional[str],
         metadata: Optional[dict[str, Any]],
     ) -> str:
-        import asyncio
-
         extra_args: dict[str, Any] = {}
         if content_type:
             extra_args["ContentType"] = content_type
         if metadata:
             extra_args["Metadata"] = {k: str(v) for k, v in metadata.items()}
 
-        # Write to temp file to use .upload_file (sync)
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        if self._content_length(content) <= self.multipart_threshold:
+            body = content if isinstance(content, bytes) else await asyncio.to_thread(
+                content.read
+            )
+            # Wrap sync call in a thread for non-blocking
+            await asyncio.to_thread(
+                self.s3_client.put_object,
+                Bucket=self.aws_bucket_name,
+                Key=filename,
+                Body=body,
+                **extra_args,
+            )
+            return f"s3://{self.aws_bucket_name}/{filename}"
+
+        # Large object: multipart upload fed directly from the stream
+        upload = await asyncio.to_thread(
+            self.s3_client.create_multipart_upload,
+            Bucket=self.aws_bucket_name,
+            Key=filename,
+            **extra_args,
+        )
+        upload_id = upload["UploadId"]
+
+        async def _upload_part(index: int, data: bytes) -> dict[str, Any]:
+            part_number = index + 1  # S3 part numbers start at 1
+            response = await asyncio.to_thread(
+                self.s3_client.upload_part,
+                Bucket=self.aws_bucket_name,
+                Key=filename,
+                UploadId=upload_id,
+                PartNumber=part_number,
+                Body=data,
+            )
+            return {"PartNumber": part_number, "ETag": response["ETag"]}
 
         try:
-            # Wrap sync call in a thread for non-blocking
+            parts = await self._upload_parts(content, _upload_part)
             await asyncio.to_thread(
-                self.s3_client.upload_file,
-                temp_file_path,
-                self.aws_bucket_name,
-                filename,
-                ExtraArgs=extra_args,
+                self.s3_client.complete_multipart_upload,
+                Bucket=self.aws_bucket_name,
+                Key=filename,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": parts},
             )
-        finally:
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
+        except BaseException:
+            # Do not leave orphaned parts billed in the bucket
+            try:
+                await asyncio.to_thread(
+                    self.s3_client.abort_multipart_upload,
+                    Bucket=self.aws_bucket_name,
+                    Key=filename,
+                    UploadId=upload_id,
+                )
+            except Exception as e:
+                logger.warning(f"Failed to abort S3 multipart upload {upload_id}: {e}")
+            raise
 
         return f"s3://{self.aws_bucket_name}/{filename}"
 
-    async def get_file(self, file_path: str) -> bytes:
+    async def get_file(self, file_path: str, file_hash: Optional[str] = None) -> bytes:
         """
         Retrieve file content from storage. Return as bytes.
+
+        Cloud reads go through the local blob cache (when enabled); pass
+        the stored ``file_hash`` so cache entries are tied to the content.
         """
         # ----- Local -----
         if self.storage_type == "local":
-            if os.path.exists(file_path):
-                return Path(file_path).read_bytes()
-            raise FileNotFoundError(f"Local file not found: {file_path}")
-
+            try:
+                return await _run_local_io(Path(file_path).read_bytes)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Local file not found: {file_path}")
+
+        cache = get_blob_cache()
+        cached = await cache.aget(file_path, file_hash)
+        if cached is not None:
+            return cached
+        content = await self._get_remote_file(file_path)
+        await cache.aput(file_path, content, file_hash)
+        return content
+
+    async def _get_remote_file(self, file_path: str) -> bytes:
+        """Fetch a whole object from the configured cloud backend."""
         # ----- Azure -----
-        elif self.storage_type == "azure" and file_path.startswith("azure://"):
+        if self.storage_type == "azure" and file_path.startswith("azure://"):
             parts = file_path.replace("azure://", "").split("/", 1)
             if len(parts) != 2 or parts[0] != self.azure_container_name:
                 raise ValueError(f"Invalid Azure blob URL: {file_path}")
@@ -272,8 +599,6 @@ class FileStorage:
 
         # ----- S3 -----
         elif self.storage_type == "s3" and file_path.startswith("s3://"):
-            import asyncio
-
             parts = file_path.replace("s3://", "").split("/", 1)
             if len(parts) != 2 or parts[0] != self.aws_bucket_name:
                 raise ValueError(f"Invalid S3 URL: {file_path}")
@@ -292,6 +617,132 @@ class FileStorage:
         else:
             raise ValueError(f"Unsupported or invalid file path format: {file_path}")
 
+    async def stream_file(
+        self,
+        file_path: str,
+        start: int = 0,
+        length: Optional[int] = None,
+        chunk_size: int = 1024 * 1024,
+        file_hash: Optional[str] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield the stored bytes ``[start, start + length)`` in chunks.
+
+        Raises ``FileNotFoundError`` (before the first chunk) when the object
+        is missing from the backend.
+
+        Cloud objects are proxied straight from ranged backend reads, so
+        memory use is bounded by *chunk_size* regardless of file size.
+        With the blob cache enabled, cached objects are streamed from local
+        disk and full (non-ranged) reads populate the cache as they go.
+        """
+        cache = get_blob_cache()
+        if self.storage_type == "local" or not cache.enabled:
+            async for chunk in self._stream_backend(file_path, start, length, chunk_size):
+                yield chunk
+            return
+
+        cached_path = await asyncio.to_thread(cache.lookup, file_path, file_hash)
+        if cached_path is not None:
+            try:
+                async for chunk in _stream_local_path(
+                    str(cached_path), start, length, chunk_size
+                ):
+                    yield chunk
+                return
+            except FileNotFoundError:
+                pass  # Evicted after lookup; fall through to the backend
+
+        if start or length is not None:
+            async for chunk in self._stream_backend(file_path, start, length, chunk_size):
+                yield chunk
+            return
+
+        try:
+            writer = await asyncio.to_thread(cache.writer, file_path, file_hash)
+        except OSError as e:
+            logger.warning(f"Blob cache unavailable for {file_path}: {e}")
+            writer = None
+        completed = False
+        try:
+            async for chunk in self._stream_backend(file_path, start, length, chunk_size):
+                if writer is not None:
+                    await asyncio.to_thread(writer.write, chunk)
+                yield chunk
+            completed = True
+        finally:
+            if writer is not None:
+                if completed:
+                    try:
+                        await asyncio.to_thread(writer.commit)
+                    except OSError as e:
+                        logger.warning(f"Failed to cache blob {file_path}: {e}")
+                        await asyncio.to_thread(writer.abort)
+                else:
+                    await asyncio.to_thread(writer.abort)
+
+    async def _stream_backend(
+        self,
+        file_path: str,
+        start: int,
+        length: Optional[int],
+        chunk_size: int,
+    ) -> AsyncIterator[bytes]:
+        """Stream a byte range directly from the configured backend."""
+        # ----- Local -----
+        if self.storage_type == "local":
+            async for chunk in _stream_local_path(file_path, start, length, chunk_size):
+                yield chunk
+
+        # ----- Azure -----
+        elif self.storage_type == "azure" and file_path.startswith("azure://"):
+            parts = file_path.replace("azure://", "").split("/", 1)
+            if len(parts) != 2 or parts[0] != self.azure_container_name:
+                raise ValueError(f"Invalid Azure blob URL: {file_path}")
+            blob_client = self.container_client.get_blob_client(parts[1])
+            try:
+                download = await blob_client.download_blob(
+                    offset=start if (start or length is not None) else None,
+                    length=length,
+                    max_concurrency=1,
+                )
+            except Exception as e:
+                if _is_missing_object(e):
+                    raise FileNotFoundError(f"Azure blob not found: {file_path}") from e
+                raise
+            async for chunk in download.chunks():
+                yield chunk
+
+        # ----- S3 -----
+        elif self.storage_type == "s3" and file_path.startswith("s3://"):
+            parts = file_path.replace("s3://", "").split("/", 1)
+            if len(parts) != 2 or parts[0] != self.aws_bucket_name:
+                raise ValueError(f"Invalid S3 URL: {file_path}")
+            request: dict[str, Any] = {"Bucket": self.aws_bucket_name, "Key": parts[1]}
+            if start or length is not None:
+                end = "" if length is None else str(start + length - 1)
+                request["Range"] = f"bytes={start}-{end}"
+            try:
+                response = await asyncio.to_thread(
+                    self.s3_client.get_object, **request
+                )
+            except Exception as e:
+                if _is_missing_object(e):
+                    raise FileNotFoundError(f"S3 object not found: {file_path}") from e
+                raise
+            body = response["Body"]
+            try:
+                while True:
+                    chunk = await asyncio.to_thread(body.read, chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+            finally:
+                body.close()
+
+        else:
+            raise ValueError(f"Unsupported or invalid file path format: {file_path}")
+
     async def delete_file(self, file_path: str) -> bool:
         """
         Delete a file from storage, returning True if it was deleted,
@@ -299,17 +750,11 @@ class FileStorage:
         """
         # ----- Local -----
         if self.storage_type == "local":
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                    return True
-                except FileNotFoundError:
-                    return False
-                except Exception as e:
-                    logger.error(f"Error deleting local file {file_path}: {e}")
-                    raise
-            else:
-                return False
+            try:
+                return await _run_local_io(_delete_local, file_path)
+            except Exception as e:
+                logger.error(f"Error deleting local file {file_path}: {e}")
+                raise
 
         # ----- Azure -----
         elif self.storage_type == "azure" and file_path.startswith("azure://"):
@@ -327,8 +772,6 @@ class FileStorage:
 
         # ----- S3 -----
         elif self.storage_type == "s3" and file_path.startswith("s3://"):
-            import asyncio
-
             parts = file_path.replace("s3://", "").split("/", 1)
             if len(parts) != 2 or parts[0] != self.aws_bucket_name:
                 raise ValueError(f"Invalid S3 URL: {file_path}")
@@ -356,6 +799,11 @@ async def get_storage_config() -> dict[str, Any]:
     Return standard config from your 'settings' object or environment.
     Adjust attribute names as needed for your environment.
     """
+    return storage_config_from_settings()
+
+
+def storage_config_from_settings() -> dict[str, Any]:
+    """Synchronous variant of :func:`get_storage_config`."""
     return {
         "storage_type": getattr(settings, "FILE_STORAGE_TYPE", "local"),
         "local_path": getattr(settings, "LOCAL_UPLOADS_DIR", "./uploads"),
@@ -381,14 +829,19 @@ def get_file_storage(config: dict[str, Any]) -> FileStorage:
 # Simpler top-level functions
 # ----------------------------------------------------
 async def save_file_to_storage(
-    file_content: FileContent, filename: str, project_id: Optional[UUID] = None
+    file_content: FileContent,
+    filename: str,
+    project_id: Optional[UUID] = None,
+    file_hash: Optional[str] = None,
 ) -> str:
     """
     Convenience function to save a file using the global config.
     """
     config = await get_storage_config()
     storage = get_file_storage(config)
-    return await storage.save_file(file_content, filename, project_id=project_id)
+    return await storage.save_file(
+        file_content, filename, project_id=project_id, file_hash=file_hash
+    )
 
 
 async def get_file_from_storage(file_path: str) -> bytes:
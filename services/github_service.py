@@ -1,11 +1,22 @@
 import os
+import fcntl
+import hashlib
 import tempfile
+import threading
 import logging
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
 from git import Repo, GitCommandError
 
+from config import settings
+
 logger = logging.getLogger(__name__)
 
+# Serializes fetches into the same cached repository within this process;
+# an flock on "<cache>.lock" does the same across processes.
+_CACHE_LOCKS: dict[str, threading.Lock] = {}
+_CACHE_LOCKS_GUARD = threading.Lock()
+
 
 class GitHubService:
     """
@@ -16,14 +27,19 @@ class GitHubService:
     provided for authenticated operations.
     """
 
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, cache_dir: Optional[str] = None):
         """
         Initializes the GitHubService.
 
         Args:
             token: Optional personal access token for authenticating GitHub operations.
+            cache_dir: Directory holding the bare repository cache. Defaults to
+                ``settings.GITHUB_REPO_CACHE_DIR``.
         """
         self.token = token
+        self.cache_dir = cache_dir or getattr(
+            settings, "GITHUB_REPO_CACHE_DIR", "./storage/git_cache"
+        )
 
     def _get_repo_url(self, repo_url: str) -> str:
         """
@@ -40,37 +56,209 @@ class GitHubService:
             return repo_url.replace("https://", f"https://{self.token}@")
         return repo_url
 
-    def clone_repository(self, repo_url: str, branch: str = "main") -> str:
+    def _redact(self, message: str) -> str:
+        return message.replace(self.token, "****") if self.token else message
+
+    def _cache_path(self, repo_url: str) -> str:
+        """Returns the bare cache directory for *repo_url* (token-free key)."""
+        normalized = repo_url.strip().rstrip("/").removesuffix(".git").lower()
+        key = hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{key}.git")
+
+    @contextmanager
+    def _cache_lock(self, cache_path: str) -> Iterator[None]:
+        with _CACHE_LOCKS_GUARD:
+            lock = _CACHE_LOCKS.setdefault(cache_path, threading.Lock())
+        with lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(f"{cache_path}.lock", "w") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def update_cache(self, repo_url: str, branch: str = "main") -> str:
         """
-        Clones a GitHub repository branch into a temporary directory.
+        Fetches the tip of *branch* into the local bare repository cache.
+
+        The cache is created on first use and afterwards updated with a
+        shallow ``git fetch``, so only new objects cross the network. The
+        token is passed on the command line only and never stored in the
+        cached repository's config.
+
+        Args:
+            repo_url: The URL of the GitHub repository.
+            branch: The branch to fetch. Defaults to "main".
+
+        Returns:
+            The commit SHA of the fetched branch tip.
+
+        Raises:
+            GitCommandError: If the repository cannot be fetched.
+        """
+        cache_path = self._cache_path(repo_url)
+        with self._cache_lock(cache_path):
+            try:
+                if os.path.isdir(cache_path):
+                    repo = Repo(cache_path)
+                else:
+                    repo = Repo.init(cache_path, bare=True)
+                repo.git.fetch(
+                    self._get_repo_url(repo_url),
+                    f"+refs/heads/{branch}:refs/heads/{branch}",
+                    "--depth=1",
+                    "--no-tags",
+                )
+                return repo.commit(f"refs/heads/{branch}").hexsha
+            except GitCommandError as e:
+                logger.error("Failed to fetch repository: %s", self._redact(str(e)))
+                raise
+
+    def _cached_repo(self, repo_url: str, branch: str) -> Repo:
+        """Returns the cached bare repository, fetching it if it is missing."""
+        cache_path = self._cache_path(repo_url)
+        if not os.path.isdir(cache_path):
+            self.update_cache(repo_url, branch)
+        repo = Repo(cache_path)
+        try:
+            repo.commit(f"refs/heads/{branch}")
+        except (ValueError, GitCommandError):
+            # Branch not fetched into the cache yet
+            self.update_cache(repo_url, branch)
+        return repo
+
+    def clone_repository(
+        self,
+        repo_url: str,
+        branch: str = "main",
+        file_paths: Optional[List[str]] = None,
+        fetch: bool = True,
+    ) -> str:
+        """
+        Checks out a GitHub repository branch into a temporary directory.
+
+        The branch is first fetched (shallow, single branch) into the bare
+        repository cache and then cloned locally from it, sharing its
+        objects. When *file_paths* is given only those paths are checked
+        out (sparse checkout). The caller owns the returned directory and
+        should remove it when done.
 
         Args:
             repo_url: The URL of the GitHub repository to clone.
             branch: The branch to clone. Defaults to "main".
+            file_paths: Optional paths (relative to the repository root) to check out.
+            fetch: Whether to refresh the cache from the remote first.
 
         Returns:
-            The path to the temporary directory containing the cloned repository.
+            The path to the temporary directory containing the checkout.
 
         Raises:
             GitCommandError: If the repository cannot be cloned.
         """
+        if fetch:
+            self.update_cache(repo_url, branch)
+        else:
+            self._cached_repo(repo_url, branch)
+
+        temp_dir = tempfile.mkdtemp()
         try:
-            temp_dir = tempfile.mkdtemp()
-            repo_url_with_token = self._get_repo_url(repo_url)
-            Repo.clone_from(repo_url_with_token, temp_dir, branch=branch)
+            repo = Repo.clone_from(
+                self._cache_path(repo_url),
+                temp_dir,
+                branch=branch,
+                shared=True,
+                no_checkout=True,
+                single_branch=True,
+            )
+            if file_paths:
+                repo.git.sparse_checkout("set", "--no-cone", *file_paths)
+            repo.git.checkout(branch)
             return temp_dir
         except GitCommandError as e:
-            # Redact any token that may have leaked into the exception message
-            err_msg = str(e).replace(self.token or "", "****") if self.token else str(e)
-            logger.error("Failed to clone repository: %s", err_msg)
+            logger.error("Failed to clone repository: %s", self._redact(str(e)))
             raise
 
+    def list_files(self, repo_url: str, branch: str = "main") -> List[str]:
+        """
+        Lists the files of *branch* from the repository cache.
+
+        Served from the bare cache without a network round trip once the
+        repository has been fetched.
+
+        Args:
+            repo_url: The URL of the GitHub repository.
+            branch: The branch to list. Defaults to "main".
+
+        Returns:
+            File paths relative to the repository root.
+        """
+        repo = self._cached_repo(repo_url, branch)
+        output = repo.git.ls_tree("-r", "--name-only", f"refs/heads/{branch}")
+        return [line for line in output.splitlines() if line]
+
+    def diff_commits(
+        self, repo_url: str, old_commit: str, new_commit: str
+    ) -> Optional[List[Tuple[str, str]]]:
+        """
+        Lists the files changed between two commits in the repository cache.
+
+        Runs ``git diff --name-status --no-renames old..new``, so a rename is
+        reported as a deletion plus an addition.
+
+        Args:
+            repo_url: The URL of the GitHub repository.
+            old_commit: The previously synced commit SHA.
+            new_commit: The commit SHA to diff against.
+
+        Returns:
+            ``(status, path)`` pairs with status "A", "M" or "D" ("T" type
+            changes are reported as "M"), or None if *old_commit* is not in
+            the cache and a full comparison is needed.
+        """
+        repo = Repo(self._cache_path(repo_url))
+        try:
+            output = repo.git.diff(
+                "--name-status", "--no-renames", f"{old_commit}..{new_commit}"
+            )
+        except GitCommandError as e:
+            logger.warning("Cannot diff %s..%s: %s", old_commit, new_commit, e)
+            return None
+
+        changes = []
+        for line in output.splitlines():
+            status, _, path = line.partition("\t")
+            if not path:
+                continue
+            status = status[:1]
+            changes.append(("M" if status == "T" else status, path))
+        return changes
+
+    def pin_commit(self, repo_url: str, name: str, commit: Optional[str]) -> None:
+        """
+        Keeps *commit* reachable in the cache under ``refs/synced/<name>``.
+
+        Shallow fetches move the branch ref, so the last synced commit would
+        otherwise become unreachable and could be pruned before the next
+        incremental diff. Passing None removes the pin.
+        """
+        repo = Repo(self._cache_path(repo_url))
+        ref = f"refs/synced/{name}"
+        try:
+            if commit:
+                repo.git.update_ref(ref, commit)
+            else:
+                repo.git.update_ref("-d", ref)
+        except GitCommandError as e:
+            logger.warning("Failed to update %s: %s", ref, e)
+
     def fetch_files(self, repo_path: str, file_paths: List[str]) -> List[str]:
         """
         Returns the full paths of files that exist in the specified repository directory.
 
         Checks each provided file path within the given repository path and collects
         the full paths of files that are found. Logs a warning for any files that are missing.
+        An empty list returns every file in the checkout.
 
         Args:
             repo_path: Path to the local repository directory.
@@ -79,6 +267,14 @@ class GitHubService:
         Returns:
             A list of full file paths for files that exist in the repository directory.
         """
+        if not file_paths:
+            # Empty list -> every file in the checkout
+            fetched_files = []
+            for root, dirs, files in os.walk(repo_path):
+                dirs[:] = [d for d in dirs if d != ".git"]
+                fetched_files.extend(os.path.join(root, name) for name in files)
+            return sorted(fetched_files)
+
         fetched_files = []
         for file_path in file_paths:
             full_path = os.path.join(repo_path, file_path)
@@ -0,0 +1,609 @@
+"""
+ingestion_queue.py
+------------------
+Postgres-backed ingestion job queue.
+
+Uploads and knowledge-base operations enqueue :class:`IngestionJob` rows
+instead of scheduling FastAPI ``BackgroundTasks``.  A pool of worker
+coroutines, started with the application, claims jobs with
+``SELECT ... FOR UPDATE SKIP LOCKED`` and runs each one in its own database
+session.  Compared to request-scoped background tasks this gives:
+
+- durability: pending jobs survive restarts, and jobs left ``running`` by a
+  crashed worker are reclaimed once their lease expires
+- retries with exponential backoff up to ``max_attempts``
+- a per-project cap on concurrently running jobs
+- progress reporting in ``ProjectFile.config["search_processing"]``
+"""
+
+import asyncio
+import logging
+import os
+import random
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from uuid import UUID
+
+from sqlalchemy import String, and_, cast, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from db import get_async_session_context
+from models.ingestion_job import IngestionJob
+from models.project_file import ProjectFile
+
+logger = logging.getLogger(__name__)
+
+JOB_TYPE_FILE = "file"
+JOB_TYPE_FILES = "files"
+JOB_TYPE_PROJECT = "project"
+
+# Wakes idle workers as soon as a job is enqueued in this process
+_job_available = asyncio.Event()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------
+# Progress reporting
+# ---------------------------------------------------------------------
+async def record_file_progress(
+    session: AsyncSession, file_id: UUID, **fields: Any
+) -> None:
+    """Merge *fields* into ``ProjectFile.config["search_processing"]`` and commit."""
+    file_record = await session.get(ProjectFile, file_id)
+    if not file_record:
+        return
+    config = dict(file_record.config or {})
+    search_proc = dict(config.get("search_processing") or {})
+    search_proc.update(fields)
+    config["search_processing"] = search_proc
+    # Assign a new dict so SQLAlchemy detects the JSONB change
+    file_record.config = config
+    await session.commit()
+
+
+async def record_files_progress(
+    session: AsyncSession, file_ids: List[UUID], **fields: Any
+) -> None:
+    """Batch variant of :func:`record_file_progress` (single commit)."""
+    result = await session.execute(
+        select(ProjectFile).where(ProjectFile.id.in_(file_ids))
+    )
+    for file_record in result.scalars():
+        config = dict(file_record.config or {})
+        search_proc = dict(config.get("search_processing") or {})
+        search_proc.update(fields)
+        config["search_processing"] = search_proc
+        file_record.config = config
+    await session.commit()
+
+
+# ---------------------------------------------------------------------
+# Enqueueing
+# ---------------------------------------------------------------------
+async def _enqueue(session: AsyncSession, job: IngestionJob) -> IngestionJob:
+    session.add(job)
+    await session.commit()
+    await session.refresh(job)
+    _job_available.set()
+    logger.info(
+        "Enqueued ingestion job %s",
+        job.id,
+        extra={
+            "job_id": str(job.id),
+            "job_type": job.job_type,
+            "project_id": str(job.project_id),
+        },
+    )
+    return job
+
+
+async def enqueue_file_ingestion(
+    session: AsyncSession,
+    *,
+    project_id: UUID,
+    file_id: UUID,
+    knowledge_base_id: UUID,
+) -> IngestionJob:
+    """Queue a single project file for knowledge-base indexing."""
+    existing = await session.execute(
+        select(IngestionJob).where(
+            IngestionJob.file_id == file_id,
+            IngestionJob.status == "pending",
+        )
+    )
+    job = existing.scalars().first()
+    if job:
+        return job
+
+    job = await _enqueue(
+        session,
+        IngestionJob(
+            job_type=JOB_TYPE_FILE,
+            project_id=project_id,
+            file_id=file_id,
+            knowledge_base_id=knowledge_base_id,
+            max_attempts=getattr(settings, "INGEST_MAX_ATTEMPTS", 5),
+        ),
+    )
+    await record_file_progress(
+        session,
+        file_id,
+        status="queued",
+        job_id=str(job.id),
+        queued_at=_now().isoformat(),
+    )
+    return job
+
+
+async def enqueue_files_ingestion(
+    session: AsyncSession,
+    *,
+    project_id: UUID,
+    file_ids: List[UUID],
+    knowledge_base_id: UUID,
+) -> IngestionJob:
+    """
+    Queue several files of one project as a single job.
+
+    The worker runs them through the staged project pipeline together;
+    files that fail are re-enqueued individually.
+    """
+    job = await _enqueue(
+        session,
+        IngestionJob(
+            job_type=JOB_TYPE_FILES,
+            project_id=project_id,
+            knowledge_base_id=knowledge_base_id,
+            payload={"file_ids": [str(file_id) for file_id in file_ids]},
+            max_attempts=getattr(settings, "INGEST_MAX_ATTEMPTS", 5),
+        ),
+    )
+    await record_files_progress(
+        session,
+        file_ids,
+        status="queued",
+        job_id=str(job.id),
+        queued_at=_now().isoformat(),
+    )
+    return job
+
+
+async def enqueue_project_ingestion(
+    session: AsyncSession, *, project_id: UUID
+) -> IngestionJob:
+    """Queue (re)indexing of every file in a project."""
+    existing = await session.execute(
+        select(IngestionJob).where(
+            IngestionJob.project_id == project_id,
+            IngestionJob.job_type == JOB_TYPE_PROJECT,
+            IngestionJob.status == "pending",
+        )
+    )
+    job = existing.scalars().first()
+    if job:
+        return job
+
+    return await _enqueue(
+        session,
+        IngestionJob(
+            job_type=JOB_TYPE_PROJECT,
+            project_id=project_id,
+            max_attempts=getattr(settings, "INGEST_MAX_ATTEMPTS", 5),
+        ),
+    )
+
+
+# ---------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------
+class IngestionWorkerPool:
+    """Worker coroutines that drain the ``ingestion_jobs`` table."""
+
+    def __init__(
+        self,
+        worker_count: int,
+        project_concurrency: int,
+        poll_interval: float,
+        lease_seconds: int,
+        retry_base_seconds: float,
+        retry_max_seconds: float,
+    ):
+        self.worker_count = worker_count
+        self.project_concurrency = max(1, project_concurrency)
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._host_id = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping.clear()
+        for index in range(self.worker_count):
+            self._tasks.append(
+                asyncio.create_task(
+                    self._worker_loop(f"{self._host_id}:{index}"),
+                    name=f"ingestion-worker-{index}",
+                )
+            )
+        logger.info("Started %d ingestion workers", self.worker_count)
+
+    async def stop(self) -> None:
+        """Stop all workers; in-flight jobs are reclaimed after their lease."""
+        if not self._tasks:
+            return
+        self._stopping.set()
+        _job_available.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("Stopped ingestion workers")
+
+    async def _worker_loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = await self._claim_job(worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to claim ingestion job: {e}", exc_info=True)
+                job = None
+
+            if job is None:
+                _job_available.clear()
+                try:
+                    await asyncio.wait_for(
+                        _job_available.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run_job(job)
+
+    async def _claim_job(self, worker_id: str) -> Optional[IngestionJob]:
+        """Lock and mark the next runnable job as running."""
+        now = _now()
+        stale_before = now - timedelta(seconds=self.lease_seconds)
+
+        async with get_async_session_context() as session:
+            await self._fail_abandoned_jobs(session, stale_before)
+
+            # Projects already at their cap of live (non-stale) running jobs
+            busy_projects = (
+                select(IngestionJob.project_id)
+                .where(
+                    IngestionJob.status == "running",
+                    IngestionJob.locked_at >= stale_before,
+                )
+                .group_by(IngestionJob.project_id)
+                .having(func.count() >= self.project_concurrency)
+            )
+            skipped: List[UUID] = []
+            for _ in range(self.worker_count + 1):
+                stmt = (
+                    select(IngestionJob)
+                    .where(
+                        or_(
+                            and_(
+                                IngestionJob.status == "pending",
+                                IngestionJob.run_after <= now,
+                            ),
+                            # Lease expired: the worker holding it has died
+                            and_(
+                                IngestionJob.status == "running",
+                                IngestionJob.locked_at < stale_before,
+                                IngestionJob.attempts < IngestionJob.max_attempts,
+                            ),
+                        ),
+                        IngestionJob.project_id.not_in(busy_projects),
+                    )
+                    .order_by(IngestionJob.run_after)
+                    .limit(1)
+                    .with_for_update(skip_locked=True)
+                )
+                if skipped:
+                    stmt = stmt.where(IngestionJob.project_id.not_in(skipped))
+                job = (await session.execute(stmt)).scalars().first()
+                if job is None:
+                    await session.rollback()
+                    return None
+
+                # Workers holding different jobs of one project both pass the
+                # filter above; serialize claims per project and re-check the
+                # cap under the lock (released on commit/rollback).
+                await session.execute(
+                    select(
+                        func.pg_advisory_xact_lock(
+                            func.hashtext(cast(job.project_id, String))
+                        )
+                    )
+                )
+                running = await session.scalar(
+                    select(func.count())
+                    .select_from(IngestionJob)
+                    .where(
+                        IngestionJob.project_id == job.project_id,
+                        IngestionJob.status == "running",
+                        IngestionJob.locked_at >= stale_before,
+                        IngestionJob.id != job.id,
+                    )
+                )
+                if running >= self.project_concurrency:
+                    await session.rollback()
+                    skipped.append(job.project_id)
+                    continue
+
+                job.status = "running"
+                job.locked_at = now
+                job.worker_id = worker_id
+                job.attempts = job.attempts + 1
+                await session.commit()
+                return job
+
+            await session.rollback()
+            return None
+
+    async def _fail_abandoned_jobs(
+        self, session: AsyncSession, stale_before: datetime
+    ) -> None:
+        """Fail expired-lease jobs that have no attempts left."""
+        result = await session.execute(
+            update(IngestionJob)
+            .where(
+                IngestionJob.status == "running",
+                IngestionJob.locked_at < stale_before,
+                IngestionJob.attempts >= IngestionJob.max_attempts,
+            )
+            .values(
+                status="failed",
+                locked_at=None,
+                last_error="Worker lease expired on the final attempt",
+            )
+            .returning(IngestionJob.id, IngestionJob.file_id, IngestionJob.payload)
+        )
+        abandoned = result.all()
+        await session.commit()
+        for job_id, file_id, payload in abandoned:
+            logger.warning(
+                "Ingestion job %s abandoned after its final attempt",
+                job_id,
+                extra={"job_id": str(job_id)},
+            )
+            file_ids = _job_file_ids(file_id, payload)
+            if file_ids:
+                await record_files_progress(
+                    session,
+                    file_ids,
+                    status="error",
+                    success=False,
+                    error="Processing did not complete",
+                    next_attempt_at=None,
+                )
+
+    async def _heartbeat(self, job_id: UUID) -> None:
+        """Extend the job lease while it is running."""
+        interval = max(1.0, self.lease_seconds / 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with get_async_session_context() as session:
+                    await session.execute(
+                        update(IngestionJob)
+                        .where(IngestionJob.id == job_id)
+                        .values(locked_at=_now())
+                    )
+                    await session.commit()
+            except Exception as e:
+                logger.warning(f"Ingestion job {job_id} heartbeat failed: {e}")
+
+    async def _run_job(self, job: IngestionJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            if job.job_type == JOB_TYPE_FILE:
+                await self._run_file_job(job)
+            elif job.job_type in (JOB_TYPE_PROJECT, JOB_TYPE_FILES):
+                await self._run_project_job(job)
+            else:
+                raise ValueError(f"Unknown ingestion job type: {job.job_type}")
+        except asyncio.CancelledError:
+            # Shutdown: leave the job running so its lease expires and it is retried
+            raise
+        except Exception as e:
+            await self._fail_job(job, e)
+        else:
+            await self._finish_job(job, "succeeded")
+        finally:
+            heartbeat.cancel()
+
+    async def _run_file_job(self, job: IngestionJob) -> None:
+        # Delayed import to avoid circular dependency
+        from services.knowledgebase_service import process_single_file_for_search
+
+        async with get_async_session_context() as session:
+            await record_file_progress(
+                session,
+                job.file_id,
+                status="processing",
+                job_id=str(job.id),
+                attempts=job.attempts,
+                attempted_at=_now().isoformat(),
+            )
+            result = await process_single_file_for_search(
+                file_id=job.file_id,
+                project_id=job.project_id,
+                knowledge_base_id=job.knowledge_base_id,
+                db=session,
+            )
+        if result is not None and not result.get("success"):
+            raise RuntimeError(result.get("error") or "File processing failed")
+
+    async def _run_project_job(self, job: IngestionJob) -> None:
+        # Delayed import to avoid circular dependency
+        from services.vector_db import process_files_for_project
+
+        file_ids = None
+        if job.job_type == JOB_TYPE_FILES:
+            file_ids = [UUID(file_id) for file_id in (job.payload or {}).get("file_ids", [])]
+            if not file_ids:
+                return
+            async with get_async_session_context() as session:
+                await record_files_progress(
+                    session,
+                    file_ids,
+                    status="processing",
+                    job_id=str(job.id),
+                    attempts=job.attempts,
+                    attempted_at=_now().isoformat(),
+                )
+        result = await process_files_for_project(
+            project_id=job.project_id, file_ids=file_ids
+        )
+
+        async with get_async_session_context() as session:
+            knowledge_base_id = None
+            for detail in result.get("details", []):
+                file_id = UUID(detail["file_id"])
+                if detail.get("success"):
+                    await record_file_progress(
+                        session,
+                        file_id,
+                        status="success",
+                        success=True,
+                        chunk_count=detail.get("chunk_count", 0),
+                        error=None,
+                        attempted_at=_now().isoformat(),
+                        processed_at=_now().isoformat(),
+                    )
+                    continue
+
+                # Retry failed files individually rather than the whole project
+                if knowledge_base_id is None:
+                    knowledge_base_id = job.knowledge_base_id or (
+                        await _project_knowledge_base_id(session, job.project_id)
+                    )
+                if knowledge_base_id is None:
+                    raise RuntimeError("Project has no knowledge base")
+                await record_file_progress(
+                    session,
+                    file_id,
+                    status="error",
+                    success=False,
+                    error=detail.get("error"),
+                    attempted_at=_now().isoformat(),
+                )
+                await enqueue_file_ingestion(
+                    session,
+                    project_id=job.project_id,
+                    file_id=file_id,
+                    knowledge_base_id=knowledge_base_id,
+                )
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(
+            self.retry_max_seconds, self.retry_base_seconds * (2 ** max(0, attempts - 1))
+        )
+        # Jitter spreads out retries of jobs that failed together
+        return delay * random.uniform(0.5, 1.0)
+
+    async def _finish_job(self, job: IngestionJob, status: str) -> None:
+        async with get_async_session_context() as session:
+            await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job.id)
+                .values(status=status, locked_at=None, last_error=None)
+            )
+            await session.commit()
+
+    async def _fail_job(self, job: IngestionJob, error: Exception) -> None:
+        exhausted = job.attempts >= job.max_attempts
+        next_run = _now() + timedelta(seconds=self._retry_delay(job.attempts))
+        logger.warning(
+            "Ingestion job %s failed (attempt %d/%d): %s",
+            job.id,
+            job.attempts,
+            job.max_attempts,
+            error,
+            extra={"job_id": str(job.id), "project_id": str(job.project_id)},
+        )
+
+        async with get_async_session_context() as session:
+            await session.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job.id)
+                .values(
+                    status="failed" if exhausted else "pending",
+                    run_after=job.run_after if exhausted else next_run,
+                    locked_at=None,
+                    last_error=str(error)[:2000],
+                )
+            )
+            await session.commit()
+
+            file_ids = _job_file_ids(job.file_id, job.payload)
+            if file_ids:
+                await record_files_progress(
+                    session,
+                    file_ids,
+                    status="error" if exhausted else "retrying",
+                    success=False,
+                    error=str(error),
+                    attempts=job.attempts,
+                    next_attempt_at=None if exhausted else next_run.isoformat(),
+                )
+
+
+def _job_file_ids(file_id: Optional[UUID], payload: Optional[dict]) -> List[UUID]:
+    """Files whose progress a job reports: its file or its payload's file_ids."""
+    if file_id:
+        return [file_id]
+    return [UUID(str(f)) for f in (payload or {}).get("file_ids", [])]
+
+
+async def _project_knowledge_base_id(
+    session: AsyncSession, project_id: UUID
+) -> Optional[UUID]:
+    # Delayed import to avoid circular dependency
+    from models.knowledge_base import KnowledgeBase
+
+    result = await session.execute(
+        select(KnowledgeBase.id).where(KnowledgeBase.project_id == project_id)
+    )
+    return result.scalar_one_or_none()
+
+
+_worker_pool: Optional[IngestionWorkerPool] = None
+
+
+def start_ingestion_workers() -> None:
+    """Start the process-wide ingestion worker pool (no-op if INGEST_WORKERS=0)."""
+    global _worker_pool
+    worker_count = getattr(settings, "INGEST_WORKERS", 2)
+    if worker_count <= 0 or _worker_pool is not None:
+        return
+    _worker_pool = IngestionWorkerPool(
+        worker_count=worker_count,
+        project_concurrency=getattr(settings, "INGEST_PROJECT_CONCURRENCY", 1),
+        poll_interval=getattr(settings, "INGEST_POLL_INTERVAL_SECONDS", 5.0),
+        lease_seconds=getattr(settings, "INGEST_JOB_LEASE_SECONDS", 600),
+        retry_base_seconds=getattr(settings, "INGEST_RETRY_BASE_SECONDS", 10.0),
+        retry_max_seconds=getattr(settings, "INGEST_RETRY_MAX_SECONDS", 900.0),
+    )
+    _worker_pool.start()
+
+
+async def stop_ingestion_workers() -> None:
+    """Stop the ingestion worker pool started by :func:`start_ingestion_workers`."""
+    global _worker_pool
+    if _worker_pool is not None:
+        await _worker_pool.stop()
+        _worker_pool = None
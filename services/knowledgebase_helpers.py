@@ -19,7 +19,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import config
 from services.vector_db import VectorDB, get_vector_db
-from services.file_storage import get_file_storage
+from services.file_storage import get_file_storage, storage_config_from_settings
 from models.project import Project
 from models.project_file import ProjectFile
 from models.knowledge_base import KnowledgeBase
@@ -72,28 +72,40 @@ class StorageManager:
         Returns:
             Initialized file storage adapter
         """
-        return get_file_storage(
-            {
-                "storage_type": getattr(config, "FILE_STORAGE_TYPE", "local"),
-                "local_path": getattr(config, "LOCAL_UPLOADS_DIR", "./uploads"),
-            }
-        )
+        # Cloud clients are pooled per configuration inside file_storage,
+        # so constructing the adapter per call is cheap.
+        return get_file_storage(storage_config_from_settings())
 
     @staticmethod
-    async def save_file(contents: bytes, path: str, project_id: UUID) -> str:
+    async def save_file(
+        contents: Any,
+        path: str,
+        project_id: Optional[UUID],
+        file_hash: Optional[str] = None,
+        content_addressed: bool = False,
+    ) -> str:
         """
         Save file contents to storage.
 
         Args:
-            contents: File bytes
+            contents: File bytes or a seekable binary file object (streamed)
             path: Relative storage path
             project_id: Associated project ID
+            file_hash: Precomputed SHA-256 of the contents, if known
+            content_addressed: Store under *path* verbatim (a key derived
+                from the content hash) so identical uploads share one blob
 
         Returns:
             Full storage path
         """
         storage = StorageManager.get()
-        return await storage.save_file(contents, path, project_id=project_id)
+        return await storage.save_file(
+            contents,
+            path,
+            project_id=project_id,
+            file_hash=file_hash,
+            content_addressed=content_addressed,
+        )
 
     @staticmethod
     async def delete_file(path: str) -> bool:
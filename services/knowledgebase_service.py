@@ -16,6 +16,7 @@ Key Improvements:
 """
 
 import os
+import asyncio
 import logging
 from datetime import datetime
 from typing import Any, Optional, Tuple, List
@@ -39,11 +40,11 @@ from services.project_service import (
 from fastapi import (
     HTTPException,
     UploadFile,
-    BackgroundTasks,
 )  # pylint: disable=no-name-in-module,import-error
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 from functools import wraps
+from config import settings
 from db import get_async_session_context
 
 from sqlalchemy import select
@@ -58,10 +59,14 @@ from models.user import User
 from services.vector_db import VectorDB, process_file_for_search
 from services.github_service import GitHubService
 from utils.db_utils import get_by_id, save_model
+from utils.file_validation import FileValidator
 from utils.serializers import serialize_vector_result
 
 logger = logging.getLogger(__name__)
 
+# ProjectFile.config["source"] of files created by repository sync
+GITHUB_SYNC_SOURCE = "github_sync"
+
 
 # ---------------------------------------------------------------------
 # Error Handling Decorator
@@ -235,8 +240,6 @@ async def upload_file_to_project(
     file: UploadFile,
     db: AsyncSession,
     user_id: Optional[int] = None,
-    *,
-    background_tasks: Optional[BackgroundTasks] = None,
 ) -> dict[str, Any]:
     # ── Unified validation (still enforces permission rules) ───────────
     await _validate_user_and_project(project_id, user_id, db)
@@ -251,7 +254,6 @@ async def upload_file_to_project(
         file=file,
         user_id=user_id,  # FileService already validates this
         index_kb=True,  # KB uploads must always be indexed
-        background_tasks=background_tasks,
     )
 
 
@@ -260,46 +262,55 @@ async def process_single_file_for_search(
     project_id: UUID,
     knowledge_base_id: UUID,
     db: Optional[AsyncSession] = None,
-) -> None:
-    """Process a file for search in background"""
+) -> Optional[dict[str, Any]]:
+    """
+    Process a file for search (run by the ingestion queue workers).
+
+    Returns the ``process_file_for_search`` result, or None when the file no
+    longer exists.
+    """
 
-    async def _process_core(session: AsyncSession) -> None:
+    async def _process_core(session: AsyncSession) -> Optional[dict[str, Any]]:
         file_record = await get_by_id(session, ProjectFile, file_id)
         if not file_record:
             logger.error(f"File {file_id} not found")
-            return
-
-        storage = StorageManager.get()
-        content = await storage.get_file(file_record.file_path)
+            return None
 
         vector_db = await VectorDBManager.get_for_project(
             project_id=project_id, db=session
         )
 
+        # Content is only downloaded on an extraction cache miss
         result = await process_file_for_search(
             project_file=file_record,
             vector_db=vector_db,
-            file_content=content,
             knowledge_base_id=UUID(str(knowledge_base_id)),
+            storage=StorageManager.get(),
         )
 
         # Update processing status
-        search_proc = {
-            "status": "success" if result.get("success") else "error",
-            "chunk_count": result.get("chunk_count", 0),
-            "error": result.get("error"),
-            "processed_at": datetime.now().isoformat(),
-        }
-        file_config = file_record.config or {}
+        file_config = dict(file_record.config or {})
+        search_proc = dict(file_config.get("search_processing") or {})
+        search_proc.update(
+            {
+                "status": "success" if result.get("success") else "error",
+                "success": bool(result.get("success")),
+                "chunk_count": result.get("chunk_count", 0),
+                "error": result.get("error"),
+                "attempted_at": search_proc.get("attempted_at")
+                or datetime.now().isoformat(),
+                "processed_at": datetime.now().isoformat(),
+            }
+        )
         file_config["search_processing"] = search_proc
         file_record.config = file_config
         await save_model(session, file_record)
+        return result
 
     if db is not None:
-        await _process_core(db)
-    else:
-        async with get_async_session_context() as session:
-            await _process_core(session)
+        return await _process_core(db)
+    async with get_async_session_context() as session:
+        return await _process_core(session)
 
 
 @handle_service_errors("File deletion failed")
@@ -388,61 +399,49 @@ async def attach_github_repository(
     file_paths: Optional[List[str]] = None,
     user_id: Optional[int] = None,
 ) -> dict[str, Any]:
+    """
+    Attaches a GitHub repository and uploads its files (all supported files,
+    or those under *file_paths*). Re-attaching the same repository and
+    branch only syncs the changes since the last synced commit.
+    """
     project, kb = await _validate_project_and_kb(project_id, user_id, db)
     user = await get_by_id(db, User, user_id) if user_id else None
     github_service = GitHubService(token=user.github_token if user else None)
 
-    # ------------------------------------------------------------------
-    # Clone & fetch files in thread-pool to avoid blocking the event loop
-    # ------------------------------------------------------------------
-    import asyncio
-
-    loop = asyncio.get_running_loop()
-
-    repo_path = await loop.run_in_executor(
-        None, github_service.clone_repository, repo_url, branch
-    )
-
-    file_paths = file_paths or []
-
-    fetched_files = await loop.run_in_executor(
-        None, github_service.fetch_files, repo_path, file_paths
-    )
-
-    # Reading and uploading each file sequentially – still avoid blocking
-    async def _upload_single(path: str):
-        # Run blocking open() in thread to avoid blocking loop on large files
-        import builtins
-
-        def _open_file(path_: str):
-            return builtins.open(path_, "rb")
-
-        fp = await loop.run_in_executor(None, _open_file, path)
-        try:
-            await upload_file_to_project(
-                project_id=project_id,
-                file=UploadFile(filename=os.path.basename(path), file=fp),
-                db=db,
-                user_id=user_id,
-            )
-        finally:
-            fp.close()
-
-    for file_path in fetched_files:
-        await _upload_single(file_path)
-
     kb.repo_url = repo_url
     kb.branch = branch
-    kb.file_paths = file_paths
+    kb.file_paths = file_paths or []
     await save_model(db, kb)
 
+    result = await _sync_repository(project, kb, github_service, db, user_id)
     return {
-        "repo_url": repo_url,
-        "branch": branch,
-        "files_processed": len(fetched_files),
+        **result,
+        "files_processed": result["files_added"] + result["files_updated"],
     }
 
 
+@handle_service_errors("Error syncing GitHub repository")
+async def sync_github_repository(
+    project_id: UUID,
+    db: AsyncSession,
+    user_id: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Brings the project's files up to date with the attached repository.
+
+    Only files added, modified or deleted since the last synced commit are
+    uploaded, re-indexed or removed.
+    """
+    project, kb = await _validate_project_and_kb(project_id, user_id, db)
+    if not kb.repo_url:
+        raise HTTPException(
+            status_code=400, detail="No GitHub repository is attached"
+        )
+    user = await get_by_id(db, User, user_id) if user_id else None
+    github_service = GitHubService(token=user.github_token if user else None)
+    return await _sync_repository(project, kb, github_service, db, user_id)
+
+
 @handle_service_errors("Error detaching GitHub repository")
 async def detach_github_repository(
     project_id: UUID,
@@ -451,33 +450,257 @@ async def detach_github_repository(
     user_id: Optional[int] = None,
 ) -> dict[str, Any]:
     """
-    Detaches a GitHub repository from a project's knowledge base.
+    Detaches a GitHub repository from a project's knowledge base and removes
+    the project files synced from it. Works entirely from the stored sync
+    state – no clone or network access.
     """
     project, kb = await _validate_project_and_kb(project_id, user_id, db)
     github_service = GitHubService(token=project.user.github_token)
 
-    import asyncio
-    loop = asyncio.get_running_loop()
-
-    repo_path = await loop.run_in_executor(
-        None, github_service.clone_repository, repo_url, "main"
-    )
-
-    # Fetch all files (empty list -> all) and then remove – both blocking
-    file_paths = await loop.run_in_executor(None, github_service.fetch_files, repo_path, [])
-    await loop.run_in_executor(None, github_service.remove_files, repo_path, file_paths)
+    state = (kb.config or {}).get("github_sync") or {}
+    file_ids = set((state.get("files") or {}).values())
+    removed = await _remove_synced_files(project, file_ids, db)
 
+    config = dict(kb.config or {})
+    config.pop("github_sync", None)
+    kb.config = config
     kb.repo_url = None
     kb.branch = None
     kb.file_paths = None
     await save_model(db, kb)
 
+    if state.get("commit"):
+        await asyncio.get_running_loop().run_in_executor(
+            None, github_service.pin_commit, repo_url, str(kb.id), None
+        )
+
+    return {
+        "repo_url": repo_url,
+        "files_removed": removed,
+    }
+
+
+def _repo_path_in_scope(path: str, file_paths: Optional[List[str]]) -> bool:
+    """Whether *path* is selected by the KB's file_paths (files or directories)."""
+    if not FileValidator.validate_extension(path):
+        return False
+    if not file_paths:
+        return True
+    return any(
+        path == selected or path.startswith(selected.rstrip("/") + "/")
+        for selected in file_paths
+    )
+
+
+async def _sync_repository(
+    project: Project,
+    kb: KnowledgeBase,
+    github_service: GitHubService,
+    db: AsyncSession,
+    user_id: Optional[int],
+) -> dict[str, Any]:
+    """
+    Sync project files with the repository branch tip.
+
+    ``kb.config["github_sync"]`` records the last synced commit and the
+    project file id of every synced path. The cache is fetched, then
+    ``git diff --name-status`` against that commit yields the changed set;
+    added/modified files are checked out sparsely and uploaded through
+    ``FileService.upload_batch`` (concurrent storage, one indexing job per
+    batch) and deleted or superseded files are removed. Without a usable
+    previous commit the whole tree is compared instead – content-hash
+    dedup keeps unchanged files from being stored or indexed again.
+    """
+    import shutil
+
+    from services.file_service import FileService
+
+    loop = asyncio.get_running_loop()
+    repo_url = kb.repo_url
+    branch = kb.branch or "main"
+
+    state = dict((kb.config or {}).get("github_sync") or {})
+    # Files synced from a previous repository/branch: removed after this
+    # sync unless identical content was reused for the new one
+    previous_files: set[str] = set()
+    if state.get("repo_url") != repo_url or state.get("branch") != branch:
+        previous_files = set((state.get("files") or {}).values())
+        state = {}
+    tracked: dict[str, str] = dict(state.get("files") or {})
+    old_commit = state.get("commit")
+    scope_changed = bool(state) and state.get("file_paths") != (kb.file_paths or [])
+
+    new_commit = await loop.run_in_executor(
+        None, github_service.update_cache, repo_url, branch
+    )
+
+    changes = None
+    if scope_changed:
+        pass  # Selected paths changed: compare the whole tree
+    elif old_commit and old_commit != new_commit:
+        changes = await loop.run_in_executor(
+            None, github_service.diff_commits, repo_url, old_commit, new_commit
+        )
+    elif old_commit == new_commit:
+        changes = []
+    full_sync = changes is None
+
+    if full_sync:
+        current = await loop.run_in_executor(
+            None, github_service.list_files, repo_url, branch
+        )
+        current_set = set(current)
+        changes = [("M" if path in tracked else "A", path) for path in current]
+        changes += [
+            ("D", path)
+            for path in tracked
+            if path not in current_set or not _repo_path_in_scope(path, kb.file_paths)
+        ]
+
+    removed_paths = {
+        path for status, path in changes if status == "D" and path in tracked
+    }
+    upserts = [
+        path
+        for path in dict.fromkeys(
+            list(state.get("retry") or [])
+            + [path for status, path in changes if status in ("A", "M")]
+        )
+        if path not in removed_paths and _repo_path_in_scope(path, kb.file_paths)
+    ]
+
+    superseded: set[str] = set(previous_files)
+    for path in removed_paths:
+        superseded.add(tracked.pop(path))
+
+    added = updated = 0
+    errors: List[dict[str, Any]] = []
+    if upserts:
+        # Sparse checkout of the changed set; very large sets (initial
+        # attach of a big repository) check out the whole tree instead
+        sparse_paths = upserts if len(upserts) <= 500 else kb.file_paths
+        repo_path = await loop.run_in_executor(
+            None,
+            github_service.clone_repository,
+            repo_url,
+            branch,
+            sparse_paths,
+            False,
+        )
+        try:
+            fs = FileService(db)
+            batch_size = max(1, getattr(settings, "UPLOAD_BATCH_MAX_FILES", 20))
+            present = [
+                path
+                for path in upserts
+                if os.path.isfile(os.path.join(repo_path, path))
+            ]
+            for start in range(0, len(present), batch_size):
+                batch = present[start : start + batch_size]
+                handles = []
+                try:
+                    for path in batch:
+                        handles.append(
+                            await loop.run_in_executor(
+                                None, open, os.path.join(repo_path, path), "rb"
+                            )
+                        )
+                    result = await fs.upload_batch(
+                        project.id,
+                        [
+                            UploadFile(filename=os.path.basename(path), file=fh)
+                            for path, fh in zip(batch, handles)
+                        ],
+                        user_id,
+                        index_kb=True,
+                        source=GITHUB_SYNC_SOURCE,
+                    )
+                finally:
+                    for fh in handles:
+                        fh.close()
+
+                for entry in result["files"]:
+                    path = batch[entry["index"]]
+                    previous = tracked.get(path)
+                    if previous is None:
+                        added += 1
+                    elif previous != entry["id"]:
+                        updated += 1
+                        superseded.add(previous)
+                    tracked[path] = entry["id"]
+                for error in result["errors"]:
+                    errors.append({**error, "path": batch[error["index"]]})
+        finally:
+            await loop.run_in_executor(None, shutil.rmtree, repo_path, True)
+
+    # Drop files no longer referenced by any synced path
+    removed = await _remove_synced_files(
+        project, superseded - set(tracked.values()), db
+    )
+
+    config = dict(kb.config or {})
+    config["github_sync"] = {
+        "repo_url": repo_url,
+        "branch": branch,
+        "commit": new_commit,
+        "file_paths": kb.file_paths or [],
+        "files": tracked,
+        "retry": [error["path"] for error in errors],
+        "synced_at": datetime.now().isoformat(),
+    }
+    kb.config = config
+    await save_model(db, kb)
+    await loop.run_in_executor(
+        None, github_service.pin_commit, repo_url, str(kb.id), new_commit
+    )
+
+    logger.info(
+        f"Synced {repo_url}@{branch} {old_commit or '-'}..{new_commit} for project "
+        f"{project.id}: {added} added, {updated} updated, {removed} removed"
+    )
     return {
         "repo_url": repo_url,
-        "files_removed": len(file_paths),
+        "branch": branch,
+        "commit": new_commit,
+        "previous_commit": old_commit,
+        "full_sync": full_sync,
+        "files_added": added,
+        "files_updated": updated,
+        "files_removed": removed,
+        "errors": errors,
     }
 
 
+async def _remove_synced_files(
+    project: Project, file_ids: set[str], db: AsyncSession
+) -> int:
+    """
+    Delete synced project files with their vectors; returns the count.
+
+    Only records created by repository sync (``config["source"]``) are
+    removed, so a file the user uploaded by hand is never deleted here.
+    """
+    from services.file_service import FileService
+
+    fs = FileService(db)
+    removed = 0
+    tokens_removed = 0
+    for file_id in file_ids:
+        file_record = await db.get(ProjectFile, UUID(file_id))
+        if not file_record or file_record.project_id != project.id:
+            continue  # Already deleted by the user
+        if (file_record.config or {}).get("source") != GITHUB_SYNC_SOURCE:
+            continue  # Not created by sync
+        tokens_removed += (file_record.config or {}).get("token_count", 0)
+        await fs.delete_file(project.id, file_record.id)
+        if project.knowledge_base:
+            await _delete_file_vectors(project.id, file_record.id, db)
+        removed += 1
+    if tokens_removed:
+        await TokenManager.update_usage(project, -tokens_removed, db)
+    return removed
+
+
 # ---------------------------------------------------------------------
 # Private Helper Functions
 # ---------------------------------------------------------------------
@@ -691,11 +914,11 @@ async def reindex_project_kb(
         )
         await vector_db.delete_by_filter({"project_id": str(project_id)})
 
-    # Delegate heavy lifting to existing batch helper – delayed import avoids heavy startup cost
-    from services.vector_db import process_files_for_project
+    # Indexing runs on the durable ingestion queue rather than in the request
+    from services.ingestion_queue import enqueue_project_ingestion
 
-    result = await process_files_for_project(project_id=project_id)
-    return result
+    job = await enqueue_project_ingestion(db, project_id=project_id)
+    return {"queued": True, "ingestion_job_id": str(job.id)}
 
 
 async def get_knowledge_base_health(
@@ -0,0 +1,339 @@
+"""
+structured_chunking.py
+----------------------
+Structure-aware chunking for source code and Markdown.
+
+The sentence-regex chunker in ``TextExtractor._create_chunks`` works for prose
+but splits functions and classes mid-body.  The chunkers here split along
+syntactic boundaries instead:
+
+- Python: top-level definitions from ``ast`` (classes are split per method
+  when they are too large for a single chunk)
+- JavaScript / CSS and other brace languages: top-level blocks found by a
+  lightweight tokenizer that tracks strings, comments and brace depth
+- Markdown: heading sections (fenced code blocks are never split on headings)
+
+Every chunk is returned with metadata describing the symbols it contains and
+its 1-based line range so search results can point back into the file.
+"""
+
+import ast
+import re
+import logging
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+from utils.tokens import count_tokens_batch, count_tokens_text
+
+logger = logging.getLogger(__name__)
+
+BRACE_LANGUAGE_EXTENSIONS = {"js", "jsx", "ts", "tsx", "css", "java", "c", "cpp", "go"}
+MARKDOWN_EXTENSIONS = {"md", "markdown"}
+
+_MD_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_MD_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_BRACE_SYMBOL_PATTERNS = [
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([\w$]+)"),
+    re.compile(r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([\w$]+)"),
+    re.compile(r"^\s*(?:export\s+)?(?:const|let|var)\s+([\w$]+)\s*="),
+    re.compile(r"^\s*func\s+(?:\([^)]*\)\s*)?(\w+)"),
+]
+
+
+@dataclass
+class Segment:
+    """A contiguous range of lines (1-based, inclusive) forming a logical unit."""
+
+    start: int
+    end: int
+    symbols: List[str] = field(default_factory=list)
+    section: Optional[str] = None
+
+
+def chunk_structured(
+    text: str, extension: str, chunk_size: int, chunk_overlap: int
+) -> Optional[Tuple[List[str], List[dict[str, Any]]]]:
+    """
+    Chunk *text* along structural boundaries for the given file *extension*.
+
+    Returns ``(chunks, chunk_metadata)`` or None when the extension has no
+    structure-aware chunker (or the source cannot be parsed), in which case the
+    caller should fall back to prose chunking.
+    """
+    ext = extension.lower().lstrip(".")
+    lines = text.splitlines()
+    if not lines:
+        return None
+
+    try:
+        if ext == "py":
+            segments = _python_segments(text, lines, chunk_size)
+        elif ext in MARKDOWN_EXTENSIONS:
+            segments = _markdown_segments(lines)
+        elif ext in BRACE_LANGUAGE_EXTENSIONS:
+            segments = _brace_segments(lines)
+        else:
+            return None
+    except SyntaxError as e:
+        logger.debug(f"Structured chunking unavailable, source did not parse: {e}")
+        return None
+
+    if not segments:
+        return None
+
+    return _pack_segments(segments, lines, chunk_size, chunk_overlap)
+
+
+# ---------------------------------------------------------------------
+# Segmenters
+# ---------------------------------------------------------------------
+def _python_segments(text: str, lines: List[str], chunk_size: int) -> List[Segment]:
+    tree = ast.parse(text)
+    return _python_body_segments(tree.body, lines, 1, len(lines), chunk_size, prefix="")
+
+
+def _python_body_segments(
+    body: List[ast.stmt],
+    lines: List[str],
+    first_line: int,
+    last_line: int,
+    chunk_size: int,
+    prefix: str,
+) -> List[Segment]:
+    """Split a statement list into definition segments and the code between them."""
+    segments: List[Segment] = []
+    cursor = first_line
+
+    for node in body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        # Decorators belong to the definition they wrap
+        start = min([node.lineno] + [d.lineno for d in node.decorator_list])
+        end = node.end_lineno or node.lineno
+        if start > cursor:
+            segments.append(Segment(cursor, start - 1))
+        name = f"{prefix}{node.name}"
+
+        if isinstance(node, ast.ClassDef) and _span_tokens(lines, start, end) > chunk_size:
+            # Oversized class: keep the header with its first members and
+            # split the remainder per method.
+            inner = _python_body_segments(
+                node.body, lines, start, end, chunk_size, prefix=f"{name}."
+            )
+            if inner:
+                inner[0].symbols.insert(0, name)
+            segments.extend(inner)
+        else:
+            segments.append(Segment(start, end, symbols=[name]))
+        cursor = end + 1
+
+    if cursor <= last_line:
+        segments.append(Segment(cursor, last_line))
+    return segments
+
+
+def _markdown_segments(lines: List[str]) -> List[Segment]:
+    segments: List[Segment] = []
+    heading_path: List[Tuple[int, str]] = []
+    start = 1
+    in_fence = False
+
+    for lineno, line in enumerate(lines, start=1):
+        if _MD_FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+        match = _MD_HEADING_RE.match(line)
+        if not match:
+            continue
+        if lineno > start:
+            segments.append(
+                Segment(start, lineno - 1, section=_heading_label(heading_path))
+            )
+        level, title = len(match.group(1)), match.group(2)
+        heading_path = [(lvl, t) for lvl, t in heading_path if lvl < level]
+        heading_path.append((level, title))
+        start = lineno
+
+    if start <= len(lines):
+        segments.append(Segment(start, len(lines), section=_heading_label(heading_path)))
+    return segments
+
+
+def _heading_label(heading_path: List[Tuple[int, str]]) -> Optional[str]:
+    return " > ".join(title for _, title in heading_path) or None
+
+
+def _brace_segments(lines: List[str]) -> List[Segment]:
+    """
+    Split C-like sources into top-level units.
+
+    A unit ends on a line where brace depth returns to zero after a ``}`` or a
+    top-level ``;``.  Strings, template literals and comments are skipped so
+    braces inside them do not affect depth.
+    """
+    segments: List[Segment] = []
+    depth = 0
+    in_block_comment = False
+    string_quote: Optional[str] = None
+    start = 1
+
+    for lineno, line in enumerate(lines, start=1):
+        closes_unit = False
+        i = 0
+        while i < len(line):
+            ch = line[i]
+            nxt = line[i + 1] if i + 1 < len(line) else ""
+            if in_block_comment:
+                if ch == "*" and nxt == "/":
+                    in_block_comment = False
+                    i += 1
+            elif string_quote:
+                if ch == "\\":
+                    i += 1
+                elif ch == string_quote:
+                    string_quote = None
+            elif ch == "/" and nxt == "/":
+                break
+            elif ch == "/" and nxt == "*":
+                in_block_comment = True
+                i += 1
+            elif ch in ("'", '"', "`"):
+                string_quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth = max(0, depth - 1)
+                closes_unit = depth == 0
+            elif ch == ";" and depth == 0:
+                closes_unit = True
+            i += 1
+        # Plain quotes do not span lines
+        if string_quote in ("'", '"'):
+            string_quote = None
+
+        if closes_unit and depth == 0 and not in_block_comment and not string_quote:
+            segments.append(Segment(start, lineno, symbols=_brace_symbols(lines, start, lineno)))
+            start = lineno + 1
+
+    if start <= len(lines):
+        segments.append(Segment(start, len(lines), symbols=_brace_symbols(lines, start, len(lines))))
+    return segments
+
+
+def _brace_symbols(lines: List[str], start: int, end: int) -> List[str]:
+    for line in lines[start - 1 : end]:
+        stripped = line.strip()
+        if not stripped or stripped.startswith(("//", "/*", "*", "import ")):
+            continue
+        for pattern in _BRACE_SYMBOL_PATTERNS:
+            match = pattern.match(line)
+            if match:
+                return [match.group(1)]
+        if "{" in stripped:
+            # CSS rule or anonymous block – use the selector/header text
+            return [stripped.split("{", 1)[0].strip()[:80] or "<block>"]
+        return []
+    return []
+
+
+# ---------------------------------------------------------------------
+# Packing
+# ---------------------------------------------------------------------
+def _span_text(lines: List[str], start: int, end: int) -> str:
+    return "\n".join(lines[start - 1 : end])
+
+
+def _span_tokens(lines: List[str], start: int, end: int) -> int:
+    return count_tokens_text(_span_text(lines, start, end))
+
+
+def _pack_segments(
+    segments: List[Segment], lines: List[str], chunk_size: int, chunk_overlap: int
+) -> Tuple[List[str], List[dict[str, Any]]]:
+    """
+    Merge adjacent small segments into chunks of up to *chunk_size* tokens.
+
+    Segments never straddle chunks unless a single segment is itself larger
+    than *chunk_size*; such segments are split on line boundaries with
+    *chunk_overlap* tokens of overlap.  Merging stops at Markdown section
+    changes so each chunk stays under a single heading path.
+    """
+    chunks: List[str] = []
+    chunk_metadata: List[dict[str, Any]] = []
+    pending: List[Segment] = []
+    pending_tokens = 0
+
+    def flush() -> None:
+        nonlocal pending, pending_tokens
+        if not pending:
+            return
+        start, end = pending[0].start, pending[-1].end
+        text = _span_text(lines, start, end)
+        if text.strip():
+            chunks.append(text)
+            chunk_metadata.append(_chunk_meta(start, end, pending))
+        pending = []
+        pending_tokens = 0
+
+    for segment in segments:
+        seg_tokens = _span_tokens(lines, segment.start, segment.end)
+        if seg_tokens > chunk_size:
+            flush()
+            for start, end in _split_lines(lines, segment.start, segment.end, chunk_size, chunk_overlap):
+                text = _span_text(lines, start, end)
+                if text.strip():
+                    chunks.append(text)
+                    chunk_metadata.append(_chunk_meta(start, end, [segment]))
+            continue
+
+        section_changed = bool(pending) and pending[-1].section != segment.section
+        if pending and (pending_tokens + seg_tokens > chunk_size or section_changed):
+            flush()
+        pending.append(segment)
+        pending_tokens += seg_tokens
+
+    flush()
+    return chunks, chunk_metadata
+
+
+def _chunk_meta(start: int, end: int, segments: List[Segment]) -> dict[str, Any]:
+    symbols: List[str] = []
+    for seg in segments:
+        for symbol in seg.symbols:
+            if symbol not in symbols:
+                symbols.append(symbol)
+    meta: dict[str, Any] = {"start_line": start, "end_line": end, "symbols": symbols}
+    if segments[0].section:
+        meta["section"] = segments[0].section
+    return meta
+
+
+def _split_lines(
+    lines: List[str], start: int, end: int, chunk_size: int, chunk_overlap: int
+) -> List[Tuple[int, int]]:
+    """Split an oversized line range into windows of at most *chunk_size* tokens."""
+    windows: List[Tuple[int, int]] = []
+    line_tokens = [count + 1 for count in count_tokens_batch(lines[start - 1:end])]
+
+    win_start = start
+    while win_start <= end:
+        total = 0
+        win_end = win_start
+        while win_end <= end and (total + line_tokens[win_end - start] <= chunk_size or win_end == win_start):
+            total += line_tokens[win_end - start]
+            win_end += 1
+        windows.append((win_start, win_end - 1))
+        if win_end > end:
+            break
+
+        # Step back far enough to carry chunk_overlap tokens into the next window
+        overlap_total = 0
+        next_start = win_end
+        while next_start - 1 > win_start and overlap_total + line_tokens[next_start - 1 - start] <= chunk_overlap:
+            next_start -= 1
+            overlap_total += line_tokens[next_start - start]
+        win_start = next_start
+
+    return windows
@@ -2,23 +2,30 @@
 text_extraction.py
 -----------------
 Service for extracting text content from various file formats.
-Supports plain text, PDF, DOC/DOCX, JSON, CSV, and code files.
+Supports plain text, PDF, DOC/DOCX, XLSX, PPTX, JSON, CSV, and code files.
 """
 
+import asyncio
 import json
 import csv
 import re
 import io
 import logging
+import zipfile
 from typing import Union, Any, Optional, BinaryIO, List, Tuple
 from utils.file_validation import FileValidator
 import mimetypes
 import chardet
-from utils.tokens import count_tokens_text
+from utils.tokens import count_tokens_batch, count_tokens_text
 from utils.io_utils import to_binary_io
+from services.structured_chunking import chunk_structured
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever extraction or chunking output changes so that cached
+# extraction results (see services/extraction_cache.py) are invalidated.
+EXTRACTOR_VERSION = "4"
+
 # Define conditional imports to avoid hard dependencies
 DOCX_AVAILABLE = False
 docx = None  # type: ignore
@@ -32,6 +39,30 @@ except ImportError:
         "Install with 'pip install python-docx' to enable .docx file support."
     )
 
+XLSX_AVAILABLE = False
+openpyxl = None  # type: ignore
+try:
+    import openpyxl  # type: ignore
+
+    XLSX_AVAILABLE = True
+except ImportError:
+    logger.warning(
+        "XLSX extraction unavailable: openpyxl package not installed. "
+        "Install with 'pip install openpyxl' to enable .xlsx file support."
+    )
+
+PPTX_AVAILABLE = False
+pptx = None  # type: ignore
+try:
+    import pptx  # type: ignore
+
+    PPTX_AVAILABLE = True
+except ImportError:
+    logger.warning(
+        "PPTX extraction unavailable: python-pptx package not installed. "
+        "Install with 'pip install python-pptx' to enable .pptx file support."
+    )
+
 PDF_AVAILABLE = False
 pypdf = None
 try:
@@ -117,36 +148,35 @@ class TextExtractor:
         sentences = re.split(r"(?<=[.!?])\s+", text)
 
         current_chunk = []
+        current_counts = []
         current_size = 0
 
-        for sentence in sentences:
-            # Use canonical token counting instead of hardcoded len(sentence) // 4
-            sentence_tokens = count_tokens_text(sentence)
-
+        # Count every sentence once, in one batch
+        for sentence, sentence_tokens in zip(sentences, count_tokens_batch(sentences)):
             if current_size + sentence_tokens > chunk_size and current_chunk:
                 # Save current chunk
                 chunks.append(" ".join(current_chunk))
 
                 # Keep overlap sentences
                 overlap_tokens = 0
-                overlap_sentences = []
+                overlap_start = len(current_chunk)
 
                 # Work backwards from the end to get overlap
-                for s in reversed(current_chunk):
-                    # Use canonical token counting for overlap calculation
-                    s_tokens = count_tokens_text(s)
+                for s_tokens in reversed(current_counts):
                     if overlap_tokens + s_tokens <= overlap:
-                        overlap_sentences.insert(0, s)
+                        overlap_start -= 1
                         overlap_tokens += s_tokens
                     else:
                         break
 
                 # Start new chunk with overlap
-                current_chunk = overlap_sentences
+                current_chunk = current_chunk[overlap_start:]
+                current_counts = current_counts[overlap_start:]
                 current_size = overlap_tokens
 
             # Add current sentence
             current_chunk.append(sentence)
+            current_counts.append(sentence_tokens)
             current_size += sentence_tokens
 
         # Add the last chunk if not empty
@@ -155,6 +185,50 @@ class TextExtractor:
 
         return chunks
 
+    def _chunk_sections(
+        self,
+        sections: List[Tuple[str, dict[str, Any]]],
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> Tuple[List[str], List[dict[str, Any]]]:
+        """Chunk each section separately, tagging chunks with section metadata."""
+        chunks: List[str] = []
+        chunk_metadata: List[dict[str, Any]] = []
+        for section_text, section_meta in sections:
+            for chunk in self._create_chunks(section_text, chunk_size, chunk_overlap):
+                chunks.append(chunk)
+                chunk_metadata.append(dict(section_meta))
+        return chunks, chunk_metadata
+
+    @staticmethod
+    def _detect_ooxml_type(file_obj: BinaryIO) -> dict[str, Any]:
+        """Identify a zipped Office Open XML file (DOCX, XLSX or PPTX)."""
+        try:
+            with zipfile.ZipFile(file_obj) as package:
+                names = package.namelist()
+        except zipfile.BadZipFile:
+            names = []
+        finally:
+            file_obj.seek(0)
+
+        if any(name.startswith("xl/") for name in names):
+            return {
+                "extension": "xlsx",
+                "category": "data",
+                "mimetype": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            }
+        if any(name.startswith("ppt/") for name in names):
+            return {
+                "extension": "pptx",
+                "category": "document",
+                "mimetype": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            }
+        return {
+            "extension": "docx",
+            "category": "document",
+            "mimetype": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        }
+
     async def extract_text(
         self,
         file_content: Union[bytes, BinaryIO, str],
@@ -166,6 +240,29 @@ class TextExtractor:
         """
         Extract text from file content based on file type.
 
+        Parsing and chunking are CPU-bound, so they run in a worker thread to
+        keep the event loop free while large documents are processed.
+        """
+        return await asyncio.to_thread(
+            self.extract_text_sync,
+            file_content,
+            filename,
+            mimetype,
+            chunk_size,
+            chunk_overlap,
+        )
+
+    def extract_text_sync(
+        self,
+        file_content: Union[bytes, BinaryIO, str],
+        filename: Optional[str] = None,
+        mimetype: Optional[str] = None,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+    ) -> Tuple[List[str], dict[str, Any]]:
+        """
+        Synchronous implementation of :meth:`extract_text`.
+
         Args:
             file_content: Content as bytes, file-like object, or filepath
             filename: Optional filename to determine file type
@@ -218,13 +315,8 @@ class TextExtractor:
                 }
                 file_info["extension"] = "pdf"
             elif content_bytes.startswith(b"PK\x03\x04"):
-                # This could be DOCX, XLSX, etc. - let's assume DOCX
-                file_info = {
-                    "extension": "docx",
-                    "category": "document",
-                    "mimetype": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                }
-                file_info["extension"] = "docx"
+                # OOXML container – tell DOCX/XLSX/PPTX apart by package layout
+                file_info = self._detect_ooxml_type(file_obj)
             elif content_bytes.startswith(b"{") and content_bytes.rstrip().endswith(
                 b"}"
             ):
@@ -254,10 +346,14 @@ class TextExtractor:
         # Extract based on category and extension
         try:
             category = file_info.get("category", "text")
-            ext = file_info.get("extension", "")
+            # FileValidator reports extensions with a leading dot (".pdf")
+            ext = file_info.get("extension", "").lstrip(".")
 
             text = ""
             metadata = {}
+            # Sheet/slide extractors emit (text, section_metadata) pairs that
+            # are chunked independently so chunks never straddle sections.
+            sections: Optional[List[Tuple[str, dict[str, Any]]]] = None
 
             if category == "text" or ext in ["txt", "md"]:
                 text, metadata = self._extract_from_text(file_obj.read(), file_info)
@@ -266,23 +362,37 @@ class TextExtractor:
                     text, metadata = self._extract_from_pdf(file_obj, file_info)
                 elif ext in ["doc", "docx"]:
                     text, metadata = self._extract_from_docx(file_obj, file_info)
+                elif ext == "pptx":
+                    sections, metadata = self._extract_from_pptx(
+                        file_obj, file_info, chunk_size
+                    )
             elif category == "data":
                 if ext == "json":
                     text, metadata = self._extract_from_json(file_obj.read(), file_info)
                 elif ext == "csv":
                     text, metadata = self._extract_from_csv(file_obj.read(), file_info)
                 elif ext == "xlsx":
-                    text, metadata = self._extract_from_text(
-                        file_obj.read(), file_info
-                    )  # Placeholder
+                    sections, metadata = self._extract_from_xlsx(
+                        file_obj, file_info, chunk_size
+                    )
             elif category == "code" or ext in ["py", "js", "html", "css"]:
                 text, metadata = self._extract_from_code(file_obj.read(), file_info)
             else:
                 # Fallback to text extraction for unknown types
                 text, metadata = self._extract_from_text(file_obj.read(), file_info)
 
-            # Create chunks from the text
-            chunks = self._create_chunks(text, chunk_size, chunk_overlap)
+            # Prefer structure-aware chunking for code and Markdown so chunks
+            # stay self-contained; fall back to prose chunking otherwise.
+            structured = (
+                self._chunk_sections(sections, chunk_size, chunk_overlap)
+                if sections is not None
+                else chunk_structured(text, ext, chunk_size, chunk_overlap)
+            )
+            if structured is not None:
+                chunks, chunk_metadata = structured
+                metadata["chunk_metadata"] = chunk_metadata
+            else:
+                chunks = self._create_chunks(text, chunk_size, chunk_overlap)
 
             # Update metadata with chunking info
             metadata.update(
@@ -452,6 +562,233 @@ class TextExtractor:
                 },
             )
 
+    def _extract_from_xlsx(
+        self, file_obj: BinaryIO, file_info: dict[str, Any], chunk_size: int
+    ) -> Tuple[List[Tuple[str, dict[str, Any]]], dict[str, Any]]:
+        """
+        Extract XLSX workbooks sheet by sheet using openpyxl's read-only mode.
+
+        Rows are streamed with ``iter_rows`` and grouped into row blocks of
+        roughly *chunk_size* tokens, each prefixed with the sheet's header row,
+        so large workbooks never materialise the full cell model in memory.
+        """
+        if not XLSX_AVAILABLE:
+            logger.error("XLSX extraction failed: missing dependencies")
+            return (
+                [
+                    (
+                        f"[XLSX EXTRACTION FAILED: Missing library] - To process XLSX files, please install: "
+                        f"pip install openpyxl\n\nFile: {file_info.get('filename', 'unknown')}",
+                        {},
+                    )
+                ],
+                {
+                    **file_info,
+                    "extraction_error": "Missing XLSX library (openpyxl)",
+                    "extraction_status": "failed",
+                    "token_count": 0,
+                },
+            )
+
+        try:
+            file_obj.seek(0)
+            workbook = openpyxl.load_workbook(  # type: ignore
+                file_obj, read_only=True, data_only=True
+            )
+            sections: List[Tuple[str, dict[str, Any]]] = []
+            sheet_names: List[str] = []
+            total_rows = 0
+            token_count = 0
+
+            try:
+                for sheet in workbook.worksheets:
+                    sheet_names.append(sheet.title)
+                    header = ""
+                    block: List[str] = []
+                    block_tokens = 0
+                    block_budget = chunk_size
+                    block_start = 1
+                    # Empty rows are skipped, so track the last row actually read
+                    last_row_index = 0
+
+                    for row_index, row in enumerate(
+                        sheet.iter_rows(values_only=True), start=1
+                    ):
+                        cells = ["" if v is None else str(v) for v in row]
+                        if not any(cells):
+                            continue
+                        line = " | ".join(cells).rstrip(" |")
+                        line_tokens = count_tokens_text(line)
+                        total_rows += 1
+                        token_count += line_tokens
+
+                        if not header:
+                            header = line
+                            block_start = last_row_index = row_index
+                            # Every section repeats "Sheet: <title>" and the
+                            # header; size blocks so the whole section stays
+                            # one chunk and no piece loses the header
+                            prefix_tokens = count_tokens_text(
+                                f"Sheet: {sheet.title}\n{header}\n"
+                            )
+                            block_budget = max(
+                                chunk_size - prefix_tokens - 1, chunk_size // 4, 1
+                            )
+                            continue
+
+                        # +1 for the newline joining the row to the section
+                        line_tokens += 1
+                        if block and block_tokens + line_tokens > block_budget:
+                            sections.append(
+                                self._sheet_section(
+                                    sheet.title, header, block, block_start, last_row_index
+                                )
+                            )
+                            block, block_tokens = [], 0
+
+                        if not block:
+                            block_start = row_index
+                        block.append(line)
+                        block_tokens += line_tokens
+                        last_row_index = row_index
+
+                    if block or header:
+                        sections.append(
+                            self._sheet_section(
+                                sheet.title,
+                                header,
+                                block,
+                                block_start,
+                                last_row_index,
+                            )
+                        )
+            finally:
+                # Read-only workbooks keep the archive open until closed
+                workbook.close()
+
+            metadata = {
+                **file_info,
+                "sheet_count": len(sheet_names),
+                "sheet_names": sheet_names[:20],
+                "row_count": total_rows,
+                "token_count": token_count,
+                "extraction_status": "success",
+            }
+            return sections, metadata
+
+        except Exception as e:
+            error_msg = f"XLSX extraction error: {str(e)}"
+            logger.error(error_msg)
+            return (
+                [
+                    (
+                        f"[XLSX EXTRACTION ERROR] - {error_msg}\n\nFile: {file_info.get('filename', 'unknown')}",
+                        {},
+                    )
+                ],
+                {
+                    **file_info,
+                    "extraction_error": error_msg,
+                    "extraction_status": "failed",
+                    "token_count": 0,
+                },
+            )
+
+    @staticmethod
+    def _sheet_section(
+        sheet_title: str, header: str, rows: List[str], row_start: int, row_end: int
+    ) -> Tuple[str, dict[str, Any]]:
+        """Format a block of sheet rows as a self-contained text section."""
+        body = "\n".join([header] + rows) if rows else header
+        return (
+            f"Sheet: {sheet_title}\n{body}",
+            {"sheet": sheet_title, "start_row": row_start, "end_row": row_end},
+        )
+
+    def _extract_from_pptx(
+        self, file_obj: BinaryIO, file_info: dict[str, Any], chunk_size: int
+    ) -> Tuple[List[Tuple[str, dict[str, Any]]], dict[str, Any]]:
+        """Extract PPTX presentations slide by slide (text frames, tables, notes)."""
+        if not PPTX_AVAILABLE:
+            logger.error("PPTX extraction failed: missing dependencies")
+            return (
+                [
+                    (
+                        f"[PPTX EXTRACTION FAILED: Missing library] - To process PPTX files, please install: "
+                        f"pip install python-pptx\n\nFile: {file_info.get('filename', 'unknown')}",
+                        {},
+                    )
+                ],
+                {
+                    **file_info,
+                    "extraction_error": "Missing PPTX library (python-pptx)",
+                    "extraction_status": "failed",
+                    "token_count": 0,
+                },
+            )
+
+        try:
+            file_obj.seek(0)
+            presentation = pptx.Presentation(file_obj)  # type: ignore
+            sections: List[Tuple[str, dict[str, Any]]] = []
+            token_count = 0
+
+            for slide_number, slide in enumerate(presentation.slides, start=1):
+                parts: List[str] = []
+                title = None
+                if slide.shapes.title is not None and slide.shapes.title.has_text_frame:
+                    title = slide.shapes.title.text_frame.text.strip() or None
+
+                for shape in slide.shapes:
+                    if shape.has_text_frame:
+                        frame_text = shape.text_frame.text.strip()
+                        if frame_text:
+                            parts.append(frame_text)
+                    elif getattr(shape, "has_table", False) and shape.has_table:
+                        for row in shape.table.rows:
+                            parts.append(" | ".join(cell.text.strip() for cell in row.cells))
+
+                if slide.has_notes_slide:
+                    notes = slide.notes_slide.notes_text_frame.text.strip()
+                    if notes:
+                        parts.append(f"Notes: {notes}")
+
+                if not parts:
+                    continue
+
+                slide_text = f"Slide {slide_number}\n" + "\n".join(parts)
+                token_count += count_tokens_text(slide_text)
+                section_meta: dict[str, Any] = {"slide": slide_number}
+                if title:
+                    section_meta["slide_title"] = title
+                sections.append((slide_text, section_meta))
+
+            metadata = {
+                **file_info,
+                "slide_count": len(presentation.slides),
+                "token_count": token_count,
+                "extraction_status": "success",
+            }
+            return sections, metadata
+
+        except Exception as e:
+            error_msg = f"PPTX extraction error: {str(e)}"
+            logger.error(error_msg)
+            return (
+                [
+                    (
+                        f"[PPTX EXTRACTION ERROR] - {error_msg}\n\nFile: {file_info.get('filename', 'unknown')}",
+                        {},
+                    )
+                ],
+                {
+                    **file_info,
+                    "extraction_error": error_msg,
+                    "extraction_status": "failed",
+                    "token_count": 0,
+                },
+            )
+
     def _extract_from_json(
         self, content: bytes, file_info: dict[str, Any]
     ) -> Tuple[str, dict[str, Any]]:
@@ -12,19 +12,22 @@ Key Improvements:
 - Enhanced logging with context
 """
 
+import asyncio
+import hashlib
 import logging
 import json
 import os
 import uuid
-from typing import List, Any, Optional, Callable
+from dataclasses import dataclass, field
+from typing import List, Any, Optional, Callable, Awaitable, Tuple
 from uuid import UUID
 
 from db import get_async_session_context
 
 import numpy as np
-import httpx
 
 from models.project_file import ProjectFile
+from utils.http_clients import get_http_client, request_timeout
 
 logger = logging.getLogger(__name__)
 
@@ -363,12 +366,14 @@ class VectorDB:
         payload = {"input": texts, "model": "text-embedding-3-small"}
 
         logger.debug("Requesting OpenAI embeddings for %d texts.", len(texts))
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            logger.info("Received OpenAI embeddings.", extra={"text_count": len(texts)})
-            return [item["embedding"] for item in data["data"]]
+        client = get_http_client(url)
+        response = await client.post(
+            url, json=payload, headers=headers, timeout=request_timeout(30)
+        )
+        response.raise_for_status()
+        data = response.json()
+        logger.info("Received OpenAI embeddings.", extra={"text_count": len(texts)})
+        return [item["embedding"] for item in data["data"]]
 
     async def _generate_cohere_embeddings(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings using Cohere API."""
@@ -386,12 +391,14 @@ class VectorDB:
         }
 
         logger.debug("Requesting Cohere embeddings for %d texts.", len(texts))
-        async with httpx.AsyncClient() as client:
-            response = await client.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            logger.info("Received Cohere embeddings.", extra={"text_count": len(texts)})
-            return data["embeddings"]
+        client = get_http_client(url)
+        response = await client.post(
+            url, json=payload, headers=headers, timeout=request_timeout(30)
+        )
+        response.raise_for_status()
+        data = response.json()
+        logger.info("Received Cohere embeddings.", extra={"text_count": len(texts)})
+        return data["embeddings"]
 
     async def add_documents(
         self,
@@ -470,6 +477,16 @@ class VectorDB:
             )
             return []
 
+        return self._store_embedded(chunks, embeddings, metadatas, ids)
+
+    def _store_embedded(
+        self,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict[str, Any]],
+        ids: List[str],
+    ) -> List[str]:
+        """Insert already-embedded documents into the in-memory store and index."""
         successful_ids = []
         for doc_id, embedding, metadata, text in zip(
             ids, embeddings, metadatas, chunks
@@ -489,6 +506,31 @@ class VectorDB:
 
         return successful_ids
 
+    async def add_embedded_documents(
+        self,
+        chunks: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[dict[str, Any]],
+        ids: List[str],
+        persist: bool = True,
+    ) -> List[str]:
+        """
+        Add documents whose embeddings were generated by the caller.
+
+        Used by the ingestion pipeline, which embeds concurrently and batches
+        writes; pass ``persist=False`` to defer the disk save to the caller.
+        """
+        if not chunks:
+            return []
+        if not (len(chunks) == len(embeddings) == len(metadatas) == len(ids)):
+            raise VectorDBError("chunks, embeddings, metadatas and ids must align")
+        self._validate_metadatas(metadatas)
+
+        successful_ids = self._store_embedded(chunks, embeddings, metadatas, ids)
+        if persist and self.storage_path and successful_ids:
+            await self._save_to_disk()
+        return successful_ids
+
     def _update_faiss_index(
         self, embeddings: List[List[float]], ids: List[str]
     ) -> None:
@@ -960,17 +1002,117 @@ class VectorDB:
         return True
 
 
+async def _fetch_for_extraction(
+    project_file: ProjectFile,
+    chunk_size: int,
+    chunk_overlap: int,
+    file_content: Optional[bytes] = None,
+    storage: Optional[Any] = None,
+) -> Tuple[Optional[Tuple[List[str], dict[str, Any]]], Optional[bytes]]:
+    """
+    Return ``(cached_extraction, file_content)`` for *project_file*.
+
+    On an extraction-cache hit the content is never downloaded; on a miss the
+    content is taken from *file_content* or fetched from *storage*.
+    """
+    from services.extraction_cache import get_extraction_cache
+
+    cached = await get_extraction_cache().get(
+        project_file.file_hash, chunk_size, chunk_overlap
+    )
+    if cached is not None:
+        logger.debug(
+            "Extraction cache hit for file %s",
+            project_file.id,
+            extra={"file_id": str(project_file.id)},
+        )
+        return cached, None
+
+    if file_content is None:
+        if storage is None:
+            raise ValueError("file_content or storage is required")
+        file_content = await storage.get_file(
+            project_file.file_path, file_hash=project_file.file_hash
+        )
+    return None, file_content
+
+
+async def _extract_and_cache(
+    project_file: ProjectFile,
+    file_content: bytes,
+    chunk_size: int,
+    chunk_overlap: int,
+) -> Tuple[List[str], dict[str, Any]]:
+    """Extract text chunks from *file_content* and cache successful results."""
+    from services.text_extraction import get_text_extractor
+    from services.extraction_cache import get_extraction_cache
+
+    if not project_file.file_hash:
+        # Backfill legacy records so the next re-index can hit the cache
+        project_file.file_hash = hashlib.sha256(file_content).hexdigest()
+
+    text_chunks, metadata = await get_text_extractor().extract_text(
+        file_content,
+        filename=project_file.filename,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+    )
+    # Failed extractions may be transient; never serve them from the cache
+    if (
+        metadata.get("extraction_status") != "failed"
+        and "extraction_error" not in metadata
+    ):
+        await get_extraction_cache().put(
+            project_file.file_hash, chunk_size, chunk_overlap, text_chunks, metadata
+        )
+    return text_chunks, metadata
+
+
+def _build_chunk_records(
+    project_file: ProjectFile,
+    text_chunks: List[str],
+    metadata: dict[str, Any],
+    knowledge_base_id: UUID,
+) -> Tuple[List[str], List[dict[str, Any]]]:
+    """Return the vector-store ``(ids, metadatas)`` for a file's chunks."""
+    # Structure-aware chunkers attach symbol names / line ranges per chunk
+    structured_metadata = metadata.pop("chunk_metadata", None) or []
+
+    chunk_metadatas = []
+    for i in range(len(text_chunks)):
+        chunk_metadatas.append(
+            {
+                **(structured_metadata[i] if i < len(structured_metadata) else {}),
+                "file_id": str(project_file.id),
+                "project_id": str(project_file.project_id),
+                "knowledge_base_id": str(knowledge_base_id),
+                "chunk_index": i,
+                "total_chunks": len(text_chunks),
+                "file_name": project_file.filename,
+                "file_type": project_file.file_type,
+                "source": "project_file",
+            }
+        )
+    ids = [f"{project_file.id}_chunk_{i}" for i in range(len(text_chunks))]
+    return ids, chunk_metadatas
+
+
 async def process_file_for_search(
     project_file: ProjectFile,
     vector_db: VectorDB,
-    file_content: bytes,
+    file_content: Optional[bytes] = None,
     chunk_size: int = DEFAULT_CHUNK_SIZE,
     chunk_overlap: int = DEFAULT_CHUNK_OVERLAP,
     knowledge_base_id: Optional[UUID] = None,
+    storage: Optional[Any] = None,
 ) -> dict[str, Any]:
-    """Process a file for similarity search."""
-    from services.text_extraction import get_text_extractor
+    """
+    Process a file for similarity search.
 
+    Extraction results are cached by content hash; on a cache hit neither
+    *file_content* nor a storage download is needed.  When *file_content* is
+    omitted it is fetched lazily from *storage* on a miss.
+    """
     logger.info(
         "Processing file: %s (project_id=%s, file_id=%s)",
         project_file.filename,
@@ -979,19 +1121,20 @@ async def process_file_for_search(
         extra={"file_id": str(project_file.id), "project_id": str(project_file.project_id)},
     )
 
-    text_extractor = get_text_extractor()
-
     try:
         if not project_file.project_id:
             raise ValueError("File must be associated with a project")
 
-        # Extract text chunks
-        text_chunks, metadata = await text_extractor.extract_text(
-            file_content,
-            filename=project_file.filename,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
+        # Extract text chunks (served from the extraction cache when possible)
+        cached, file_content = await _fetch_for_extraction(
+            project_file, chunk_size, chunk_overlap, file_content, storage
         )
+        if cached is not None:
+            text_chunks, metadata = cached
+        else:
+            text_chunks, metadata = await _extract_and_cache(
+                project_file, file_content, chunk_size, chunk_overlap  # type: ignore[arg-type]
+            )
 
         # Prepare metadata
         resolved_kb_id = knowledge_base_id or (
@@ -1003,26 +1146,15 @@ async def process_file_for_search(
         if not resolved_kb_id:
             raise ValueError("Knowledge base ID is required")
 
-        chunk_metadatas = []
-        for i in range(len(text_chunks)):
-            chunk_metadatas.append(
-                {
-                    "file_id": str(project_file.id),
-                    "project_id": str(project_file.project_id),
-                    "knowledge_base_id": str(resolved_kb_id),
-                    "chunk_index": i,
-                    "total_chunks": len(text_chunks),
-                    "file_name": project_file.filename,
-                    "file_type": project_file.file_type,
-                    "source": "project_file",
-                }
-            )
+        ids, chunk_metadatas = _build_chunk_records(
+            project_file, text_chunks, metadata, resolved_kb_id
+        )
 
         # Add to vector database
         added_ids = await vector_db.add_documents(
             chunks=text_chunks,
             metadatas=chunk_metadatas,
-            ids=[f"{project_file.id}_chunk_{i}" for i in range(len(text_chunks))],
+            ids=ids,
         )
 
         logger.info(
@@ -1122,6 +1254,66 @@ async def cleanup_project_resources(
         return False
 
 
+@dataclass
+class _IngestJob:
+    """A file moving through the ingestion pipeline."""
+
+    project_file: ProjectFile
+    content: Optional[bytes] = None
+    chunks: Optional[List[str]] = None
+    metadata: dict[str, Any] = field(default_factory=dict)
+    ids: List[str] = field(default_factory=list)
+    chunk_metadatas: List[dict[str, Any]] = field(default_factory=list)
+    embeddings: List[List[float]] = field(default_factory=list)
+
+
+_STAGE_DONE = object()
+
+
+async def _run_stage(
+    name: str,
+    in_queue: "asyncio.Queue[Any]",
+    out_queue: "Optional[asyncio.Queue[Any]]",
+    handler: Callable[[_IngestJob], Awaitable[Optional[_IngestJob]]],
+    concurrency: int,
+    on_error: Callable[[_IngestJob, Exception], None],
+) -> None:
+    """
+    Run *concurrency* workers that apply *handler* to jobs from *in_queue*.
+
+    Successful jobs are forwarded to *out_queue*; failures are reported via
+    *on_error* and dropped.  When the upstream sentinel arrives every worker
+    exits and a single sentinel is passed downstream.
+    """
+
+    async def worker() -> None:
+        while True:
+            job = await in_queue.get()
+            if job is _STAGE_DONE:
+                # Let sibling workers see the sentinel too
+                await in_queue.put(_STAGE_DONE)
+                return
+            try:
+                result = await handler(job)
+            except Exception as e:
+                logger.error(
+                    "Ingestion %s stage failed for file %s: %s",
+                    name,
+                    job.project_file.id,
+                    str(e),
+                    exc_info=True,
+                    extra={"file_id": str(job.project_file.id), "stage": name},
+                )
+                on_error(job, e)
+                continue
+            if result is not None and out_queue is not None:
+                await out_queue.put(result)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    if out_queue is not None:
+        await out_queue.put(_STAGE_DONE)
+
+
 async def process_files_for_project(
     project_id: UUID,
     file_ids: Optional[List[UUID]] = None,
@@ -1132,6 +1324,12 @@ async def process_files_for_project(
     """
     Batch process project files with progress tracking.
 
+    Files flow through a staged pipeline (fetch -> extract -> embed -> write)
+    connected by bounded queues, so storage downloads, parsing and embedding
+    calls for different files overlap.  Each stage has its own concurrency
+    limit and the writer inserts into the vector DB in batches, saving to
+    disk once at the end.
+
     If *db* is None we open/close our own AsyncSession so the
     helper is safe to call from background tasks.
     """
@@ -1146,6 +1344,8 @@ async def process_files_for_project(
             )
 
     from sqlalchemy import select
+    from config import settings
+    from models.knowledge_base import KnowledgeBase
 
     logger.info(
         "Starting batch file processing for project %s",
@@ -1170,59 +1370,162 @@ async def process_files_for_project(
     }
 
     # Get file records to process
-    if db:
-        query = select(ProjectFile).where(ProjectFile.project_id == project_id)
-        if file_ids:
-            query = query.where(ProjectFile.id.in_(file_ids))
-
-        file_records = await db.execute(query)
-        file_records = file_records.scalars().all()
-    else:
-        if not file_ids:
-            logger.error(
-                "Database session or file IDs required for batch processing.",
-                extra={"project_id": str(project_id)},
-            )
-            return {
-                "processed": 0,
-                "failed": 0,
-                "errors": ["Database session or file IDs required"],
-                "details": [],
+    query = select(ProjectFile).where(ProjectFile.project_id == project_id)
+    if file_ids:
+        query = query.where(ProjectFile.id.in_(file_ids))
+
+    file_records = (await db.execute(query)).scalars().all()
+    if not file_records:
+        return results
+
+    queue_size = max(1, getattr(settings, "INGEST_QUEUE_SIZE", 8))
+    fetch_concurrency = getattr(settings, "INGEST_FETCH_CONCURRENCY", 4)
+    extract_concurrency = getattr(settings, "INGEST_EXTRACT_CONCURRENCY", 2)
+    embed_concurrency = getattr(settings, "INGEST_EMBED_CONCURRENCY", 2)
+    embed_batch_size = max(1, getattr(settings, "INGEST_EMBED_BATCH_SIZE", 100))
+    write_batch_size = max(1, getattr(settings, "INGEST_WRITE_BATCH_SIZE", 500))
+
+    # Resolve the knowledge base once instead of lazily per file
+    kb_result = await db.execute(
+        select(KnowledgeBase.id).where(KnowledgeBase.project_id == project_id)
+    )
+    knowledge_base_id = kb_result.scalar_one_or_none()
+
+    def record_failure(job: _IngestJob, error: Exception) -> None:
+        file_id = str(job.project_file.id)
+        results["failed"] += 1
+        results["errors"].append(f"File {file_id}: {str(error)}")
+        results["details"].append(
+            {
+                "file_id": file_id,
+                "success": False,
+                "error": str(error),
+                "chunk_count": 0,
+                "token_count": 0,
+                "added_ids": [],
             }
-        file_records = []
+        )
 
-    for file_record in file_records:
-        try:
-            content = await storage.get_file(file_record.file_path)
+    def record_success(job: _IngestJob, added_ids: List[str]) -> None:
+        results["processed"] += 1
+        results["details"].append(
+            {
+                "file_id": str(job.project_file.id),
+                "chunk_count": len(job.chunks or []),
+                "token_count": job.metadata.get("token_count", 0),
+                "added_ids": added_ids,
+                "success": True,
+                "metadata": job.metadata,
+            }
+        )
 
-            result = await process_file_for_search(
-                project_file=file_record,
-                vector_db=vector_db,
-                file_content=content,
-                chunk_size=chunk_size,
-                chunk_overlap=chunk_overlap,
+    async def fetch(job: _IngestJob) -> _IngestJob:
+        cached, job.content = await _fetch_for_extraction(
+            job.project_file, chunk_size, chunk_overlap, storage=storage
+        )
+        if cached is not None:
+            job.chunks, job.metadata = cached
+        return job
+
+    async def extract(job: _IngestJob) -> _IngestJob:
+        if job.chunks is None:
+            job.chunks, job.metadata = await _extract_and_cache(
+                job.project_file, job.content, chunk_size, chunk_overlap  # type: ignore[arg-type]
             )
+            job.content = None  # release the raw bytes early
+        return job
 
-            results["details"].append(result)
-            if result["success"]:
-                results["processed"] += 1
-            else:
-                results["failed"] += 1
-                if "error" in result:
-                    results["errors"].append(
-                        f"File {file_record.id}: {result['error']}"
-                    )
+    async def embed(job: _IngestJob) -> Optional[_IngestJob]:
+        if not knowledge_base_id:
+            raise ValueError("Knowledge base ID is required")
+        chunks = job.chunks or []
+        job.ids, job.chunk_metadatas = _build_chunk_records(
+            job.project_file, chunks, job.metadata, knowledge_base_id
+        )
+        for i in range(0, len(chunks), embed_batch_size):
+            job.embeddings.extend(
+                await vector_db.generate_embeddings(chunks[i : i + embed_batch_size])
+            )
+        if len(job.embeddings) != len(chunks):
+            raise VectorDBError(
+                f"Expected {len(chunks)} embeddings, got {len(job.embeddings)}"
+            )
+        return job
 
+    pending: List[_IngestJob] = []
+
+    async def flush_writes() -> None:
+        if not pending:
+            return
+        batch = list(pending)
+        pending.clear()
+        try:
+            added_ids = await vector_db.add_embedded_documents(
+                chunks=[c for job in batch for c in (job.chunks or [])],
+                embeddings=[e for job in batch for e in job.embeddings],
+                metadatas=[m for job in batch for m in job.chunk_metadatas],
+                ids=[i for job in batch for i in job.ids],
+                persist=False,
+            )
         except Exception as e:
-            results["failed"] += 1
-            results["errors"].append(f"File {file_record.id}: {str(e)}")
             logger.error(
-                "Error processing file %s: %s",
-                file_record.id,
+                "Failed to write ingestion batch of %d files: %s",
+                len(batch),
                 str(e),
                 exc_info=True,
-                extra={"file_id": str(file_record.id), "project_id": str(project_id)},
+                extra={"project_id": str(project_id)},
             )
+            for job in batch:
+                record_failure(job, e)
+            return
+        added = set(added_ids)
+        for job in batch:
+            record_success(job, [doc_id for doc_id in job.ids if doc_id in added])
+
+    async def write() -> None:
+        pending_chunks = 0
+        while True:
+            job = await embedded_queue.get()
+            if job is _STAGE_DONE:
+                break
+            pending.append(job)
+            pending_chunks += len(job.ids)
+            if pending_chunks >= write_batch_size:
+                await flush_writes()
+                pending_chunks = 0
+        await flush_writes()
+
+    # The source queue is unbounded (records are already loaded); every
+    # queue after it is bounded so a fast stage cannot run ahead unchecked.
+    source_queue: "asyncio.Queue[Any]" = asyncio.Queue()
+    fetched_queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+    extracted_queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+    embedded_queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=queue_size)
+
+    for file_record in file_records:
+        source_queue.put_nowait(_IngestJob(project_file=file_record))
+    source_queue.put_nowait(_STAGE_DONE)
+
+    await asyncio.gather(
+        _run_stage("fetch", source_queue, fetched_queue, fetch, fetch_concurrency, record_failure),
+        _run_stage("extract", fetched_queue, extracted_queue, extract, extract_concurrency, record_failure),
+        _run_stage("embed", extracted_queue, embedded_queue, embed, embed_concurrency, record_failure),
+        write(),
+    )
+
+    if vector_db.storage_path and results["processed"]:
+        await vector_db._save_to_disk()
+
+    # Persist any file_hash values backfilled for the extraction cache
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.warning(
+            "Failed to persist backfilled file hashes: %s",
+            str(e),
+            extra={"project_id": str(project_id)},
+        )
 
     logger.info(
         "Completed batch file processing for project %s: %d processed, %d failed",
@@ -1238,6 +1541,7 @@ async def process_files_for_project(
 
     return results
 
+
 async def get_vector_db(
     model_name: str, storage_path: str, load_existing: bool = True
 ) -> VectorDB:
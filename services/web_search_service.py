@@ -4,6 +4,8 @@ from typing import List
 
 import httpx
 
+from utils.http_clients import get_http_client, request_timeout
+
 logger = logging.getLogger(__name__)
 
 SERPAPI_ENDPOINT = "https://serpapi.com/search"
@@ -42,10 +44,12 @@ async def search(query: str, top_k: int = 5) -> List[str]:
     params = {"engine": "google", "api_key": api_key, "q": query, "num": max(top_k, 1)}
 
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(SERPAPI_ENDPOINT, params=params)
-            response.raise_for_status()
-            data: dict = response.json()
+        client = get_http_client(SERPAPI_ENDPOINT)
+        response = await client.get(
+            SERPAPI_ENDPOINT, params=params, timeout=request_timeout(15.0)
+        )
+        response.raise_for_status()
+        data: dict = response.json()
     except httpx.HTTPError as exc:
         logger.error("SerpAPI request failed", exc_info=exc)
         return []
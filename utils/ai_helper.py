@@ -10,6 +10,7 @@ knowledge retrieval, and token estimation.
 
 import logging
 
+from dataclasses import dataclass, field
 from typing import Any
 from uuid import UUID
 
@@ -102,11 +103,25 @@ async def retrieve_knowledge_context(
         A formatted string containing the relevant context and sources,
         or None if no suitable context is found or an error occurs.
     """
+    context_text, _ = await _search_knowledge_context(
+        query, project_id, db, top_k=top_k, score_threshold=score_threshold
+    )
+    return context_text
+
+
+async def _search_knowledge_context(
+    query: str,
+    project_id: UUID,
+    db: AsyncSession,
+    top_k: int = DEFAULT_KB_SEARCH_TOP_K,
+    score_threshold: float = DEFAULT_SCORE_THRESHOLD,
+) -> tuple[str | None, list[dict[str, Any]]]:
+    """Like ``retrieve_knowledge_context`` but also returns the sources used."""
     from services.knowledgebase_service import search_project_context  # noqa: E402
 
     if not all([query, project_id, db]):
         logger.warning("retrieve_knowledge_context called with missing arguments.")
-        return None
+        return None, []
 
     logger.info(
         f"Retrieving knowledge context for project {project_id} with query: '{query[:50]}...'"
@@ -123,23 +138,24 @@ async def retrieve_knowledge_context(
             logger.info(
                 f"No valid search results structure returned for project {project_id}."
             )
-            return None
+            return None, []
 
         results_list = search_results_data.get("results")
         if not isinstance(results_list, list):
             logger.warning(
                 f"Search results 'results' key is not a list for project {project_id}: {type(results_list)}"
             )
-            return None
+            return None, []
 
         if not results_list:
             logger.info(
                 f"No knowledge context search results found for query in project {project_id}"
             )
-            return None
+            return None, []
 
         # Filter and format the results
         context_blocks = []
+        sources: list[dict[str, Any]] = []
         valid_results_count = 0
         for i, result in enumerate(results_list):
             if not isinstance(result, dict):
@@ -178,12 +194,20 @@ async def retrieve_knowledge_context(
             context_blocks.append(
                 f"[Source {valid_results_count}: {filename} (Score: {score:.2f})]\n{text}\n"
             )
+            sources.append(
+                {
+                    "file_name": filename,
+                    "file_id": metadata.get("file_id"),
+                    "chunk_index": metadata.get("chunk_index"),
+                    "score": round(float(score), 4),
+                }
+            )
 
         if not context_blocks:
             logger.info(
                 f"No high-confidence knowledge context found after filtering (threshold: {score_threshold})."
             )
-            return None
+            return None, []
 
         # Combine blocks into a single context string
         context_header = "RELEVANT CONTEXT FROM PROJECT FILES:\n"
@@ -191,18 +215,93 @@ async def retrieve_knowledge_context(
         logger.info(
             f"Retrieved {len(context_blocks)} relevant knowledge context blocks for project {project_id}."
         )
-        return context_text
+        return context_text, sources
 
     except ImportError:
         # This might occur if knowledgebase_service is optional or fails to import
         logger.error("Knowledgebase service is not available or failed to import.")
-        return None
+        return None, []
     except Exception as e:
         logger.error(
             f"Error retrieving knowledge context for project {project_id}: {e}",
             exc_info=True,
         )
-        return None
+        return None, []
+
+
+@dataclass(slots=True)
+class KnowledgeRetrieval:
+    """
+    Knowledge-base retrieval for a single chat turn.
+
+    Created once per user message and handed to both prompt assembly
+    (``ContextManager``/``augment_with_knowledge``) and response persistence
+    (``utils.ai_response``), so the readiness check, query embedding and
+    vector search run once per turn rather than once per consumer.
+    """
+
+    query: str
+    project_id: UUID | None = None
+    context_text: str | None = None
+    sources: list[dict[str, Any]] = field(default_factory=list)
+    resolved: bool = False
+
+    @property
+    def used(self) -> bool:
+        return bool(self.context_text)
+
+    def context_used(self) -> dict[str, Any] | None:
+        """Value for ``Message.context_used`` (None when no KB context was injected)."""
+        if not self.used:
+            return None
+        return {"query": self.query[:500], "sources": self.sources}
+
+    async def resolve(
+        self,
+        conversation: Conversation,
+        db: AsyncSession,
+        top_k: int = DEFAULT_KB_SEARCH_TOP_K,
+    ) -> "KnowledgeRetrieval":
+        """Run the retrieval for *conversation* unless it already ran this turn."""
+        if self.resolved:
+            return self
+        self.resolved = True
+
+        if not (self.query and conversation.project_id and conversation.use_knowledge_base):
+            return self
+        self.project_id = conversation.project_id  # type: ignore[assignment]
+
+        # Fast KB readiness check (avoid triggering heavy init if KB is not
+        # ready).  If unavailable we skip augmentation so chat stays responsive.
+        try:
+            from services.kb_readiness_service import KBReadinessService  # late import to avoid circular deps
+
+            readiness_status = await KBReadinessService.get_instance().check_project_readiness(
+                conversation.project_id  # type: ignore[arg-type]
+            )
+        except Exception as readiness_exc:  # pragma: no cover – best effort
+            logger.debug(
+                "KB readiness check failed or KB unavailable: %s", readiness_exc
+            )
+            return self
+
+        if not readiness_status.available:
+            logger.info(
+                "Knowledge base not ready for project %s – reason: %s. "
+                "Proceeding without KB context.",
+                conversation.project_id,
+                readiness_status.reason,
+            )
+            return self
+
+        self.context_text, self.sources = await _search_knowledge_context(
+            query=self.query,
+            project_id=self.project_id,  # type: ignore[arg-type]
+            db=db,
+            top_k=top_k,
+            score_threshold=DEFAULT_SCORE_THRESHOLD,
+        )
+        return self
 
 
 async def augment_with_knowledge(
@@ -214,6 +313,7 @@ async def augment_with_knowledge(
         dict[str, Any] | None
     ) = None,  # Allow passing specific model config
     results_limit: int = 5,
+    retrieval: KnowledgeRetrieval | None = None,
 ) -> list[dict[str, Any]]:
     """
     Augments a conversation prompt by retrieving and formatting relevant knowledge.
@@ -228,6 +328,8 @@ async def augment_with_knowledge(
         db: The asynchronous database session.
         max_context_tokens: The maximum number of tokens allowed for the added context.
         model_config_override: Optional dictionary with model config, e.g., for extended_thinking checks.
+        retrieval: Per-turn retrieval to reuse.  When given, its results are
+            used (resolving it first if needed) instead of searching again.
 
     Returns:
         A list of message dictionaries (role: 'system') containing the
@@ -273,13 +375,17 @@ async def augment_with_knowledge(
         return []
 
     # --- Retrieve KB context via shared helper ------------------------
-    ctx_text = await retrieve_knowledge_context(
-        query=user_message,
-        project_id=project.id,  # type: ignore[arg-type]
-        db=db,
-        top_k=results_limit,
-        score_threshold=DEFAULT_SCORE_THRESHOLD,
-    )
+    if retrieval is not None:
+        await retrieval.resolve(conversation, db, top_k=results_limit)
+        ctx_text = retrieval.context_text
+    else:
+        ctx_text = await retrieve_knowledge_context(
+            query=user_message,
+            project_id=project.id,  # type: ignore[arg-type]
+            db=db,
+            top_k=results_limit,
+            score_threshold=DEFAULT_SCORE_THRESHOLD,
+        )
     if not ctx_text:
         logger.info(
             f"No suitable knowledge context found for conversation {conversation_id}."
@@ -1,8 +1,9 @@
 import logging
 from typing import Optional, List, Any, Union, AsyncGenerator
 from uuid import UUID
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 
+import anyio
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 import json
@@ -14,7 +15,8 @@ from config import settings
 from utils.db_utils import get_by_id, save_model
 from utils.model_registry import get_model_config
 from utils.tokens import count_tokens_text
-from utils.ai_helper import retrieve_knowledge_context
+from utils.ai_helper import KnowledgeRetrieval
+from utils.sse import aiter_sse_events
 
 logger = logging.getLogger(__name__)
 
@@ -58,25 +60,60 @@ class AIResponseOptions:
         return {k: v for k, v in d.items() if v is not None}
 
 
-async def generate_ai_response(
-    conversation_id: UUID,
+async def _inject_knowledge_context(
+    conversation: Conversation,
     messages: List[dict[str, Any]],
-    model_id: str,
     db: AsyncSession,
-    *,
-    options: AIResponseOptions | None = None,
-) -> Optional[Message]:
+) -> tuple[List[dict[str, Any]], KnowledgeRetrieval]:
     """
-    Generate an AI response for the given conversation, handling model specifics.
+    Insert project knowledge-base context after the system messages when the
+    conversation uses the knowledge base and it is ready.
     """
+    final_messages = list(messages)  # Copy to avoid mutation
+    last_user_content = next(
+        (
+            msg.get("content")
+            for msg in reversed(final_messages)
+            if msg.get("role") == "user" and isinstance(msg.get("content"), str)
+        ),
+        None,
+    )
+    retrieval = KnowledgeRetrieval(query=last_user_content or "")
 
-    opts = options or AIResponseOptions()
+    try:
+        await retrieval.resolve(conversation, db)
+        if retrieval.context_text:
+            system_indices = [
+                i for i, m in enumerate(final_messages) if m.get("role") == "system"
+            ]
+            insert_index = system_indices[-1] + 1 if system_indices else 0
+            final_messages.insert(
+                insert_index,
+                {"role": "system", "content": retrieval.context_text},
+            )
+            logger.info("Injected knowledge context into messages.")
+    except Exception as e:
+        logger.error(f"Failed to inject knowledge context: {e}")
+
+    return final_messages, retrieval
 
-    # Validate inputs
-    if not db:
-        logger.error("Database session is required for generate_ai_response.")
-        return None
 
+async def _prepare_ai_request(
+    conversation_id: UUID,
+    messages: List[dict[str, Any]],
+    model_id: str,
+    db: AsyncSession,
+    opts: AIResponseOptions,
+    retrieval: Optional[KnowledgeRetrieval] = None,
+) -> Optional[tuple[dict[str, Any], Optional[KnowledgeRetrieval]]]:
+    """
+    Resolve the conversation and model and build the ``openai_chat`` kwargs.
+
+    When *retrieval* is given, its knowledge context is already part of
+    *messages* (added by ``ContextManager``) and is not searched for again.
+    Returns ``(api_params, retrieval)``, or None when the conversation does
+    not exist.
+    """
     # Retrieve conversation
     conversation = await get_by_id(db, Conversation, conversation_id)
     if not conversation:
@@ -97,76 +134,12 @@ async def generate_ai_response(
     )
 
     # Prepare messages with knowledge context
-    final_messages = list(messages)  # Copy to avoid mutation
-    knowledge_context = None
-
-    if conversation.project_id and conversation.use_knowledge_base:
-        # ------------------------------------------------------------
-        # Fast KB readiness check (avoid triggering heavy init if KB
-        # is not ready).  If unavailable we gracefully skip KB
-        # augmentation so that chat remains responsive.
-        # ------------------------------------------------------------
-        try:
-            from services.kb_readiness_service import KBReadinessService  # late import to avoid circular deps
-
-            readiness_service = KBReadinessService.get_instance()
-            readiness_status = await readiness_service.check_project_readiness(
-                conversation.project_id  # type: ignore[arg-type]
-            )
-
-            if not readiness_status.available:
-                logger.info(
-                    "Knowledge base not ready for project %s – reason: %s. "
-                    "Proceeding without KB context.",
-                    conversation.project_id,
-                    readiness_status.reason,
-                )
-                # Skip KB retrieval logic
-                raise RuntimeError("KB not ready")
-
-        except Exception as readiness_exc:  # pragma: no cover – best effort
-            logger.debug(
-                "KB readiness check failed or KB unavailable: %s", readiness_exc
-            )
-            # Skip KB retrieval
-            readiness_status = None
-
-        # Only attempt retrieval if readiness check passed and KB is ready
-        if readiness_status is not None and readiness_status.available:
-            last_user_content = next(
-                (
-                    msg.get("content")
-                    for msg in reversed(final_messages)
-                    if msg.get("role") == "user" and isinstance(msg.get("content"), str)
-                ),
-                None,
-            )
-            if last_user_content:
-                try:
-                    if isinstance(conversation.project_id, UUID):
-                        knowledge_context = await retrieve_knowledge_context(
-                            query=last_user_content,
-                            project_id=conversation.project_id,  # type: ignore[arg-type]
-                            db=db,
-                        )
-                    else:
-                        logger.warning(
-                            f"Invalid project_id type: {type(conversation.project_id)}"
-                        )
-                    if knowledge_context:
-                        system_indices = [
-                            i
-                            for i, m in enumerate(final_messages)
-                            if m.get("role") == "system"
-                        ]
-                        insert_index = system_indices[-1] + 1 if system_indices else 0
-                        final_messages.insert(
-                            insert_index,
-                            {"role": "system", "content": knowledge_context},
-                        )
-                        logger.info("Injected knowledge context into messages.")
-                except Exception as e:
-                    logger.error(f"Failed to inject knowledge context: {e}")
+    if retrieval is not None:
+        final_messages = list(messages)
+    else:
+        final_messages, retrieval = await _inject_knowledge_context(
+            conversation, messages, db
+        )
 
     # Prepare API parameters (inject reasoning for o-series models)
     api_params: dict[str, Any] = {
@@ -174,6 +147,280 @@ async def generate_ai_response(
         "model_name": str(model_id),
         **opts.to_api_dict(force_reasoning_for_model=model_id),
     }
+    return api_params, retrieval
+
+
+@dataclass(slots=True)
+class _StreamDelta:
+    """The parts of one streamed chunk that the saved message needs."""
+
+    content: Optional[str] = None
+    thinking: Optional[str] = None
+    finish_reason: Optional[str] = None
+    usage: Optional[dict[str, Any]] = None
+    id: Optional[str] = None
+
+
+@dataclass(slots=True)
+class _StreamedReply:
+    """Accumulates ``_StreamDelta`` items into ``_parse_response_data`` fields."""
+
+    content: list[str] = field(default_factory=list)
+    thinking: list[str] = field(default_factory=list)
+    usage: Optional[dict[str, Any]] = None
+    stop_reason: Optional[str] = None
+    id: Optional[str] = None
+
+    def add(self, delta: _StreamDelta) -> None:
+        if delta.content:
+            self.content.append(delta.content)
+        if delta.thinking:
+            self.thinking.append(delta.thinking)
+        if delta.usage:
+            self.usage = delta.usage
+        if delta.finish_reason:
+            self.stop_reason = delta.finish_reason
+        if delta.id and not self.id:
+            self.id = delta.id
+
+    def parsed(self, stop_reason: Optional[str] = None) -> dict[str, Any]:
+        """Message fields; *stop_reason* (cancelled/error) overrides the provider's."""
+        thinking = "".join(self.thinking) or None
+        return {
+            "content": "".join(self.content),
+            "thinking": thinking,
+            "has_thinking": thinking is not None,
+            "usage": self.usage,
+            "id": self.id,
+            "stop_reason": stop_reason or self.stop_reason,
+        }
+
+
+async def _iter_stream_deltas(
+    response_data: AsyncGenerator[bytes, None],
+) -> AsyncGenerator[_StreamDelta, None]:
+    """
+    Yield the content, thinking, finish reason and usage of each chunk of a
+    Chat Completions-style SSE byte stream (Azure, or Claude via
+    ``claude_stream_generator``).  Events split across network chunks are
+    reassembled by ``SSEDecoder`` before parsing.
+    """
+    async for event in aiter_sse_events(response_data):
+        if event.data.strip() == "[DONE]":
+            return
+        try:
+            chunk_data = json.loads(event.data)
+            choices = chunk_data.get("choices") or [{}]
+            choice = choices[0] if isinstance(choices[0], dict) else {}
+            delta = choice.get("delta")
+            if not isinstance(delta, dict):
+                delta = {}
+            item = _StreamDelta(
+                content=delta.get("content") or None,
+                thinking=delta.get("thinking") or None,
+                finish_reason=choice.get("finish_reason"),
+                usage=chunk_data.get("usage") or None,
+                id=chunk_data.get("id"),
+            )
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON in stream: {event.data[:200]}")
+            continue
+        except Exception as e:
+            logger.error(f"Error processing stream chunk: {e}")
+            continue
+        if item.content or item.thinking or item.finish_reason or item.usage:
+            yield item
+
+
+def _parse_response_data(response_data: dict[str, Any]) -> dict[str, Any]:
+    """Normalise a non-streamed provider response into message fields."""
+    assistant_content = ""
+    thinking_content = None
+    redacted_thinking = None
+    has_thinking = False
+    stop_reason = None
+    response_id = response_data.get("id")
+    response_usage = response_data.get("usage")
+    # stop_reason handled per response type
+
+    # Parse Azure Responses API (o3/gpt-4.1 - object == "response" and "output" in response_data):
+    if response_data.get("object") == "response" and "output" in response_data:
+        logger.info("[AI_RESPONSE] Parsing Azure Responses API structure.")
+        output_items = response_data.get("output", [])
+        # Extract assistant content
+        message_item = next((item for item in output_items if item.get("type") == "message"), None)
+        if message_item and "content" in message_item:
+            content_blocks = message_item.get("content", [])
+            output_text_block = next((block for block in content_blocks if block.get("type") == "output_text"), None)
+            if output_text_block and "text" in output_text_block:
+                assistant_content = output_text_block.get("text", "")
+            else:
+                logger.error(f"[AI_RESPONSE] No 'output_text' block found in Responses API message item: {message_item}")
+                assistant_content = "[Error: No text content in response message]"
+        else:
+            logger.error(f"[AI_RESPONSE] No 'message' type found in Responses API 'output' array or content missing: {output_items}")
+            assistant_content = "[Error: No message content in AI response]"
+
+        # Determine stop_reason from status for Responses API
+        api_status = response_data.get("status")
+        if api_status == "completed":
+            stop_reason = "stop"
+        elif api_status == "failed":
+            stop_reason = "error"
+            if response_data.get("error") and response_data["error"].get("message"):
+                assistant_content = f"[Error: {response_data['error']['message']}]"
+            elif assistant_content == "[Error: No message content in AI response]" or not assistant_content:
+                assistant_content = "[Error: AI response failed without details]"
+        else:
+            stop_reason = api_status  # e.g., 'requires_action', or None
+
+        # Extract reasoning/thinking for Responses API
+        reasoning_item = next((item for item in output_items if item.get("type") == "reasoning"), None)
+        if reasoning_item and "summary" in reasoning_item:
+            summary_texts = [s.get("text") for s in reasoning_item.get("summary", []) if s.get("text")]
+            if summary_texts:
+                thinking_content = "\n".join(summary_texts)
+                has_thinking = True
+        redacted_thinking = None  # Not standard in Azure Responses API
+
+    else:
+        # Parse as standard Chat Completions API (choices) response
+        logger.info("[AI_RESPONSE] Parsing non-Responses API dictionary structure (e.g., Chat Completions).")
+        stop_reason = response_data.get("stop_reason")
+        choices = response_data.get("choices", [])
+        if choices:
+            message_data = choices[0].get("message", {})
+            assistant_content = message_data.get("content", "")
+            thinking_content = response_data.get("thinking")
+            redacted_thinking = response_data.get("redacted_thinking")
+            has_thinking = response_data.get("has_thinking", False)
+            if not stop_reason:
+                stop_reason = choices[0].get("finish_reason")
+        else:
+            logger.error(f"No 'choices' found in AI response: {response_data}")
+            assistant_content = "[Error: No response content generated]"
+            stop_reason = "error"
+
+    return {
+        "content": assistant_content,
+        "thinking": thinking_content,
+        "redacted_thinking": redacted_thinking,
+        "has_thinking": has_thinking,
+        "usage": response_usage,
+        "id": response_id,
+        "stop_reason": stop_reason,
+    }
+
+
+async def _save_assistant_message(
+    db: AsyncSession,
+    conversation_id: UUID,
+    model_id: str,
+    parsed: dict[str, Any],
+    retrieval: Optional[KnowledgeRetrieval] = None,
+) -> Message:
+    """Persist the assistant reply described by *parsed* (see ``_parse_response_data``)."""
+    assistant_content = parsed.get("content")
+    thinking_content = parsed.get("thinking")
+    redacted_thinking = parsed.get("redacted_thinking")
+    response_usage = parsed.get("usage")
+
+    # Construct metadata
+    metadata: dict[str, Any] = {}
+    if retrieval is not None and retrieval.used:
+        metadata["used_knowledge_context"] = True
+    if parsed.get("has_thinking"):
+        metadata["has_thinking"] = True
+    if thinking_content:
+        metadata["thinking"] = thinking_content
+    if redacted_thinking:
+        metadata["redacted_thinking"] = redacted_thinking
+    if response_usage:
+        metadata["usage"] = response_usage
+    if parsed.get("id"):
+        metadata["response_id"] = parsed["id"]
+    if parsed.get("stop_reason"):
+        metadata["stop_reason"] = parsed["stop_reason"]
+
+    # Create and save the assistant message
+    assistant_msg = Message(
+        conversation_id=conversation_id,
+        role="assistant",
+        content=assistant_content or "[No content generated]",
+        extra_data=metadata if metadata else None,
+    )
+    assistant_msg.thinking = thinking_content
+    assistant_msg.redacted_thinking = redacted_thinking
+    assistant_msg.metadata_dict = metadata
+    if retrieval is not None:
+        assistant_msg.context_used = retrieval.context_used()
+
+    # Stored count lets history loading skip re-tokenising this reply.
+    # completion_tokens only measures the text when no thinking/reasoning
+    # tokens were billed alongside it.
+    completion_tokens = (
+        response_usage.get("completion_tokens", 0) if response_usage else 0
+    )
+    reasoning_tokens = (
+        (response_usage.get("completion_tokens_details") or {}).get(
+            "reasoning_tokens", 0
+        )
+        if response_usage
+        else 0
+    )
+    if completion_tokens and not thinking_content and not reasoning_tokens:
+        assistant_msg.token_count = completion_tokens
+    else:
+        assistant_msg.token_count = count_tokens_text(
+            assistant_msg.content, model_id
+        )
+        if (
+            not response_usage
+            and assistant_content
+            and parsed.get("stop_reason") not in ("cancelled", "error")
+        ):
+            logger.warning(
+                f"API response missing usage data for model {model_id}. "
+                f"Estimated completion tokens: {assistant_msg.token_count}"
+            )
+
+    await save_model(db, assistant_msg)
+    logger.info(
+        f"Saved assistant message {assistant_msg.id} for conversation {conversation_id}"
+    )
+
+    return assistant_msg
+
+
+async def generate_ai_response(
+    conversation_id: UUID,
+    messages: List[dict[str, Any]],
+    model_id: str,
+    db: AsyncSession,
+    *,
+    options: AIResponseOptions | None = None,
+    retrieval: KnowledgeRetrieval | None = None,
+) -> Optional[Message]:
+    """
+    Generate an AI response for the given conversation, handling model specifics.
+
+    Pass the turn's *retrieval* when *messages* already contain its knowledge
+    context so the knowledge base is not searched a second time.
+    """
+
+    opts = options or AIResponseOptions()
+
+    # Validate inputs
+    if not db:
+        logger.error("Database session is required for generate_ai_response.")
+        return None
+
+    prepared = await _prepare_ai_request(
+        conversation_id, messages, model_id, db, opts, retrieval
+    )
+    if prepared is None:
+        return None
+    api_params, retrieval = prepared
 
     stream = opts.stream
 
@@ -181,166 +428,32 @@ async def generate_ai_response(
     try:
         response_data = await openai_chat(**api_params)
 
-        assistant_content = ""
-        thinking_content = None
-        redacted_thinking = None
-        has_thinking = False
-        response_usage = None
-        response_id = None
-        stop_reason = None
-
         if stream:
             logger.info("Processing streamed response.")
-            full_content = ""
+            reply = _StreamedReply()
             if isinstance(response_data, AsyncGenerator):
-                async for chunk_bytes in response_data:
-                    if not isinstance(chunk_bytes, bytes):
-                        logger.warning(
-                            f"Expected bytes in stream, got {type(chunk_bytes)}"
-                        )
-                        continue
-
-                    lines = chunk_bytes.decode("utf-8").splitlines()
-                    for line in lines:
-                        if line.startswith("data: "):
-                            data_str = line[len("data: "):]
-                            if data_str.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk_data = json.loads(data_str)
-                                choices = chunk_data.get("choices", [{}])
-                                if choices:
-                                    delta = choices[0].get("delta", {})
-                                    if isinstance(delta, dict) and "content" in delta:
-                                        content = delta.get("content")
-                                        if content is not None:
-                                            full_content += content
-                            except json.JSONDecodeError:
-                                logger.warning(f"Invalid JSON in stream: {data_str}")
-                            except Exception as e:
-                                logger.error(f"Error processing stream chunk: {e}")
-                assistant_content = full_content
+                async for delta in _iter_stream_deltas(response_data):
+                    reply.add(delta)
             else:
                 logger.error(
                     f"Expected AsyncGenerator for stream, got {type(response_data)}"
                 )
+            parsed = reply.parsed()
 
         elif isinstance(response_data, dict):
-            response_id = response_data.get("id")
-            response_usage = response_data.get("usage")
-            # stop_reason handled per response type
-
-            # Parse Azure Responses API (o3/gpt-4.1 - object == "response" and "output" in response_data):
-            if response_data.get("object") == "response" and "output" in response_data:
-                logger.info("[AI_RESPONSE] Parsing Azure Responses API structure.")
-                output_items = response_data.get("output", [])
-                # Extract assistant content
-                message_item = next((item for item in output_items if item.get("type") == "message"), None)
-                if message_item and "content" in message_item:
-                    content_blocks = message_item.get("content", [])
-                    output_text_block = next((block for block in content_blocks if block.get("type") == "output_text"), None)
-                    if output_text_block and "text" in output_text_block:
-                        assistant_content = output_text_block.get("text", "")
-                    else:
-                        logger.error(f"[AI_RESPONSE] No 'output_text' block found in Responses API message item: {message_item}")
-                        assistant_content = "[Error: No text content in response message]"
-                else:
-                    logger.error(f"[AI_RESPONSE] No 'message' type found in Responses API 'output' array or content missing: {output_items}")
-                    assistant_content = "[Error: No message content in AI response]"
-
-                # Determine stop_reason from status for Responses API
-                api_status = response_data.get("status")
-                if api_status == "completed":
-                    stop_reason = "stop"
-                elif api_status == "failed":
-                    stop_reason = "error"
-                    if response_data.get("error") and response_data["error"].get("message"):
-                        assistant_content = f"[Error: {response_data['error']['message']}]"
-                    elif assistant_content == "[Error: No message content in AI response]" or not assistant_content:
-                        assistant_content = "[Error: AI response failed without details]"
-                else:
-                    stop_reason = api_status  # e.g., 'requires_action', or None
-
-                # Extract reasoning/thinking for Responses API
-                reasoning_item = next((item for item in output_items if item.get("type") == "reasoning"), None)
-                if reasoning_item and "summary" in reasoning_item:
-                    summary_texts = [s.get("text") for s in reasoning_item.get("summary", []) if s.get("text")]
-                    if summary_texts:
-                        thinking_content = "\n".join(summary_texts)
-                        has_thinking = True
-                redacted_thinking = None  # Not standard in Azure Responses API
-
-            else:
-                # Parse as standard Chat Completions API (choices) response
-                logger.info("[AI_RESPONSE] Parsing non-Responses API dictionary structure (e.g., Chat Completions).")
-                stop_reason = response_data.get("stop_reason")
-                choices = response_data.get("choices", [])
-                if choices:
-                    message_data = choices[0].get("message", {})
-                    assistant_content = message_data.get("content", "")
-                    thinking_content = response_data.get("thinking")
-                    redacted_thinking = response_data.get("redacted_thinking")
-                    has_thinking = response_data.get("has_thinking", False)
-                    if not stop_reason:
-                        stop_reason = choices[0].get("finish_reason")
-                else:
-                    logger.error(f"No 'choices' found in AI response: {response_data}")
-                    assistant_content = "[Error: No response content generated]"
-                    stop_reason = "error"
+            parsed = _parse_response_data(response_data)
         else:
             logger.error(
                 f"Unexpected response type from openai_chat: {type(response_data)}"
             )
-            assistant_content = "[Error: Unexpected response format]"
-            stop_reason = "error"
-
-        # Construct metadata
-        metadata: dict[str, Any] = {}
-        if knowledge_context:
-            metadata["used_knowledge_context"] = True
-        if has_thinking:
-            metadata["has_thinking"] = True
-        if thinking_content:
-            metadata["thinking"] = thinking_content
-        if redacted_thinking:
-            metadata["redacted_thinking"] = redacted_thinking
-        if response_usage:
-            metadata["usage"] = response_usage
-        if response_id:
-            metadata["response_id"] = response_id
-        if stop_reason:
-            metadata["stop_reason"] = stop_reason
-
-        # Create and save the assistant message
-        assistant_msg = Message(
-            conversation_id=conversation_id,
-            role="assistant",
-            content=assistant_content or "[No content generated]",
-            extra_data=metadata if metadata else None,
-        )
-        assistant_msg.thinking = thinking_content
-        assistant_msg.redacted_thinking = redacted_thinking
-        assistant_msg.metadata_dict = metadata
-
-        await save_model(db, assistant_msg)
-        logger.info(
-            f"Saved assistant message {assistant_msg.id} for conversation {conversation_id}"
-        )
+            parsed = {
+                "content": "[Error: Unexpected response format]",
+                "stop_reason": "error",
+            }
 
-        # Track token usage
-        completion_tokens = (
-            response_usage.get("completion_tokens", 0) if response_usage else 0
+        return await _save_assistant_message(
+            db, conversation_id, model_id, parsed, retrieval
         )
-        # reasoning_tokens assignment removed: unused
-
-        if not response_usage and assistant_content:
-            completion_tokens = count_tokens_text(assistant_content, model_id)
-            logger.warning(
-                f"API response missing usage data for model {model_id}. "
-                f"Estimated completion tokens: {completion_tokens}"
-            )
-
-        return assistant_msg
 
     except HTTPException as http_exc:
         logger.error(
@@ -352,3 +465,89 @@ async def generate_ai_response(
         raise HTTPException(
             status_code=500, detail=f"Failed to generate AI response: {str(e)}"
         ) from e
+
+
+async def stream_ai_response(
+    conversation_id: UUID,
+    messages: List[dict[str, Any]],
+    model_id: str,
+    db: AsyncSession,
+    *,
+    options: AIResponseOptions | None = None,
+    retrieval: KnowledgeRetrieval | None = None,
+) -> AsyncGenerator[dict[str, Any], None]:
+    """
+    Stream an AI response for the given conversation as it is generated.
+
+    Yields ``{"type": "delta", "content": str}`` for every text fragment the
+    provider sends, then ``{"type": "message", "message": Message}`` once the
+    assistant message has been saved.  The message is written once, at the
+    end, with the streamed thinking, usage and finish reason.  If the
+    consumer stops early (client disconnect) the upstream request is closed
+    and whatever text arrived is saved with ``stop_reason="cancelled"``.
+    """
+    opts = replace(options or AIResponseOptions(), stream=True)
+
+    prepared = await _prepare_ai_request(
+        conversation_id, messages, model_id, db, opts, retrieval
+    )
+    if prepared is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    api_params, retrieval = prepared
+
+    response_data = await openai_chat(**api_params)
+
+    if isinstance(response_data, dict):
+        # Model without streaming support: deliver the full reply as one delta
+        parsed = _parse_response_data(response_data)
+        if parsed["content"]:
+            yield {"type": "delta", "content": parsed["content"]}
+        assistant_msg = await _save_assistant_message(
+            db, conversation_id, model_id, parsed, retrieval
+        )
+        yield {"type": "message", "message": assistant_msg}
+        return
+
+    if not isinstance(response_data, AsyncGenerator):
+        raise HTTPException(
+            status_code=500,
+            detail=f"Unexpected response type from openai_chat: {type(response_data)}",
+        )
+
+    reply = _StreamedReply()
+    deltas = _iter_stream_deltas(response_data)
+    stop_reason: Optional[str] = "cancelled"
+    try:
+        async for delta in deltas:
+            reply.add(delta)
+            if delta.content:
+                yield {"type": "delta", "content": delta.content}
+        stop_reason = None
+    except Exception:
+        stop_reason = "error"
+        raise
+    finally:
+        if stop_reason is not None:
+            # Runs on disconnect/cancellation too: shield the cleanup so the
+            # upstream connection is released and partial text is kept.
+            with anyio.CancelScope(shield=True):
+                await deltas.aclose()
+                await response_data.aclose()
+                if reply.content:
+                    try:
+                        await _save_assistant_message(
+                            db,
+                            conversation_id,
+                            model_id,
+                            reply.parsed(stop_reason),
+                            retrieval,
+                        )
+                    except Exception as e:
+                        logger.error(
+                            f"Failed to save partial response for conversation {conversation_id}: {e}"
+                        )
+
+    assistant_msg = await _save_assistant_message(
+        db, conversation_id, model_id, reply.parsed(), retrieval
+    )
+    yield {"type": "message", "message": assistant_msg}
@@ -33,6 +33,8 @@ class FileValidator:
         ".pdf": "document",
         ".doc": "document",
         ".docx": "document",
+        ".pptx": "document",
+        ".xlsx": "data",
         # Code
         ".py": "code",
         ".js": "code",
@@ -104,6 +106,45 @@ class FileValidator:
         """Get max file size in MB"""
         return cls.MAX_FILE_SIZE / (1024 * 1024)
 
+    # Byte patterns rejected by content scanning (matched case-insensitively)
+    MALICIOUS_PATTERNS = [
+        # Web exploits
+        b"<?php",
+        b"<script",
+        b"eval(",
+        # System commands
+        b"powershell",
+        b"cmd.exe",
+        b"/bin/bash",
+        b"wget",
+        # Suspicious patterns
+        b"base64_decode",
+        b"exec(",
+        b"system(",
+        b"passthru(",
+        # Dangerous file operations
+        b"file_put_contents",
+        b"fopen(",
+        b"unlink(",
+    ]
+    SCAN_SAMPLE_SIZE = 2 * 1024 * 1024  # first 2MB
+
+    @classmethod
+    def scan_content_sample(cls, sample: bytes) -> None:
+        """Raise ValueError if *sample* contains known malicious patterns."""
+        lower_sample = sample.lower()
+        found_patterns = [
+            pattern.decode("utf-8", errors="ignore")
+            for pattern in cls.MALICIOUS_PATTERNS
+            if pattern in lower_sample
+        ]
+
+        if found_patterns:
+            raise ValueError(
+                "File content contains potentially dangerous patterns:\n"
+                + "\n".join(f"- {p}" for p in found_patterns)
+            )
+
     @classmethod
     async def validate_upload_file(
         cls,
@@ -117,22 +158,18 @@ class FileValidator:
         - Preserves spaces in filenames when requested
         - Content scanning for malicious patterns
         - Detailed error messages
-        - Size validation
+        - Size validation (when the upload reports its size)
+
+        Callers that stream the upload themselves (see ``FileService.upload``)
+        pass ``scan_content=False`` and run :meth:`scan_content_sample` on the
+        sniff buffer collected while spooling, so the file is read only once.
         """
         original_filename = file.filename or "untitled"
 
-        # Starlette’s UploadFile doesn’t expose `.size` by default – fallback
-        # to a manual calculation when the attribute is missing.
-        file_size = getattr(file, "size", None)  # UPDATED
-        if file_size is None:  # NEW
-            try:
-                # Read the entire file content to get its size
-                content = await file.read()
-                file_size = len(content)
-                # Reset pointer to start
-                await file.seek(0)
-            except Exception:
-                file_size = None
+        # Starlette’s UploadFile may not expose `.size`; in that case the size
+        # is enforced by the caller while streaming instead of reading the
+        # whole file here.
+        file_size = getattr(file, "size", None)
 
         # Validate extension first
         if not cls.validate_extension(original_filename):
@@ -147,43 +184,9 @@ class FileValidator:
 
         if scan_content:
             # Sample first 2MB for deeper content scanning
-            sample = await file.read(2 * 1024 * 1024)
+            sample = await file.read(cls.SCAN_SAMPLE_SIZE)
             await file.seek(0)
-
-            # Enhanced malicious pattern detection
-            malicious_patterns = [
-                # Web exploits
-                b"<?php",
-                b"<script",
-                b"eval(",
-                # System commands
-                b"powershell",
-                b"cmd.exe",
-                b"/bin/bash",
-                b"wget",
-                # Suspicious patterns
-                b"base64_decode",
-                b"exec(",
-                b"system(",
-                b"passthru(",
-                # Dangerous file operations
-                b"file_put_contents",
-                b"fopen(",
-                b"unlink(",
-            ]
-
-            lower_sample = sample.lower()
-            found_patterns = [
-                pattern.decode("utf-8", errors="ignore")
-                for pattern in malicious_patterns
-                if pattern in lower_sample
-            ]
-
-            if found_patterns:
-                raise ValueError(
-                    "File content contains potentially dangerous patterns:\n"
-                    + "\n".join(f"- {p}" for p in found_patterns)
-                )
+            cls.scan_content_sample(sample)
 
         file_info = cls.get_file_info(original_filename)
 
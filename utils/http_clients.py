@@ -0,0 +1,98 @@
+"""
+utils/http_clients.py
+─────────────────────────────────────────────────────────────────────────
+Process-wide pooled ``httpx.AsyncClient`` instances, one per provider origin
+(scheme + host + port).
+
+Creating a client per request pays DNS, TCP and TLS setup on every model
+call.  Clients here are created at startup (or on first use), keep
+connections alive between calls, negotiate HTTP/2 when the ``h2`` package is
+installed, and are closed once on application shutdown.
+"""
+
+import logging
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (required by httpx for HTTP/2)
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_CLIENTS: Dict[str, httpx.AsyncClient] = {}
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def request_timeout(read: float) -> httpx.Timeout:
+    """
+    Per-phase timeout for a call whose response may take *read* seconds.
+
+    Connecting and acquiring a pooled connection fail fast; only reading
+    (model generation) gets the long budget.
+    """
+    return httpx.Timeout(
+        read,
+        connect=getattr(settings, "HTTP_CONNECT_TIMEOUT", 5.0),
+        pool=getattr(settings, "HTTP_POOL_TIMEOUT", 10.0),
+    )
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE and getattr(settings, "HTTP_CLIENT_HTTP2", True),
+        limits=httpx.Limits(
+            max_connections=getattr(settings, "HTTP_MAX_CONNECTIONS", 100),
+            max_keepalive_connections=getattr(settings, "HTTP_MAX_KEEPALIVE", 20),
+            keepalive_expiry=getattr(settings, "HTTP_KEEPALIVE_EXPIRY", 60.0),
+        ),
+        timeout=request_timeout(getattr(settings, "HTTP_READ_TIMEOUT", 60.0)),
+    )
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    """Return the shared client for the origin of *url*."""
+    key = _origin(url)
+    client = _CLIENTS.get(key)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _CLIENTS[key] = client
+    return client
+
+
+def init_http_clients(urls: Optional[list[str]] = None) -> None:
+    """Create clients for the configured model providers at startup."""
+    if urls is None:
+        urls = [
+            settings.AZURE_OPENAI_ENDPOINT,
+            getattr(settings, "CLAUDE_BASE_URL", ""),
+        ]
+    for url in urls:
+        if url:
+            get_http_client(url)
+    logger.info(
+        "HTTP clients ready",
+        extra={"origins": list(_CLIENTS), "http2": HTTP2_AVAILABLE},
+    )
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client (application shutdown)."""
+    clients = list(_CLIENTS.values())
+    _CLIENTS.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Error closing HTTP client: {e}")
@@ -1,8 +1,96 @@
+import hashlib
+import tempfile
+from dataclasses import dataclass
 from io import BytesIO, IOBase
-from typing import Union, BinaryIO
+from typing import Any, Callable, Optional, Union, BinaryIO
 
 FileContent = Union[bytes, bytearray, memoryview, BinaryIO]
 
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Raised while spooling when an upload exceeds the allowed size."""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"Upload exceeds maximum size of {max_size} bytes")
+        self.max_size = max_size
+
+
+@dataclass
+class SpooledUpload:
+    """
+    An upload read exactly once into a ``SpooledTemporaryFile``.
+
+    ``file`` is positioned at offset 0 and stays in memory until it grows
+    past the spool threshold, after which it rolls over to a temp file.
+    """
+
+    file: Any  # tempfile.SpooledTemporaryFile
+    sha256: str
+    size: int
+    sniff: bytes
+
+    def close(self) -> None:
+        self.file.close()
+
+
+async def spool_upload(
+    source: Any,
+    *,
+    max_size: Optional[int] = None,
+    sniff_size: int = 2 * 1024 * 1024,
+    spool_max_memory: int = 1024 * 1024,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    on_chunk: Optional[Callable[[bytes], None]] = None,
+) -> SpooledUpload:
+    """
+    Stream *source* (an ``UploadFile`` or anything with async ``read(n)``)
+    into a spooled temp file in a single pass.
+
+    SHA-256, byte count and the first *sniff_size* bytes (for content
+    scanning / type detection) are computed while copying, and *on_chunk*
+    receives every chunk so callers can fold in further per-chunk work.
+    Reading stops with :class:`UploadTooLargeError` as soon as *max_size*
+    is exceeded.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=spool_max_memory)
+    digest = hashlib.sha256()
+    sniff = bytearray()
+    size = 0
+    try:
+        while True:
+            chunk = await source.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise UploadTooLargeError(max_size)
+            digest.update(chunk)
+            if len(sniff) < sniff_size:
+                sniff.extend(chunk[: sniff_size - len(sniff)])
+            if on_chunk is not None:
+                on_chunk(chunk)
+            spool.write(chunk)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+
+    return SpooledUpload(
+        file=spool, sha256=digest.hexdigest(), size=size, sniff=bytes(sniff)
+    )
+
+
+def hash_stream(stream: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    """Return the SHA-256 of a seekable stream, leaving it at offset 0."""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
 def ensure_bytes(file_content: FileContent) -> bytes:
     """
     Convert various input types to raw bytes:
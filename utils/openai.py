@@ -1,3 +1,4 @@
+import json
 import random
 import time
 from typing import List, Optional, Any, AsyncGenerator, Union
@@ -11,6 +12,8 @@ from utils.model_registry import validate_model_and_params as _validate_model_pa
 from utils.tokens import count_tokens_messages
 from config import settings
 from utils.async_context import get_request_id, get_trace_id
+from utils.http_clients import get_http_client, request_timeout
+from utils.sse import SSEDecoder
 import logging
 
 OPENAI_SAMPLE_RATE = 0.5
@@ -553,11 +556,13 @@ async def _stream_azure_response(
         "api-key": settings.AZURE_OPENAI_API_KEY,
     }
     try:
-        async with httpx.AsyncClient() as client:
-            async with client.stream("POST", url, json=payload, headers=headers, timeout=180) as resp:
-                resp.raise_for_status()
-                async for chunk in resp.aiter_bytes():
-                    yield chunk
+        client = get_http_client(url)
+        async with client.stream(
+            "POST", url, json=payload, headers=headers, timeout=request_timeout(180)
+        ) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_bytes():
+                yield chunk
     except httpx.RequestError as e:
         logger.error(f"Error streaming from Azure: {str(e)}")
         raise RuntimeError(f"Unable to stream from Azure: {e}") from e
@@ -577,10 +582,12 @@ async def _send_azure_post_request(
     """Posts JSON data to Azure, raising HTTPException on error."""
     if logger is None:
         logger = logging.getLogger(__name__)
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(url, json=data, headers=headers, timeout=timeout)
-        resp.raise_for_status()
-        return resp.json()
+    client = get_http_client(url)
+    resp = await client.post(
+        url, json=data, headers=headers, timeout=request_timeout(timeout)
+    )
+    resp.raise_for_status()
+    return resp.json()
 
 # -----------------------------
 # Anthropic / Claude Handler
@@ -617,12 +624,15 @@ async def claude_chat(
             if payload.get("stream"):
                 return claude_stream_generator(payload, headers)
             else:
-                async with httpx.AsyncClient() as client:
-                    response = await client.post(
-                        settings.CLAUDE_BASE_URL, json=payload, headers=headers, timeout=120
-                    )
-                    response.raise_for_status()
-                    return _parse_claude_response(response.json())
+                client = get_http_client(settings.CLAUDE_BASE_URL)
+                response = await client.post(
+                    settings.CLAUDE_BASE_URL,
+                    json=payload,
+                    headers=headers,
+                    timeout=request_timeout(120),
+                )
+                response.raise_for_status()
+                return _parse_claude_response(response.json())
     except httpx.RequestError as e:
         if transaction is not None:
             transaction.set_tag("error", True)
@@ -736,15 +746,120 @@ def _parse_claude_response(response_data: dict[str, Any]) -> dict[str, Any]:
         ]
     return parsed
 
+def _sse_chunk(data: dict[str, Any]) -> bytes:
+    return f"data: {json.dumps(data)}\n\n".encode("utf-8")
+
+
+def _claude_event_to_chunk(
+    event: dict[str, Any], state: dict[str, Any]
+) -> Optional[dict[str, Any]]:
+    """
+    Translate one Anthropic stream event into a Chat Completions-style chunk.
+
+    ``state`` carries the message id, model and input token count from
+    ``message_start`` to later events.  Returns None for events without
+    client-visible content (ping, block start/stop, signatures).
+    """
+    etype = event.get("type")
+    if etype == "message_start":
+        message = event.get("message") or {}
+        state["id"] = message.get("id")
+        state["model"] = message.get("model")
+        state["input_tokens"] = (message.get("usage") or {}).get("input_tokens", 0)
+        delta: dict[str, Any] = {"role": "assistant"}
+    elif etype == "content_block_delta":
+        block_delta = event.get("delta") or {}
+        dtype = block_delta.get("type")
+        if dtype == "text_delta":
+            delta = {"content": block_delta.get("text", "")}
+        elif dtype == "thinking_delta":
+            delta = {"thinking": block_delta.get("thinking", "")}
+        else:
+            return None
+    elif etype == "message_delta":
+        output_tokens = (event.get("usage") or {}).get("output_tokens", 0)
+        input_tokens = state.get("input_tokens", 0)
+        return {
+            "id": state.get("id"),
+            "model": state.get("model"),
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": {},
+                    "finish_reason": (event.get("delta") or {}).get("stop_reason"),
+                }
+            ],
+            "usage": {
+                "prompt_tokens": input_tokens,
+                "completion_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+    elif etype == "error":
+        error = event.get("error") or {}
+        raise HTTPException(
+            status_code=502,
+            detail=f"Claude stream error ({error.get('type')}): {error.get('message')}",
+        )
+    else:
+        return None
+
+    return {
+        "id": state.get("id"),
+        "model": state.get("model"),
+        "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+    }
+
+
 async def claude_stream_generator(
     payload: dict[str, Any], headers: dict[str, str]
 ) -> AsyncGenerator[bytes, None]:
-    """Stream Claude output via an async generator."""
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(settings.CLAUDE_BASE_URL, json=payload, headers=headers, timeout=180)
-        resp.raise_for_status()
-        async for chunk in resp.aiter_bytes():
-            yield chunk
+    """
+    Stream Claude output as it is generated.
+
+    Anthropic's ``message_start`` / ``content_block_delta`` / ``message_delta``
+    events are re-emitted as Chat Completions-style ``data:`` lines (text in
+    ``choices[0].delta.content``) ending with ``data: [DONE]``, so callers
+    consume Claude and Azure streams the same way.
+    """
+    client = get_http_client(settings.CLAUDE_BASE_URL)
+    state: dict[str, Any] = {}
+    try:
+        async with client.stream(
+            "POST",
+            settings.CLAUDE_BASE_URL,
+            json=payload,
+            headers=headers,
+            timeout=request_timeout(180),
+        ) as resp:
+            if resp.is_error:
+                await resp.aread()
+            resp.raise_for_status()
+            decoder = SSEDecoder()
+            async for line in resp.aiter_lines():
+                sse_event = decoder.feed_line(line)
+                if sse_event is None:
+                    continue
+                try:
+                    event = json.loads(sse_event.data)
+                except json.JSONDecodeError:
+                    logging.getLogger(__name__).warning(
+                        f"Invalid JSON in Claude stream: {sse_event.data[:200]}"
+                    )
+                    continue
+                if event.get("type") == "message_stop":
+                    break
+                chunk = _claude_event_to_chunk(event, state)
+                if chunk is not None:
+                    yield _sse_chunk(chunk)
+        yield b"data: [DONE]\n\n"
+    except httpx.RequestError as e:
+        capture_exception(e)
+        raise HTTPException(status_code=503, detail="Unable to reach Claude service") from e
+    except httpx.HTTPStatusError as e:
+        detail = f"Claude request failed ({e.response.status_code}): {e.response.text[:200]}"
+        capture_exception(e)
+        raise HTTPException(e.response.status_code, detail=detail) from e
 
 # -----------------------------
 # Misc Utilities
@@ -771,10 +886,10 @@ async def get_moderation(text: str) -> dict[str, Any]:
     payload = {"input": text}
 
     try:
-        async with httpx.AsyncClient() as client:
-            r = await client.post(url, json=payload, headers=headers, timeout=15)
-            r.raise_for_status()
-            return r.json()
+        client = get_http_client(url)
+        r = await client.post(url, json=payload, headers=headers, timeout=request_timeout(15))
+        r.raise_for_status()
+        return r.json()
     except Exception as e:
         logger.error(f"Moderation call failed: {str(e)}")
         return {"error": str(e), "flagged": False}
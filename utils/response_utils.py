@@ -7,6 +7,7 @@ from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from sqlalchemy import MetaData
 from utils.serializers import to_serialisable
+from utils.http_clients import get_http_client, request_timeout
 
 
 logger = logging.getLogger(__name__)
@@ -136,17 +137,17 @@ async def azure_api_request(
         request_headers.update(headers)
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.request(
-                method,
-                url,
-                json=data,
-                params=params,
-                headers=request_headers,
-                timeout=60,
-            )
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client(url)
+        response = await client.request(
+            method,
+            url,
+            json=data,
+            params=params,
+            headers=request_headers,
+            timeout=request_timeout(60),
+        )
+        response.raise_for_status()
+        return response.json()
     except httpx.RequestError as e:
         logger.error(f"Error calling Azure API: {e}")
         raise RuntimeError(f"Unable to reach Azure API endpoint: {str(e)}")
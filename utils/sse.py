@@ -0,0 +1,122 @@
+"""
+utils/sse.py
+─────────────────────────────────────────────────────────────────────────
+Incremental Server-Sent Events decoder.
+
+Network chunks do not respect event boundaries: a ``data:`` line, or even a
+multi-byte UTF-8 character, may be split across two reads.  ``SSEDecoder``
+buffers the incomplete tail between ``feed()`` calls and only returns events
+once their terminating blank line has arrived.  Work per call is proportional
+to the size of the chunk, so decoding a stream is linear in its length.
+"""
+
+import codecs
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncGenerator, List, Optional
+
+
+@dataclass(slots=True)
+class SSEEvent:
+    data: str
+    event: Optional[str] = None
+    id: Optional[str] = None
+
+
+class SSEDecoder:
+    """Bytes (or lines) in, complete ``SSEEvent`` objects out."""
+
+    def __init__(self) -> None:
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._partial: List[str] = []  # pieces of the current unterminated line
+        self._pending_cr = False  # chunk ended in "\r"; may be half of "\r\n"
+        self._event: Optional[str] = None
+        self._id: Optional[str] = None
+        self._data: List[str] = []
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        """Decode a network chunk and return the events it completes."""
+        return self._feed_text(self._decoder.decode(chunk))
+
+    def flush(self) -> List[SSEEvent]:
+        """End of stream: emit any event left without a trailing blank line."""
+        text = self._decoder.decode(b"", final=True)
+        if self._pending_cr:
+            text = "\n" + text
+            self._pending_cr = False
+        events = self._feed_text(text)
+        if self._partial:
+            line = "".join(self._partial)
+            self._partial = []
+            event = self.feed_line(line)
+            if event is not None:
+                events.append(event)
+        event = self.feed_line("")
+        if event is not None:
+            events.append(event)
+        return events
+
+    def feed_line(self, line: str) -> Optional[SSEEvent]:
+        """Process one line (without its terminator); return an event if one completed."""
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None  # comment / keep-alive
+        name, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if name == "data":
+            self._data.append(value)
+        elif name == "event":
+            self._event = value
+        elif name == "id":
+            self._id = value
+        return None
+
+    def _dispatch(self) -> Optional[SSEEvent]:
+        if not self._data:
+            self._event = None
+            return None
+        event = SSEEvent(data="\n".join(self._data), event=self._event, id=self._id)
+        self._data = []
+        self._event = None
+        return event
+
+    def _feed_text(self, text: str) -> List[SSEEvent]:
+        if self._pending_cr:
+            text = "\r" + text
+            self._pending_cr = False
+        if text.endswith("\r"):
+            text = text[:-1]
+            self._pending_cr = True
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+
+        lines = text.split("\n")
+        if len(lines) == 1:
+            if text:
+                self._partial.append(text)
+            return []
+
+        if self._partial:
+            self._partial.append(lines[0])
+            lines[0] = "".join(self._partial)
+        self._partial = [lines[-1]] if lines[-1] else []
+
+        events = []
+        for line in lines[:-1]:
+            event = self.feed_line(line)
+            if event is not None:
+                events.append(event)
+        return events
+
+
+async def aiter_sse_events(
+    chunks: AsyncIterable[bytes],
+) -> AsyncGenerator[SSEEvent, None]:
+    """Yield events from an async byte stream as soon as each one is complete."""
+    decoder = SSEDecoder()
+    async for chunk in chunks:
+        for event in decoder.feed(chunk):
+            yield event
+    for event in decoder.flush():
+        yield event
@@ -2,8 +2,9 @@
 tokens.py
 Unified token-counting helpers.
 
-Two public helpers are provided so callers can work with raw text *or* the full
-list-of-messages structure common to OpenAI / Anthropic chat APIs.
+Public helpers are provided so callers can work with raw text *or* the full
+list-of-messages structure common to OpenAI / Anthropic chat APIs, one item at
+a time or in batches (``count_tokens_batch``, ``count_tokens_per_message``).
 
 Implementation notes:
 * If *tiktoken* is available we use the `cl100k_base` encoding which covers all
@@ -12,11 +13,16 @@ Implementation notes:
 * When tiktoken is missing – or for other providers – we fall back to a rough
   estimate of 4 characters per token (same heuristic already used throughout
   the codebase).
+* Counts are memoised in a bounded LRU (``TOKEN_COUNT_CACHE_SIZE`` entries)
+  keyed by encoding and text digest.
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
 from typing import Any, List, Optional
 
 import importlib.util
@@ -47,25 +53,103 @@ if _tiktoken_spec is not None:  # pragma: no cover – environment-dependent
         logger.debug("tiktoken initialisation failed; falling back (%s)", exc)
         _ENCODER = None
 
-    def _encode(text: str) -> int:  # UPDATED
-        """Return token count for *text* using tiktoken when available."""
-        if _ENCODER is None:
-            return -1
+
+# Memoisation ----------------------------------------------------------------
+#
+# The same strings are counted repeatedly (chunking, context trimming, usage
+# estimates, message saving).  Counts are cached in a bounded LRU keyed by
+# the encoding that produced them and a SHA-1 of the text, so large texts
+# are not retained.  Very short strings are cheaper to encode than to hash.
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "20000"))
+_CACHE_MIN_CHARS = 64
+_BATCH_THREADS = int(os.getenv("TOKEN_COUNT_THREADS", "4"))
+
+_cache: "OrderedDict[tuple[str, bytes], int]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _encoding_name() -> str:
+    return _ENCODER.name if _ENCODER is not None else "heuristic"
+
+
+def _cache_key(text: str) -> tuple[str, bytes]:
+    return _encoding_name(), hashlib.sha1(text.encode("utf-8", "surrogatepass")).digest()
+
+
+def _cache_get(key: tuple[str, bytes]) -> Optional[int]:
+    with _cache_lock:
+        count = _cache.get(key)
+        if count is not None:
+            _cache.move_to_end(key)
+        return count
+
+
+def _cache_put(key: tuple[str, bytes], count: int) -> None:
+    with _cache_lock:
+        _cache[key] = count
+        _cache.move_to_end(key)
+        while len(_cache) > TOKEN_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def _encode_uncached(texts: List[str]) -> List[int]:
+    """Token counts for *texts*: tiktoken (batched, threaded) or 4 chars/token."""
+    if _ENCODER is not None:
         try:
-            return len(_ENCODER.encode(text))
+            if len(texts) == 1:
+                return [len(_ENCODER.encode_ordinary(texts[0]))]
+            return [
+                len(tokens)
+                for tokens in _ENCODER.encode_ordinary_batch(
+                    texts, num_threads=_BATCH_THREADS
+                )
+            ]
         except Exception as exc:  # pragma: no cover – catch any runtime issue
             logger.debug("tiktoken failure: %s", exc)
-            return -1
+    return [(len(text) + 3) // 4 for text in texts]
 
-else:  # pragma: no cover
 
-    def _encode(_text: str) -> int:  # type: ignore
-        return -1  # force fallback
+def clear_token_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
 
 
 # Public helpers -------------------------------------------------------------
 
 
+def count_tokens_batch(
+    texts: List[str], model_id: Optional[str] = None
+) -> List[int]:
+    """Return token estimates for many *texts* at once (same order).
+
+    Cached texts are served from the LRU; the rest are encoded in a single
+    ``encode_ordinary_batch`` call spread over worker threads.
+    """
+
+    counts: List[int] = [0] * len(texts)
+    misses: List[int] = []
+    keys: dict[int, tuple[str, bytes]] = {}
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        if len(text) >= _CACHE_MIN_CHARS:
+            key = _cache_key(text)
+            cached = _cache_get(key)
+            if cached is not None:
+                counts[i] = cached
+                continue
+            keys[i] = key
+        misses.append(i)
+
+    if misses:
+        for i, count in zip(misses, _encode_uncached([texts[i] for i in misses])):
+            counts[i] = count
+            if i in keys:
+                _cache_put(keys[i], count)
+    return counts
+
+
 def count_tokens_text(text: str, model_id: Optional[str] = None) -> int:
     """Return token estimate for *text*.
 
@@ -75,33 +159,37 @@ def count_tokens_text(text: str, model_id: Optional[str] = None) -> int:
 
     if not text:
         return 0
+    if len(text) < _CACHE_MIN_CHARS:
+        return _encode_uncached([text])[0]
+
+    key = _cache_key(text)
+    count = _cache_get(key)
+    if count is None:
+        count = _encode_uncached([text])[0]
+        _cache_put(key, count)
+    return count
+
 
-    # Use tiktoken path if available (works well for Azure/OpenAI family)
-    tok_count = _encode(text)
-    if tok_count != -1:
-        logger.debug(
-            "Token count calculated using tiktoken",
-            extra={
-                "event_type": "token_count_tiktoken",
-                "text_length": len(text),
-                "token_count": tok_count,
-                "model_id": model_id,
-            },
-        )
-        return tok_count
-
-    # Fallback – simple heuristic (4 chars ≈ 1 token)
-    fallback_count = (len(text) + 3) // 4
-    logger.debug(
-        "Token count calculated using fallback heuristic",
-        extra={
-            "event_type": "token_count_fallback",
-            "text_length": len(text),
-            "token_count": fallback_count,
-            "model_id": model_id,
-        },
-    )
-    return fallback_count
+def _metadata_overhead(msg: Any) -> int:
+    # Very rough overhead for metadata – we do *not* call tiktoken here
+    if isinstance(msg, dict) and isinstance(msg.get("metadata"), dict):
+        return (len(str(msg["metadata"])) + 7) // 8
+    return 0
+
+
+def count_tokens_per_message(
+    messages: List[dict[str, Any]], model_id: Optional[str] = None
+) -> List[int]:
+    """Return the token estimate of each chat message (batched)."""
+
+    contents = [
+        str(msg.get("content", "")) if isinstance(msg, dict) else ""
+        for msg in messages
+    ]
+    return [
+        count + _metadata_overhead(msg)
+        for msg, count in zip(messages, count_tokens_batch(contents, model_id))
+    ]
 
 
 def count_tokens_messages(
@@ -109,13 +197,4 @@ def count_tokens_messages(
 ) -> int:
     """Return combined token estimate for a list of chat *messages*."""
 
-    total = 0
-    for msg in messages:
-        content = msg.get("content", "") if isinstance(msg, dict) else ""
-        total += count_tokens_text(str(content), model_id=model_id)
-
-        # Very rough overhead for metadata – we do *not* call tiktoken here
-        if "metadata" in msg and isinstance(msg["metadata"], dict):
-            total += (len(str(msg["metadata"])) + 7) // 8
-
-    return total
+    return sum(count_tokens_per_message(messages, model_id))